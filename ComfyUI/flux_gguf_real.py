@@ -8,21 +8,37 @@ ComfyUI API를 통한 진짜 이미지 생성
     
     # 별도 터미널에서 실행
     python flux_gguf_real.py --model Q4_K_S --prompt "a beautiful sunset"
+
+    # 벤치마크 스윕 (동시성/해상도/스텝, cold/warm, p50/p95/p99, images/min)
+    python flux_gguf_real.py --bench --concurrency 1,2,4 --resolutions 512,1024 --steps_list 4
+
+    # 기준 결과 대비 회귀 검사
+    python flux_gguf_real.py --compare gguf_results/gguf_benchmark_<ts>.json
 """
 
 import requests
 import json
 import time
 import uuid
+import random
+import itertools
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PIL import Image
 import io
 from typing import Dict, List, Optional, Tuple
 import argparse
+import sys
 from datetime import datetime
 import pandas as pd
 
+try:
+    import websocket  # websocket-client (노드별 실행 시간 측정용, 선택)
+except ImportError:
+    websocket = None
+
 class ComfyUIGGUFRunner:
     """ComfyUI GGUF 실제 추론 실행기"""
     
@@ -104,7 +120,7 @@ class ComfyUIGGUFRunner:
         """GGUF 워크플로우 생성"""
         
         if seed is None:
-            seed = int(time.time())
+            seed = random.randrange(2**32)  # 같은 초에 제출된 실행이 ComfyUI 캐시를 타지 않도록
         
         # FLUX.1-schnell 최적화 워크플로우
         workflow = {
@@ -246,6 +262,104 @@ class ComfyUIGGUFRunner:
                 "generation_time": time.time() - start_time
             }
     
+    def free_memory(self) -> bool:
+        """모델 언로드 + VRAM 해제 (/free) → 다음 실행을 cold start 로 만듦"""
+        try:
+            response = requests.post(
+                f"{self.url}/free",
+                json={"unload_models": True, "free_memory": True},
+                timeout=30
+            )
+            return response.status_code == 200
+        except Exception as e:
+            self.logger.warning(f"/free 호출 실패: {e}")
+            return False
+
+    @staticmethod
+    def history_timing(task_info: Dict) -> Dict:
+        """
+        history status.messages 의 서버 타임스탬프(ms)로 실행 시간 계산
+        (폴링 간격과 무관한 서버측 시간)
+        """
+        stamps = {}
+        cached_nodes = []
+        node_times = {}
+
+        for name, data in task_info.get("status", {}).get("messages", []):
+            if "timestamp" in data:
+                stamps[name] = data["timestamp"] / 1000.0
+            if name == "execution_cached":
+                cached_nodes = data.get("nodes", [])
+            # 노드별 시간을 기록하는 빌드(확장 노드 등)가 있으면 함께 수집
+            if data.get("node") is not None and "execution_time" in data:
+                node_times[str(data["node"])] = float(data["execution_time"])
+
+        end = stamps.get("execution_success") or stamps.get("execution_error")
+        exec_time = end - stamps["execution_start"] if end and "execution_start" in stamps else None
+
+        return {
+            "exec_start_ts": stamps.get("execution_start"),
+            "exec_time": exec_time,
+            "cached_nodes": cached_nodes,
+            "node_times": node_times
+        }
+
+    def run_timed(self,
+                  gguf_model: str,
+                  prompt: str,
+                  poll_interval: float = 0.1,
+                  timeout: int = 300,
+                  **kwargs) -> Dict:
+        """
+        벤치마크용 단일 실행: 이미지 다운로드 없이 제출→완료 시간만 측정
+        - latency: 클라이언트 기준 제출~완료 감지 (poll_interval 만큼의 오차)
+        - exec_time: 서버 history 기준 실행 시간
+        - queue_wait: 제출~서버 실행 시작 (로컬 서버일 때만 의미 있음)
+        - fully_cached: 모든 노드가 ComfyUI 캐시에서 나옴 (샘플링 안 함 → 지연 통계에서 제외)
+        """
+        workflow = self.create_workflow(gguf_model, prompt, **kwargs)
+        submitted = time.time()
+
+        try:
+            response = requests.post(
+                f"{self.url}/prompt",
+                json={"prompt": workflow, "client_id": self.client_id},
+                timeout=30
+            )
+            response.raise_for_status()
+            prompt_id = response.json()["prompt_id"]
+        except Exception as e:
+            return {"success": False, "error": str(e), "latency": time.time() - submitted}
+
+        while time.time() - submitted < timeout:
+            try:
+                response = requests.get(f"{self.url}/history/{prompt_id}", timeout=10)
+                if response.status_code == 200 and prompt_id in response.json():
+                    task_info = response.json()[prompt_id]
+                    status = task_info.get("status", {})
+                    if status.get("completed", False) or status.get("status_str") == "error":
+                        latency = time.time() - submitted
+                        timing = self.history_timing(task_info)
+                        queue_wait = None
+                        if timing["exec_start_ts"]:
+                            queue_wait = max(0.0, timing["exec_start_ts"] - submitted)
+                        return {
+                            "success": bool(status.get("completed", False)),
+                            "prompt_id": prompt_id,
+                            "latency": latency,
+                            "exec_time": timing["exec_time"],
+                            "queue_wait": queue_wait,
+                            "cached_nodes": len(timing["cached_nodes"]),
+                            "fully_cached": len(timing["cached_nodes"]) >= len(workflow),
+                            "node_times": timing["node_times"],
+                            "submitted_at": submitted
+                        }
+            except Exception as e:
+                self.logger.warning(f"상태 확인 실패: {e}")
+            time.sleep(poll_interval)
+
+        return {"success": False, "prompt_id": prompt_id, "error": "Timeout", "latency": time.time() - submitted}
+
     def _wait_completion(self, prompt_id: str, timeout: int = 300) -> Tuple[bool, Dict]:
         """작업 완료 대기"""
         
@@ -315,6 +429,83 @@ class ComfyUIGGUFRunner:
         
         return images
 
+class NodeTimingListener:
+    """
+    ComfyUI 웹소켓 'executing' 이벤트로 노드별 실행 시간 측정
+    (기본 history 에는 노드별 시간이 없으므로 보조 수단으로 사용)
+    """
+
+    def __init__(self, runner: ComfyUIGGUFRunner):
+        self.runner = runner
+        self.node_times: Dict[str, Dict[str, float]] = {}
+        self._current: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._ws = None
+        self._thread = None
+
+    def start(self) -> bool:
+        if websocket is None:
+            self.runner.logger.warning("websocket-client 미설치: 노드별 시간은 history 제공분만 사용")
+            return False
+        ws_url = self.runner.url.replace("https://", "wss://").replace("http://", "ws://")
+        try:
+            self._ws = websocket.create_connection(f"{ws_url}/ws?clientId={self.runner.client_id}", timeout=10)
+            self._ws.settimeout(None)
+        except Exception as e:
+            self.runner.logger.warning(f"웹소켓 연결 실패 (노드별 시간 생략): {e}")
+            return False
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return True
+
+    def _loop(self):
+        while True:
+            try:
+                msg = self._ws.recv()
+            except Exception:
+                return
+            if not isinstance(msg, str):
+                continue  # 미리보기 바이너리 무시
+            try:
+                event = json.loads(msg)
+            except ValueError:
+                continue
+            if event.get("type") != "executing":
+                continue
+
+            data = event.get("data", {})
+            prompt_id, node = data.get("prompt_id"), data.get("node")
+            now = time.perf_counter()
+            with self._lock:
+                prev = self._current.pop(prompt_id, None)
+                if prev:
+                    times = self.node_times.setdefault(prompt_id, {})
+                    times[prev[0]] = times.get(prev[0], 0.0) + (now - prev[1])
+                if node is not None:
+                    self._current[prompt_id] = (str(node), now)
+
+    def pop(self, prompt_id: str) -> Dict[str, float]:
+        with self._lock:
+            return self.node_times.pop(prompt_id, {})
+
+    def stop(self):
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    """선형 보간 백분위수 (q: 0~100)"""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    k = (len(values) - 1) * q / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
 class GGUFPerformanceTester:
     """GGUF 성능 테스터"""
     
@@ -377,6 +568,193 @@ class GGUFPerformanceTester:
         
         return df
     
+    def run_benchmark(self,
+                      model_list: List[str],
+                      test_prompts: List[str],
+                      resolutions: List[int],
+                      steps_list: List[int],
+                      concurrency_levels: List[int],
+                      repeats: int = 3,
+                      cold: bool = True) -> Dict:
+        """
+        벤치마크 스윕: 모델 × 해상도 × 스텝 × 동시성
+        - cold: /free 로 모델을 내린 뒤 1회 실행 (모델 로딩 포함)
+        - warm: 동시성 c 로 max(repeats, c) 건 실행, 처리량(images/min) 측정
+        - 실행마다 다른 seed (프롬프트가 반복돼도 ComfyUI 결과 캐시를 타지 않게)
+        """
+        listener = NodeTimingListener(self.runner)
+        has_ws = listener.start()
+        runs = []
+        seeds = itertools.count(random.randrange(2**31))
+
+        try:
+            for model in model_list:
+                for res in resolutions:
+                    for steps in steps_list:
+                        params = {"width": res, "height": res, "steps": steps}
+
+                        if cold:
+                            self.runner.logger.info(f"[cold] {model} {res}px {steps}steps")
+                            self.runner.free_memory()
+                            wall_start = time.time()
+                            run = self.runner.run_timed(model, test_prompts[0], seed=next(seeds), **params)
+                            runs.append(self._bench_row(run, listener if has_ws else None, model, res, steps,
+                                                        "cold", 1, time.time() - wall_start))
+
+                        for c in concurrency_levels:
+                            n = max(repeats, c)
+                            self.runner.logger.info(f"[warm] {model} {res}px {steps}steps 동시성 {c} × {n}건")
+                            jobs = [(test_prompts[i % len(test_prompts)], next(seeds)) for i in range(n)]
+                            wall_start = time.time()
+                            with ThreadPoolExecutor(max_workers=c) as pool:
+                                results = list(pool.map(
+                                    lambda job: self.runner.run_timed(model, job[0], seed=job[1], **params), jobs))
+                            wall = time.time() - wall_start
+                            for run in results:
+                                runs.append(self._bench_row(run, listener if has_ws else None, model, res, steps,
+                                                            "warm", c, wall, batch_size=n))
+        finally:
+            listener.stop()
+
+        return {
+            "meta": {
+                "timestamp": datetime.now().isoformat(),
+                "comfyui_url": self.runner.url,
+                "models": model_list,
+                "resolutions": resolutions,
+                "steps": steps_list,
+                "concurrency": concurrency_levels,
+                "repeats": repeats,
+                "node_timing_source": "websocket" if has_ws else "history"
+            },
+            "summary": self.summarize(runs),
+            "runs": runs
+        }
+
+    @staticmethod
+    def _bench_row(run: Dict, listener: Optional[NodeTimingListener], model: str, res: int, steps: int,
+                   phase: str, concurrency: int, wall: float, batch_size: int = 1) -> Dict:
+        node_times = dict(run.get("node_times") or {})
+        if listener is not None and run.get("prompt_id"):
+            # 마지막 executing(None) 이벤트가 도착할 시간을 잠깐 준다
+            time.sleep(0.05)
+            ws_times = listener.pop(run["prompt_id"])
+            node_times = node_times or ws_times
+        return {
+            "model_name": model,
+            "resolution": res,
+            "steps": steps,
+            "phase": phase,
+            "concurrency": concurrency,
+            "batch_size": batch_size,
+            "batch_wall_time": wall,
+            "success": run.get("success", False),
+            "error": run.get("error"),
+            "latency": run.get("latency"),
+            "exec_time": run.get("exec_time"),
+            "queue_wait": run.get("queue_wait"),
+            "cached_nodes": run.get("cached_nodes"),
+            "fully_cached": run.get("fully_cached", False),
+            "node_times": node_times
+        }
+
+    @staticmethod
+    def summarize(runs: List[Dict]) -> List[Dict]:
+        """
+        (모델, 해상도, 스텝, phase, 동시성) 별 p50/p95/p99, images/min, 노드별 평균 시간.
+        전 노드 캐시 적중 실행은 생성이 아니므로 통계에서 빼고 cached_runs 로만 셈
+        """
+        groups: Dict[Tuple, List[Dict]] = {}
+        for r in runs:
+            key = (r["model_name"], r["resolution"], r["steps"], r["phase"], r["concurrency"])
+            groups.setdefault(key, []).append(r)
+
+        summary = []
+        for (model, res, steps, phase, c), rows in groups.items():
+            cached = [r for r in rows if r["success"] and r.get("fully_cached")]
+            ok = [r for r in rows if r["success"] and not r.get("fully_cached")]
+            latencies = [r["latency"] for r in ok]
+            exec_times = [r["exec_time"] for r in ok if r["exec_time"] is not None]
+            walls = {r["batch_wall_time"] for r in rows}
+            total_wall = sum(walls) or None
+
+            node_totals: Dict[str, List[float]] = {}
+            for r in ok:
+                for node, t in (r["node_times"] or {}).items():
+                    node_totals.setdefault(node, []).append(t)
+
+            summary.append({
+                "key": f"{model}|{res}|{steps}|{phase}|c{c}",
+                "model_name": model,
+                "resolution": res,
+                "steps": steps,
+                "phase": phase,
+                "concurrency": c,
+                "count": len(rows),
+                "success": len(ok),
+                "cached_runs": len(cached),
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "exec_p50": _percentile(exec_times, 50),
+                "images_per_min": (len(ok) / total_wall * 60.0) if total_wall else None,
+                "node_mean": {n: sum(v) / len(v) for n, v in sorted(node_totals.items())}
+            })
+        return summary
+
+    def save_benchmark(self, report: Dict) -> Tuple[Path, Path]:
+        """원시 실행 기록 CSV + 요약 JSON 을 나란히 저장"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        csv_path = self.output_dir / f"gguf_benchmark_{timestamp}.csv"
+        json_path = self.output_dir / f"gguf_benchmark_{timestamp}.json"
+
+        pd.DataFrame(report["runs"]).to_csv(csv_path, index=False)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        self.runner.logger.info(f"벤치마크 저장: {csv_path}, {json_path}")
+        return csv_path, json_path
+
+    @staticmethod
+    def compare_to_baseline(report: Dict, baseline_path: str, tolerance: float = 0.10) -> List[Dict]:
+        """
+        기준 JSON 과 비교해 회귀 항목 반환
+        - p95 지연이 (1+tolerance) 배 초과로 늘었거나
+        - images/min 이 (1-tolerance) 배 미만으로 줄었으면 회귀
+        """
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = {s["key"]: s for s in json.load(f).get("summary", [])}
+
+        regressions = []
+        for cur in report["summary"]:
+            base = baseline.get(cur["key"])
+            if not base:
+                continue
+            if base.get("p95") and cur.get("p95") and cur["p95"] > base["p95"] * (1 + tolerance):
+                regressions.append({"key": cur["key"], "metric": "p95",
+                                    "baseline": base["p95"], "current": cur["p95"]})
+            if (base.get("images_per_min") and cur.get("images_per_min") is not None
+                    and cur["images_per_min"] < base["images_per_min"] * (1 - tolerance)):
+                regressions.append({"key": cur["key"], "metric": "images_per_min",
+                                    "baseline": base["images_per_min"], "current": cur["images_per_min"]})
+        return regressions
+
+    @staticmethod
+    def print_benchmark(report: Dict):
+        print("\n" + "="*88)
+        print("FLUX GGUF 벤치마크 요약 (지연: 초)")
+        print("="*88)
+        print(f"{'key':<52}{'ok':>6}{'p50':>8}{'p95':>8}{'p99':>8}{'img/min':>9}")
+        fmt = lambda v: f"{v:.2f}" if isinstance(v, (int, float)) else "-"
+        for s in report["summary"]:
+            print(f"{s['key']:<52}{s['success']:>3}/{s['count']:<2}{fmt(s['p50']):>8}"
+                  f"{fmt(s['p95']):>8}{fmt(s['p99']):>8}{fmt(s['images_per_min']):>9}")
+            if s.get("cached_runs"):
+                print(f"    전 노드 캐시 적중 {s['cached_runs']}건 (통계 제외)")
+            if s["node_mean"]:
+                nodes = ", ".join(f"#{n}={t:.2f}" for n, t in s["node_mean"].items())
+                print(f"    노드별 평균: {nodes}")
+
     def analyze_results(self, df: pd.DataFrame):
         """결과 분석"""
         
@@ -428,10 +806,19 @@ def main():
     parser = argparse.ArgumentParser(description='FLUX GGUF 실제 성능 테스트')
     parser.add_argument('--model', default='flux1-schnell-Q4_K_S.gguf', help='GGUF 모델 파일명')
     parser.add_argument('--prompt', default='a beautiful landscape', help='테스트 프롬프트')
-    parser.add_argument('--compare', action='store_true', help='모든 모델 비교')
+    parser.add_argument('--compare', nargs='?', const=True, default=False,
+                        help='모든 모델 비교 (기준 JSON 경로를 주면 벤치마크 후 회귀 검사)')
     parser.add_argument('--resolution', type=int, default=512, help='해상도')
     parser.add_argument('--steps', type=int, default=4, help='생성 스텝')
     parser.add_argument('--comfyui_url', default='http://127.0.0.1:8188', help='ComfyUI URL')
+    parser.add_argument('--bench', action='store_true', help='벤치마크 스윕 실행')
+    parser.add_argument('--models', default=None, help='벤치마크 모델 (콤마 구분, all=전체, 기본: --model)')
+    parser.add_argument('--concurrency', default='1', help='동시성 레벨 (예: 1,2,4)')
+    parser.add_argument('--resolutions', default=None, help='해상도 목록 (예: 512,1024, 기본: --resolution)')
+    parser.add_argument('--steps_list', default=None, help='스텝 목록 (예: 4,8, 기본: --steps)')
+    parser.add_argument('--repeats', type=int, default=3, help='설정별 warm 반복 횟수')
+    parser.add_argument('--no_cold', action='store_true', help='cold start 측정 생략')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='회귀 판정 허용 비율')
     
     args = parser.parse_args()
     
@@ -452,7 +839,41 @@ def main():
         # 성능 테스터 초기화
         tester = GGUFPerformanceTester(runner)
         
-        if args.compare:
+        baseline_path = args.compare if isinstance(args.compare, str) else None
+
+        if args.bench or baseline_path:
+            # 벤치마크 스윕
+            if args.models == "all":
+                model_list = gguf_models
+            else:
+                model_list = [m.strip() for m in (args.models or args.model).split(",") if m.strip()]
+                missing = [m for m in model_list if m not in gguf_models]
+                if missing:
+                    runner.logger.warning(f"없는 모델 제외: {missing}")
+                    model_list = [m for m in model_list if m in gguf_models] or gguf_models[:1]
+
+            to_ints = lambda text, default: [int(v) for v in text.split(",")] if text else [default]
+            report = tester.run_benchmark(
+                model_list,
+                TEST_PROMPTS,
+                resolutions=to_ints(args.resolutions, args.resolution),
+                steps_list=to_ints(args.steps_list, args.steps),
+                concurrency_levels=to_ints(args.concurrency, 1),
+                repeats=args.repeats,
+                cold=not args.no_cold
+            )
+            tester.save_benchmark(report)
+            tester.print_benchmark(report)
+
+            if baseline_path:
+                regressions = tester.compare_to_baseline(report, baseline_path, args.tolerance)
+                if regressions:
+                    print(f"\n⚠️ 회귀 {len(regressions)}건 (허용 {args.tolerance:.0%})")
+                    for r in regressions:
+                        print(f"  {r['key']} {r['metric']}: {r['baseline']:.2f} → {r['current']:.2f}")
+                    sys.exit(1)
+                print("\n회귀 없음")
+        elif args.compare:
             # 모든 모델 비교
             df_results = tester.compare_models(
                 gguf_models,
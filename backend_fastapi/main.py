@@ -29,6 +29,10 @@ STORAGE_ROOT = os.getenv(
     os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
 )
 
+# 외부 HTTP 녹화/재생 (HTTP_CASSETTE_MODE=record|replay 일 때만 동작, 라우터 import 전에 설치)
+from routes import http_cassette
+http_cassette.install()
+
 # ----------------------------
 # 2. FastAPI 앱 설정
 # ----------------------------
@@ -47,8 +51,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "traceresponse", "X-Profile-File"],
 )
 
+# 요청 지연/진행 중 요청 메트릭 (/metrics)
+from routes import metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# 단계별 span + Server-Timing 헤더, 나가는 HTTP 에 traceparent 전파 (/traces)
+from routes import tracing
+tracing.instrument_http()
+app.add_middleware(tracing.TracingMiddleware)
+
+# 관리자 헤더/쿼리 또는 1/N 샘플 요청만 샘플링 프로파일 → data/profiles (/profiles)
+from routes import profiling
+app.add_middleware(profiling.ProfilingMiddleware)
+
 # ----------------------------
 # ✅ 4-1. 정적 파일 경로 설정 (추가 부분)
 # ----------------------------
@@ -63,11 +81,38 @@ app.mount("/outputs", StaticFiles(directory=ROOT_DIR / "data" / "outputs"), name
 # ----------------------------
 # 4. 라우터 등록
 # ----------------------------
-from routes import copy_from_image, image_from_copy, menu_service
+from routes import copy_from_image, image_from_copy, menu_batch, menu_documents, menu_service, menu_vector
 
 app.include_router(copy_from_image.router, prefix="/generate", tags=["copy_from_image"])
 app.include_router(image_from_copy.router, prefix="/generate", tags=["image_from_copy"])
 app.include_router(menu_service.router, prefix="/generate", tags=["menu_service"])
+app.include_router(menu_documents.router, prefix="/generate", tags=["menu_service"])
+app.include_router(menu_batch.router, prefix="/generate", tags=["menu_service"])
+app.include_router(menu_vector.router, prefix="/generate", tags=["menu_service"])
+app.include_router(metrics.router, tags=["metrics"])
+app.include_router(tracing.router, tags=["tracing"])
+app.include_router(profiling.router, tags=["profiling"])
+
+# 한국어 지원 Google Fonts 파일을 백그라운드로 미리 받아 둠 (data/fonts)
+from routes import font_service
+
+@app.on_event("startup")
+def prefetch_fonts():
+    font_service.start_prefetch()
+
+# 메뉴판 렌더/PNG 인코딩 워커 프로세스 (RENDER_WORKERS, 시작 시 예열)
+from routes import render_executor
+
+@app.on_event("startup")
+def start_render_workers():
+    render_executor.start()
+
+@app.on_event("shutdown")
+def stop_render_workers():
+    render_executor.shutdown()
+
+# 모델 폴백 체인 헤지 상태 (체인별 p90 대기, 헤지 수/승리 수, 남은 토큰)
+from routes import hedging
 
 # ----------------------------
 # 5. 헬스체크 & 연결 상태 확인
@@ -84,6 +129,11 @@ def health_check():
         "comfyui_tunnel": COMFYUI_URL,
         "translation_tunnel": TRANSLATION_BRIDGE_URL,
         "storage_root": STORAGE_ROOT,
+        "http_cassette": http_cassette.stats(),
+        "font_faces": font_service.face_cache_info(),
+        "render_executor": render_executor.stats(),
+        "menu_documents": menu_documents.cache_info(),
+        "hedging": hedging.stats(),
     }
 
 # ----------------------------
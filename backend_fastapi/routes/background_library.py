@@ -0,0 +1,266 @@
+# backend_fastapi/routes/background_library.py
+"""
+메뉴판 배경 라이브러리 (DALL·E 결과 재사용)
+
+- 생성한 배경을 정규화 키 (키워드 소문자 정렬, 팔레트 #RRGGBB 정렬, 크기) 와 함께 data/bg_library 에 저장
+- 이미지마다 작은 색/질감 기술자 (대표색 4개 + 비율, 평균 밝기, 질감 세기) 를 색인에 보관
+- 조회: 정확히 같은 키 → 바로 반환, 없으면 같은 크기 중 팔레트 거리/키워드 겹침이 기준 이내인 근사 항목
+  (팔레트 거리는 요청 색마다 항목의 선언 팔레트 + 실제 대표색 중 가장 가까운 색까지의 평균 RGB 거리, 0~1)
+- 개수/용량 상한을 넘으면 마지막 사용 시각 기준 LRU 로 삭제
+
+환경 변수:
+    BG_LIBRARY_ENABLED           1(기본) | 0
+    BG_LIBRARY_MAX_ITEMS         보관 개수 (기본 300)
+    BG_LIBRARY_MAX_MB            보관 용량 (기본 500MB)
+    BG_LIBRARY_PALETTE_DIST      근사 매칭 허용 팔레트 거리 (기본 0.12)
+    BG_LIBRARY_KEYWORD_OVERLAP   근사 매칭 최소 키워드 Jaccard (기본 0.5)
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from . import metrics
+
+ENABLED = os.getenv("BG_LIBRARY_ENABLED", "1").lower() not in ("0", "false", "no")
+MAX_ITEMS = int(os.getenv("BG_LIBRARY_MAX_ITEMS", "300"))
+MAX_BYTES = int(float(os.getenv("BG_LIBRARY_MAX_MB", "500")) * 1024 * 1024)
+PALETTE_DIST = float(os.getenv("BG_LIBRARY_PALETTE_DIST", "0.12"))
+KEYWORD_OVERLAP = float(os.getenv("BG_LIBRARY_KEYWORD_OVERLAP", "0.5"))
+
+STORAGE_ROOT = os.getenv(
+    "STORAGE_ROOT",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+)
+LIBRARY_DIR = os.path.join(STORAGE_ROOT, "bg_library")
+INDEX_PATH = os.path.join(LIBRARY_DIR, "index.json")
+
+_HEX = re.compile(r"^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$")
+_MAX_RGB_DIST = float(np.sqrt(3 * 255 ** 2))
+
+_lock = threading.Lock()
+_index: Optional[Dict[str, Dict[str, Any]]] = None  # id → entry
+
+
+# ---------------------------------------------------------------
+# 정규화 / 기술자
+# ---------------------------------------------------------------
+def normalize_keywords(keywords: Optional[List[str]]) -> List[str]:
+    out = set()
+    for k in keywords or []:
+        k = " ".join(str(k).lower().split())
+        if k:
+            out.add(k)
+    return sorted(out)
+
+
+def normalize_palette(colors: Optional[List[str]]) -> List[str]:
+    out = set()
+    for c in colors or []:
+        m = _HEX.match(str(c).strip())
+        if not m:
+            continue
+        h = m.group(1)
+        if len(h) == 3:
+            h = "".join(ch * 2 for ch in h)
+        out.add("#" + h.upper())
+    return sorted(out)
+
+
+def library_key(keywords: List[str], palette: List[str], size: Tuple[int, int]) -> str:
+    raw = json.dumps([keywords, palette, list(size)], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def _rgb(hex_color: str) -> Tuple[int, int, int]:
+    return int(hex_color[1:3], 16), int(hex_color[3:5], 16), int(hex_color[5:7], 16)
+
+
+def describe(img: Image.Image) -> Dict[str, Any]:
+    """대표색 4개(+비율), 평균 밝기, 질감 세기 (64px 축소본의 밝기 그래디언트 평균)"""
+    small = img.convert("RGB").resize((64, 64), Image.Resampling.BILINEAR)
+    q = small.quantize(colors=4, method=Image.Quantize.MEDIANCUT)
+    pal = q.getpalette()[:12]
+    counts = np.bincount(np.asarray(q).ravel(), minlength=4)[:4]
+    order = np.argsort(-counts)
+    colors = [f"#{pal[i * 3]:02X}{pal[i * 3 + 1]:02X}{pal[i * 3 + 2]:02X}" for i in order if counts[i] > 0]
+    weights = [round(float(counts[i]) / counts.sum(), 3) for i in order if counts[i] > 0]
+
+    luma = np.asarray(small.convert("L"), dtype=np.float32) / 255.0
+    gy, gx = np.gradient(luma)
+    return {
+        "colors": colors,
+        "weights": weights,
+        "luma": round(float(luma.mean()), 3),
+        "texture": round(float(np.hypot(gx, gy).mean()), 4),
+    }
+
+
+def palette_distance(request: List[str], entry: Dict[str, Any]) -> float:
+    """요청 색마다 (선언 팔레트 ∪ 실제 대표색) 중 최근접 색까지 거리의 평균 (0~1)"""
+    targets = list(entry.get("palette", [])) + list(entry.get("descriptor", {}).get("colors", []))
+    if not request or not targets:
+        return 1.0
+    a = np.array([_rgb(c) for c in request], dtype=np.float32)
+    b = np.array([_rgb(c) for c in targets], dtype=np.float32)
+    d = np.linalg.norm(a[:, None, :] - b[None, :, :], axis=2).min(axis=1)
+    return float(d.mean() / _MAX_RGB_DIST)
+
+
+def keyword_overlap(a: List[str], b: List[str]) -> float:
+    sa, sb = set(a), set(b)
+    if not sa and not sb:
+        return 1.0
+    return len(sa & sb) / len(sa | sb)
+
+
+# ---------------------------------------------------------------
+# 색인
+# ---------------------------------------------------------------
+def _load_index() -> Dict[str, Dict[str, Any]]:
+    global _index
+    if _index is None:
+        try:
+            with open(INDEX_PATH, encoding="utf-8") as f:
+                _index = {e["id"]: e for e in json.load(f).get("items", [])}
+        except (OSError, ValueError, KeyError):
+            _index = {}
+    return _index
+
+
+def _save_index():
+    os.makedirs(LIBRARY_DIR, exist_ok=True)
+    tmp = f"{INDEX_PATH}.{uuid.uuid4().hex[:6]}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"items": list(_index.values())}, f, ensure_ascii=False)
+    os.replace(tmp, INDEX_PATH)
+
+
+def file_path(entry: Dict[str, Any]) -> str:
+    return os.path.join(LIBRARY_DIR, entry["file"])
+
+
+def _evict():
+    """개수/용량 상한 초과분을 last_used 오래된 순으로 삭제 (lock 안에서 호출)"""
+    entries = sorted(_index.values(), key=lambda e: e.get("last_used", 0))
+    total = sum(e.get("bytes", 0) for e in entries)
+    while entries and (len(entries) > MAX_ITEMS or total > MAX_BYTES):
+        e = entries.pop(0)
+        total -= e.get("bytes", 0)
+        _index.pop(e["id"], None)
+        try:
+            os.remove(file_path(e))
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------
+# 조회 / 저장
+# ---------------------------------------------------------------
+def lookup(keywords: Optional[List[str]], colors: Optional[List[str]],
+           size: Tuple[int, int]) -> Optional[Tuple[Dict[str, Any], str]]:
+    """(entry, "exact"|"near") 또는 None. 찾으면 last_used/hits 갱신"""
+    if not ENABLED:
+        return None
+    kw, pal, size = normalize_keywords(keywords), normalize_palette(colors), (int(size[0]), int(size[1]))
+    key = library_key(kw, pal, size)
+    with _lock:
+        index = _load_index()
+        best, match, best_score = None, None, None
+        for e in index.values():
+            if tuple(e.get("size", ())) != size or not os.path.exists(file_path(e)):
+                continue
+            if e.get("key") == key:
+                best, match = e, "exact"
+                break
+            overlap = keyword_overlap(kw, e.get("keywords", []))
+            dist = palette_distance(pal, e)
+            if overlap < KEYWORD_OVERLAP or dist > PALETTE_DIST:
+                continue
+            score = dist - 0.1 * overlap
+            if best_score is None or score < best_score:
+                best, match, best_score = e, "near", score
+        metrics.cache_event("bg_library", best is not None)
+        if best is None:
+            return None
+        best["last_used"] = time.time()
+        best["hits"] = best.get("hits", 0) + 1
+        try:
+            _save_index()
+        except OSError as e:
+            print(f"[background_library] index 저장 실패: {e}")
+        return dict(best), match
+
+
+def store(img: Image.Image, keywords: Optional[List[str]], colors: Optional[List[str]],
+          size: Tuple[int, int], data: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    """생성된 배경을 PNG 로 저장하고 색인에 추가 (같은 키는 덮어씀). data 는 이미 인코딩된 PNG"""
+    if not ENABLED:
+        return None
+    kw, pal, size = normalize_keywords(keywords), normalize_palette(colors), (int(size[0]), int(size[1]))
+    key = library_key(kw, pal, size)
+    entry_id = f"{key}_{uuid.uuid4().hex[:6]}"
+    os.makedirs(LIBRARY_DIR, exist_ok=True)
+    path = os.path.join(LIBRARY_DIR, f"{entry_id}.png")
+    if data is None:
+        img.save(path, "PNG", optimize=True)
+    else:
+        with open(path, "wb") as f:
+            f.write(data)
+    now = time.time()
+    entry = {
+        "id": entry_id,
+        "key": key,
+        "file": f"{entry_id}.png",
+        "keywords": kw,
+        "palette": pal,
+        "size": list(size),
+        "descriptor": describe(img),
+        "bytes": os.path.getsize(path),
+        "created": now,
+        "last_used": now,
+        "hits": 0,
+    }
+    with _lock:
+        index = _load_index()
+        for old in [e for e in index.values() if e.get("key") == key]:
+            index.pop(old["id"], None)
+            try:
+                os.remove(file_path(old))
+            except OSError:
+                pass
+        index[entry_id] = entry
+        _evict()
+        _save_index()
+    metrics.output_written("bg_library", path, entry["bytes"])
+    return dict(entry)
+
+
+def publish(entry: Dict[str, Any], dest_dir: str, name: str) -> str:
+    """라이브러리 파일을 outputs 로 하드링크 (불가하면 복사) → 라이브러리에서 지워져도 URL 유지"""
+    os.makedirs(dest_dir, exist_ok=True)
+    dest = os.path.join(dest_dir, name)
+    try:
+        os.link(file_path(entry), dest)
+    except OSError:
+        shutil.copyfile(file_path(entry), dest)
+    return dest
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        index = _load_index()
+        return {
+            "enabled": ENABLED,
+            "items": len(index),
+            "bytes": sum(e.get("bytes", 0) for e in index.values()),
+            "hits": sum(e.get("hits", 0) for e in index.values()),
+        }
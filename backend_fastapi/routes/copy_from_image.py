@@ -9,6 +9,8 @@ from urllib3.util.retry import Retry
 from fastapi import APIRouter, File, UploadFile, HTTPException, Form
 from dotenv import load_dotenv, find_dotenv
 
+from . import hedging, metrics, tracing
+
 router = APIRouter()
 ALLOWED_EXTS = {"jpg","jpeg","png","webp"}
 
@@ -34,6 +36,8 @@ os.makedirs(UPLOAD_DIR, exist_ok=True); os.makedirs(OUTPUT_DIR, exist_ok=True)
 MODEL_VISION  = os.getenv("OPENAI_VISION_MODEL","gpt-4o-mini")
 MODEL_FALLBACK= os.getenv("OPENAI_VISION_FALLBACK_MODEL","gpt-4o")
 MAX_FILE_MB   = float(os.getenv("MAX_FILE_MB","15"))
+# 1차 모델이 관측 p90 안에 답하지 않으면 MODEL_FALLBACK 을 병렬로 (표본이 모이기 전엔 이 초만큼 대기)
+VISION_HEDGE_DELAY = float(os.getenv("VISION_HEDGE_DELAY","15"))
 
 # (중요) OpenAI BASE가 백엔드 자신을 가리키면 즉시 차단
 def _same_host(a, b):
@@ -64,9 +68,30 @@ def _headers():
         h["OpenAI-Project"] = proj
     return h
 
-def _session():
-    s=requests.Session(); ad=HTTPAdapter(max_retries=Retry(total=2,backoff_factor=.5,status_forcelist=[429,500,502,503,504],allowed_methods=frozenset(["POST"])))
+def _session(retries=2):
+    # raise_on_status=False: 재시도를 다 쓰면(헤지 경로는 0회) 마지막 4xx/5xx 응답을 그대로 돌려줌 → validate 가 무효 처리
+    s=requests.Session(); ad=HTTPAdapter(max_retries=Retry(total=retries,backoff_factor=.5,status_forcelist=[429,500,502,503,504],allowed_methods=frozenset(["POST"]),raise_on_status=False))
     s.mount("https://",ad); s.mount("http://",ad); return s
+
+def _post_chat(chain,url,payload):
+    """
+    payload["model"] → MODEL_FALLBACK 체인. 1차 ≥400/예외면 바로, 느리면(p90 초과) 병렬로 폴백 → 먼저 온 2xx 사용.
+    헤지가 켜져 있고 폴백 모델이 있으면 상태코드 재시도(backoff)는 하지 않음 (폴백이 재시도 역할). 반환 (응답, 사용한 모델)
+    """
+    def attempt(model):
+        def post():
+            body={**payload,"model":model}
+            print("[openai-call] url   =", url)
+            print("[openai-call] model =", model)
+            with metrics.upstream("openai",model) as call:
+                r=_session(0 if hedging.ENABLED and len(models)>1 else 2).post(url,headers=_headers(),json=body,timeout=(10,120)); call.status(r.status_code)
+            print("[openai-call] status=", r.status_code)
+            try: print("[openai-call] body  =", (r.text or "")[:1000])
+            except: pass
+            return r
+        return model,post
+    models=[payload["model"]]+([MODEL_FALLBACK] if payload["model"]!=MODEL_FALLBACK else [])
+    return hedging.call(chain,[attempt(m) for m in models],validate=lambda r:r.status_code<400,default_delay=VISION_HEDGE_DELAY)
 def _data_url(b,ct): return f"data:{(ct or 'image/png')};base64,{base64.b64encode(b).decode()}"
 def _smart_trim(t,l):
     t=(t or "").strip()
@@ -303,11 +328,12 @@ async def copy_from_image(
         if size_mb>MAX_FILE_MB: raise HTTPException(400,f"File too large: {size_mb:.2f} MB (limit {MAX_FILE_MB} MB)")
         ct=file.content_type or mimetypes.guess_type(file.filename)[0] or "image/jpeg"
 
-        save_name=f"upload_{_now_str()}_{uuid.uuid4().hex[:8]}.{ext}"
-        save_path=os.path.join(UPLOAD_DIR,save_name)
-        with open(save_path,"wb") as f: f.write(content)
+        with tracing.span("upload",bytes=len(content)):
+            save_name=f"upload_{_now_str()}_{uuid.uuid4().hex[:8]}.{ext}"
+            save_path=os.path.join(UPLOAD_DIR,save_name)
+            with open(save_path,"wb") as f: f.write(content)
 
-        image_data_url=_data_url(content,ct)
+            image_data_url=_data_url(content,ct)
         platform_hint=_platform_hint(platform)
         involvement=_involvement("",category_hint,price_hint,involvement_override)
         goal=style_goal if style_goal!="auto" else ("low_involvement_push" if involvement=="low" else "high_involvement_compare")
@@ -372,25 +398,11 @@ async def copy_from_image(
                    {"role":"user","content":[{"type":"text","text":base_text},{"type":"image_url","image_url":{"url":image_data_url}}]},
                  ],
                  "temperature":temp,"response_format":{"type":"json_object"}}
-        s=_session()
-
-        # --- 디버그: 1차 호출 ---
-        print("[openai-call] url   =", url)
-        print("[openai-call] model =", payload["model"])
-        r=s.post(url,headers=_headers(),json=payload,timeout=(10,120))
-        print("[openai-call] status=", r.status_code)
-        try: print("[openai-call] body  =", (r.text or "")[:1000])
-        except: pass
-
-        if r.status_code>=400 and payload["model"]!=MODEL_FALLBACK:
-            payload["model"]=MODEL_FALLBACK
-            print("[openai-call] fallback ->", payload["model"])
-            r=s.post(url,headers=_headers(),json=payload,timeout=(10,120))
-            print("[openai-call] status=", r.status_code)
-            try: print("[openai-call] body  =", (r.text or "")[:1000])
-            except: pass
 
-        r.raise_for_status()
+        with tracing.span("openai.copy",model=payload["model"]):
+            # 1차 모델 → MODEL_FALLBACK (실패 시 순차, 느리면 헤지)
+            r,payload["model"]=_post_chat("copy_from_image",url,payload)
+            r.raise_for_status()
 
         data=r.json()
         raw=(data.get("choices",[{}])[0].get("message",{}) or {}).get("content","") or "{}"
@@ -405,15 +417,16 @@ async def copy_from_image(
             norm.append({"headline":head,"subline":sub,"hashtags":tags,"reasons":c.get("reasons","")})
         if not norm: norm=[{"headline":"딱 맞는 한 줄","subline":"이미지의 장점을 간결하게 담았습니다.","hashtags":["#추천"],"reasons":"fallback"}]
 
-        scored=[]
-        for c in norm:
-            s1=_score(c,char_limit_headline,char_limit_subline,banned,(platform or "").lower())
-            s2=_style_score(c,goal,involvement,char_limit_headline)
-            s3=_boost_persona(c,persona_spec); s4=_boost_brand(c,brand_name)
-            scored.append((s1+s2+s3+s4,c))
-        scored.sort(key=lambda x:x[0], reverse=True)
-        best=scored[0][1]
-        _ = _diverse(scored,k=min(3,len(scored)),sim=0.6)  # diversified (대안은 아래서 다시 계산해 반환)
+        with tracing.span("score",candidates=len(norm)):
+            scored=[]
+            for c in norm:
+                s1=_score(c,char_limit_headline,char_limit_subline,banned,(platform or "").lower())
+                s2=_style_score(c,goal,involvement,char_limit_headline)
+                s3=_boost_persona(c,persona_spec); s4=_boost_brand(c,brand_name)
+                scored.append((s1+s2+s3+s4,c))
+            scored.sort(key=lambda x:x[0], reverse=True)
+            best=scored[0][1]
+            _ = _diverse(scored,k=min(3,len(scored)),sim=0.6)  # diversified (대안은 아래서 다시 계산해 반환)
 
         refine_needed=False; refine_reqs=[]
         if must_kw and user_keywords and not (_any_in(best["headline"],user_keywords) or _any_in(best["subline"],user_keywords)):
@@ -439,23 +452,10 @@ async def copy_from_image(
                     {"role":"user","content":json.dumps(best,ensure_ascii=False)},
                 ],
                 "temperature":0.3,"response_format":{"type":"json_object"}}
-            # --- 디버그: 2차 편집 호출 ---
-            print("[openai-call] url   =", url)
-            print("[openai-call] model =", refine_payload["model"])
-            rr=s.post(url,headers=_headers(),json=refine_payload,timeout=(10,120))
-            print("[openai-call] status=", rr.status_code)
-            try: print("[openai-call] body  =", (rr.text or "")[:1000])
-            except: pass
-
-            if rr.status_code>=400 and refine_payload["model"]!=MODEL_FALLBACK:
-                refine_payload["model"]=MODEL_FALLBACK
-                print("[openai-call] fallback ->", refine_payload["model"])
-                rr=s.post(url,headers=_headers(),json=refine_payload,timeout=(10,120))
-                print("[openai-call] status=", rr.status_code)
-                try: print("[openai-call] body  =", (rr.text or "")[:1000])
-                except: pass
-
-            rr.raise_for_status()
+            with tracing.span("openai.refine",model=refine_payload["model"]):
+                # 2차 편집 호출 (같은 폴백/헤지 정책, 지연 표본은 따로)
+                rr,refine_payload["model"]=_post_chat("copy_refine",url,refine_payload)
+                rr.raise_for_status()
             rb=(rr.json().get("choices",[{}])[0].get("message",{}) or {}).get("content","{}")
             ro=_json_obj(rb,{})
             best={"headline":_smart_trim(ro.get("headline",best["headline"]),char_limit_headline),
@@ -468,24 +468,26 @@ async def copy_from_image(
             if brand_name.lower() not in combo:
                 best["subline"]=_smart_trim((best.get("subline") or "").rstrip()+f" · {brand_name}",char_limit_subline)
 
-        log_name=f"copy_from_image_{_now_str()}_{uuid.uuid4().hex[:8]}.txt"
-        log_path=os.path.join(OUTPUT_DIR,log_name)
-        try:
-            with open(log_path,"w",encoding="utf-8") as f:
-                f.write(f"[IMAGE]\n{os.path.abspath(save_path)}\n\n")
-                ctx={"tone":tone,"platform":platform,"target_audience":target_audience,"brand":brand,"product":product,
-                     "char_limit_headline":char_limit_headline,"char_limit_subline":char_limit_subline,"hashtags_n":hashtags_n,
-                     "model":payload["model"],"n_candidates":n_candidates,"creativity":temp,"persona":persona,
-                     "persona_resolved":_parse_persona(persona),"user_keywords":user_keywords,"must_include_keywords":must_kw,
-                     "trend_style":trend_style,"meme_keywords":meme_keywords or auto_meme,"allow_emoji":allow_emoji,
-                     "involvement":involvement,"style_goal":goal,"price_hint":price_hint,"category_hint":category_hint,
-                     "business_name":business_name,"brand_used":brand_name,"must_include_brand":must_brand}
-                f.write("[CONTEXT]\n"); f.write(json.dumps(ctx,ensure_ascii=False,indent=2))
-                f.write("\n\n[CANDIDATES]\n"); f.write(json.dumps([c for _,c in scored],ensure_ascii=False,indent=2))
-                f.write("\n\n[BEST]\n"); f.write(json.dumps(best,ensure_ascii=False,indent=2))
-                usage=data.get("usage")
-                if usage: f.write("\n\n[USAGE]\n"); f.write(json.dumps(usage,ensure_ascii=False,indent=2))
-        except: pass
+        with tracing.span("write_log"):
+            log_name=f"copy_from_image_{_now_str()}_{uuid.uuid4().hex[:8]}.txt"
+            log_path=os.path.join(OUTPUT_DIR,log_name)
+            try:
+                with open(log_path,"w",encoding="utf-8") as f:
+                    f.write(f"[IMAGE]\n{os.path.abspath(save_path)}\n\n")
+                    ctx={"tone":tone,"platform":platform,"target_audience":target_audience,"brand":brand,"product":product,
+                         "char_limit_headline":char_limit_headline,"char_limit_subline":char_limit_subline,"hashtags_n":hashtags_n,
+                         "model":payload["model"],"n_candidates":n_candidates,"creativity":temp,"persona":persona,
+                         "persona_resolved":_parse_persona(persona),"user_keywords":user_keywords,"must_include_keywords":must_kw,
+                         "trend_style":trend_style,"meme_keywords":meme_keywords or auto_meme,"allow_emoji":allow_emoji,
+                         "involvement":involvement,"style_goal":goal,"price_hint":price_hint,"category_hint":category_hint,
+                         "business_name":business_name,"brand_used":brand_name,"must_include_brand":must_brand}
+                    f.write("[CONTEXT]\n"); f.write(json.dumps(ctx,ensure_ascii=False,indent=2))
+                    f.write("\n\n[CANDIDATES]\n"); f.write(json.dumps([c for _,c in scored],ensure_ascii=False,indent=2))
+                    f.write("\n\n[BEST]\n"); f.write(json.dumps(best,ensure_ascii=False,indent=2))
+                    usage=data.get("usage")
+                    if usage: f.write("\n\n[USAGE]\n"); f.write(json.dumps(usage,ensure_ascii=False,indent=2))
+            except: pass
+        metrics.output_written("copy_log",log_path)
 
         uploaded_path=os.path.abspath(save_path).replace("\\","/")
         uploaded_url=f"{BACKEND_PUBLIC_URL}/static/uploads/{save_name}"
@@ -523,21 +525,8 @@ async def suggest_keywords(file: UploadFile = File(...), n: int = Form(6)):
         {"role":"system","content":"You extract concise Korean keywords from images. Always return JSON."},
         {"role":"user","content":[{"type":"text","text":prompt},{"type":"image_url","image_url":{"url":image_data_url}}]}
     ],"temperature":0.2,"response_format":{"type":"json_object"}}
-    s=_session()
-    # 디버그: suggest 호출
-    print("[openai-call] url   =", f"{OPENAI_BASE}/chat/completions")
-    print("[openai-call] model =", payload["model"])
-    r=s.post(f"{OPENAI_BASE}/chat/completions",headers=_headers(),json=payload,timeout=(10,120))
-    print("[openai-call] status=", r.status_code)
-    try: print("[openai-call] body  =", (r.text or "")[:1000])
-    except: pass
-    if r.status_code>=400 and MODEL_VISION!=MODEL_FALLBACK:
-        payload["model"]=MODEL_FALLBACK
-        print("[openai-call] fallback ->", payload["model"])
-        r=s.post(f"{OPENAI_BASE}/chat/completions",headers=_headers(),json=payload,timeout=(10,120))
-        print("[openai-call] status=", r.status_code)
-        try: print("[openai-call] body  =", (r.text or "")[:1000])
-        except: pass
+    # suggest 호출: 1차 모델 → MODEL_FALLBACK (실패 시 순차, 느리면 헤지)
+    r,_=_post_chat("suggest_keywords",f"{OPENAI_BASE}/chat/completions",payload)
     r.raise_for_status()
     parsed=_json_obj((r.json().get("choices",[{}])[0].get("message",{}) or {}).get("content","{}"),{"keywords":[]})
     return {"ok":True,"keywords":_norm_keywords(parsed,n=max(1,min(int(n),8)))}
@@ -0,0 +1,285 @@
+# backend_fastapi/routes/font_service.py
+"""
+Google Fonts 폰트 서비스 (디스크 캐시 + FreeType face LRU)
+
+- 폰트 파일: URL 의 sha256 로 이름 붙인 TTF 를 data/fonts 에 저장 (한 번 받으면 재시작 후에도 재사용)
+- webfonts 목록: 필요한 필드만 data/fonts/webfonts.json 에 저장, TTL 이 지나면 갱신 (실패 시 이전 목록 사용)
+- FontResolver: 요청 하나에서 스타일별 폰트 패밀리를 한 번만 고르고 크기만 바꿔 재사용
+  (예전에는 78/44/30 크기마다 다른 패밀리를 골라 매번 다운로드)
+- face LRU: (파일 경로, 크기) → FreeTypeFont, 개수 상한 (파일 바이트는 메모리에 들고 있지 않음)
+- prefetch: 앱 시작 시 백그라운드 스레드로 한국어 지원 패밀리 파일을 미리 받음
+
+환경 변수:
+    GOOGLE_FONTS_API_KEY        없으면 기본 폰트(NotoSansKR)만 사용
+    FONT_CATALOG_TTL_HOURS      webfonts 목록 유효 시간 (기본 24)
+    FONT_FACE_CACHE_MAX         메모리에 둘 FreeType face 수 (기본 64)
+    FONT_FAMILIES_PER_CATEGORY  카테고리별 후보 패밀리 수, 인기순 상위 N (기본 10, 0=전체)
+    FONT_PREFETCH               1(기본) | 0
+"""
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from PIL import ImageFont
+
+from . import metrics, tracing
+
+GOOGLE_FONTS_API_KEY = os.getenv("GOOGLE_FONTS_API_KEY")
+CATALOG_TTL = float(os.getenv("FONT_CATALOG_TTL_HOURS", "24")) * 3600
+FACE_CACHE_MAX = int(os.getenv("FONT_FACE_CACHE_MAX", "64"))
+FAMILIES_PER_CATEGORY = int(os.getenv("FONT_FAMILIES_PER_CATEGORY", "10"))
+PREFETCH = os.getenv("FONT_PREFETCH", "1").lower() not in ("0", "false", "no")
+
+FONT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "fonts"))
+DEFAULT_FONT_REGULAR = os.path.join(FONT_DIR, "NotoSansKR-Regular.ttf")
+
+STORAGE_ROOT = os.getenv(
+    "STORAGE_ROOT",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+)
+FONT_CACHE_DIR = os.path.join(STORAGE_ROOT, "fonts")
+CATALOG_PATH = os.path.join(FONT_CACHE_DIR, "webfonts.json")
+
+CATEGORIES = ("sans-serif", "serif", "handwriting")
+
+
+def category_for(style_desc: Optional[str]) -> str:
+    """'명조','손글씨' 등의 한글 키워드로 Google Fonts category 유추"""
+    s = style_desc or ""
+    if "명조" in s or "serif" in s.lower():
+        return "serif"
+    if "손글씨" in s or "hand" in s.lower():
+        return "handwriting"
+    return "sans-serif"
+
+
+# ---------------------------------------------------------------
+# webfonts 목록 (TTL + 디스크 저장)
+# ---------------------------------------------------------------
+_catalog: Optional[List[Dict[str, Any]]] = None
+_catalog_fetched_at = 0.0
+_catalog_lock = threading.Lock()
+
+
+def _load_catalog_file() -> Tuple[Optional[List[Dict[str, Any]]], float]:
+    try:
+        with open(CATALOG_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("items") or [], float(data.get("fetched_at", 0))
+    except (OSError, ValueError):
+        return None, 0.0
+
+
+def _atomic_write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _download_catalog() -> List[Dict[str, Any]]:
+    with metrics.upstream("google_fonts", "list") as call, tracing.span("font_list_download"):
+        resp = requests.get(
+            f"https://www.googleapis.com/webfonts/v1/webfonts?key={GOOGLE_FONTS_API_KEY}&sort=popularity",
+            timeout=20
+        )
+        call.status(resp.status_code)
+    resp.raise_for_status()
+    # 렌더링에 필요한 필드만 보관 (전체 응답은 수 MB)
+    items = [
+        {"family": it.get("family"), "category": it.get("category"), "files": it.get("files", {})}
+        for it in resp.json().get("items", [])
+        if "korean" in it.get("subsets", [])
+    ]
+    return items
+
+
+def catalog() -> List[Dict[str, Any]]:
+    """한국어 subset 을 가진 패밀리 목록 (인기순). 메모리 → 디스크 → API 순으로 조회"""
+    global _catalog, _catalog_fetched_at
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog, _catalog_fetched_at = _load_catalog_file()
+        fresh = _catalog is not None and time.time() - _catalog_fetched_at < CATALOG_TTL
+        metrics.cache_event("google_fonts_list", fresh)
+        if fresh:
+            return _catalog
+        try:
+            items = _download_catalog()
+            _catalog, _catalog_fetched_at = items, time.time()
+            _atomic_write(CATALOG_PATH, json.dumps(
+                {"fetched_at": _catalog_fetched_at, "items": items}, ensure_ascii=False).encode("utf-8"))
+        except Exception as e:
+            if not _catalog:
+                raise
+            print(f"[font_service] webfonts 목록 갱신 실패, 이전 목록 사용: {e}")
+        return _catalog
+
+
+def candidates(category: str) -> List[Dict[str, Any]]:
+    rows = [f for f in catalog() if f.get("category") == category and f.get("files")]
+    return rows[:FAMILIES_PER_CATEGORY] if FAMILIES_PER_CATEGORY > 0 else rows
+
+
+def _regular_url(family: Dict[str, Any]) -> Optional[str]:
+    files = family.get("files") or {}
+    return files.get("regular") or next(iter(files.values()), None)
+
+
+# ---------------------------------------------------------------
+# 폰트 파일 (URL 해시 기반 디스크 저장)
+# ---------------------------------------------------------------
+_download_locks: Dict[str, threading.Lock] = {}
+_download_locks_guard = threading.Lock()
+
+
+def _path_for(url: str) -> str:
+    return os.path.join(FONT_CACHE_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest()[:32] + ".ttf")
+
+
+def font_file(url: str) -> str:
+    """폰트 URL → 로컬 TTF 경로. 같은 URL 동시 요청은 한 번만 다운로드"""
+    path = _path_for(url)
+    if os.path.exists(path):
+        metrics.cache_event("font_file", True)
+        return path
+    with _download_locks_guard:
+        lock = _download_locks.setdefault(path, threading.Lock())
+    with lock:
+        if os.path.exists(path):
+            metrics.cache_event("font_file", True)
+            return path
+        metrics.cache_event("font_file", False)
+        with metrics.upstream("google_fonts", "font_file") as call, tracing.span("font_download"):
+            resp = requests.get(url, timeout=20)
+            call.status(resp.status_code)
+        resp.raise_for_status()
+        ImageFont.truetype(io.BytesIO(resp.content), 12)  # 깨진 파일은 저장하지 않음
+        _atomic_write(path, resp.content)
+    return path
+
+
+# ---------------------------------------------------------------
+# FreeType face LRU
+# ---------------------------------------------------------------
+_faces: "OrderedDict[Tuple[str, int], ImageFont.ImageFont]" = OrderedDict()
+_faces_lock = threading.Lock()
+
+
+def face(path: Optional[str], size: int) -> ImageFont.ImageFont:
+    """(경로, 크기) 로 FreeTypeFont 반환. path 가 없으면 기본 폰트"""
+    path = path or DEFAULT_FONT_REGULAR
+    key = (path, size)
+    with _faces_lock:
+        font = _faces.get(key)
+        if font is not None:
+            _faces.move_to_end(key)
+            metrics.cache_event("font_face", True)
+            return font
+    metrics.cache_event("font_face", False)
+    try:
+        font = ImageFont.truetype(path, size)
+    except Exception as e:
+        print(f"[font_service] face load failed ({path}): {e}")
+        try:
+            font = ImageFont.truetype(DEFAULT_FONT_REGULAR, size)
+        except Exception:
+            # fonts/ 가 없는 체크아웃: 내장 폰트도 같은 키로 캐시 (매번 truetype 재시도/로그 방지)
+            font = ImageFont.load_default(size)
+    with _faces_lock:
+        _faces[key] = font
+        _faces.move_to_end(key)
+        while len(_faces) > max(1, FACE_CACHE_MAX):
+            _faces.popitem(last=False)
+    return font
+
+
+def face_cache_info() -> Dict[str, int]:
+    with _faces_lock:
+        return {"faces": len(_faces), "max": FACE_CACHE_MAX}
+
+
+# ---------------------------------------------------------------
+# 요청 단위 해석기
+# ---------------------------------------------------------------
+def resolve_family(style_desc: Optional[str]) -> Optional[str]:
+    """스타일 설명 → 로컬 폰트 파일 경로 (실패/키 없음 → None = 기본 폰트)"""
+    if not GOOGLE_FONTS_API_KEY:
+        return None
+    try:
+        rows = candidates(category_for(style_desc))
+        if not rows:
+            return None
+        url = _regular_url(random.choice(rows))
+        return font_file(url) if url else None
+    except Exception as e:
+        print(f"[font_service] fallback due to: {e}")
+        return None
+
+
+class FontResolver:
+    """
+    요청 하나에서 사용:
+        fonts = FontResolver()
+        title_font = fonts.get(title_style, 78)
+        item_font  = fonts.get(item_style, 44)
+        desc_font  = fonts.get(item_style, 30)   # item_style 과 같은 패밀리
+    """
+
+    def __init__(self, families: Optional[Dict[str, Optional[str]]] = None):
+        # families: 다른 해석기에서 고른 스타일 → 파일 경로 (배치 렌더에서 워커끼리 같은 패밀리 사용)
+        self._families: Dict[str, Optional[str]] = dict(families or {})
+
+    @property
+    def families(self) -> Dict[str, Optional[str]]:
+        return dict(self._families)
+
+    def path(self, style_desc: Optional[str]) -> Optional[str]:
+        key = style_desc or "sans"
+        if key not in self._families:
+            self._families[key] = resolve_family(style_desc)
+        return self._families[key]
+
+    def get(self, style_desc: Optional[str], size: int) -> ImageFont.ImageFont:
+        return face(self.path(style_desc), size)
+
+
+# ---------------------------------------------------------------
+# 시작 시 prefetch
+# ---------------------------------------------------------------
+def prefetch():
+    """카테고리별 후보 패밀리 파일을 모두 받아 둠 (이미 있으면 건너뜀)"""
+    if not GOOGLE_FONTS_API_KEY:
+        return
+    started = time.perf_counter()
+    done = failed = 0
+    for category in CATEGORIES:
+        try:
+            rows = candidates(category)
+        except Exception as e:
+            print(f"[font_service] prefetch 중단 (목록 실패): {e}")
+            return
+        for family in rows:
+            url = _regular_url(family)
+            if not url:
+                continue
+            try:
+                font_file(url)
+                done += 1
+            except Exception as e:
+                failed += 1
+                print(f"[font_service] prefetch 실패 {family.get('family')}: {e}")
+    print(f"[font_service] prefetch 완료: {done}개 (실패 {failed}), {time.perf_counter() - started:.1f}s")
+
+
+def start_prefetch():
+    if PREFETCH and GOOGLE_FONTS_API_KEY:
+        threading.Thread(target=prefetch, name="font-prefetch", daemon=True).start()
@@ -0,0 +1,227 @@
+# backend_fastapi/routes/hedging.py
+"""
+모델 폴백 체인의 헤지(hedged) 요청
+
+기존 폴백은 순차라 1차 모델이 느리면(실패가 아니라) 끝까지 기다렸다가 2차를 부르고, 꼬리 지연이 두 배가 된다.
+- 체인(예: menu_background = dall-e-3 → gpt-image-1)별로 1차 호출의 성공 지연을 최근 HEDGE_WINDOW 개 기록
+- 1차가 관측 p90(HEDGE_QUANTILE) 안에 답하지 않으면 다음 후보를 병렬로 띄우고, 먼저 온 "유효한" 결과를 사용
+  (validate 가 False 이거나 예외면 무효 → 남은 호출을 기다리거나 다음 후보 시작)
+- 1차가 실패하면 p90 을 기다리지 않고 바로 다음 후보 → 기존 순차 폴백과 같은 동작
+- 추가 비용 상한: 토큰 버킷. 1차 호출마다 HEDGE_BUDGET 토큰 적립(최대 HEDGE_BURST), 헤지 1회에 1토큰.
+  기본 0.1 → 장기적으로 호출 10번에 헤지 1번 이하
+- 표본이 HEDGE_MIN_SAMPLES 보다 적으면 p90 대신 호출부가 준 default_delay
+- 진 쪽 호출은(동기 HTTP) 취소할 수 없어 백그라운드에서 끝나게 두고 결과는 버림. 그 지연도 표본에는 들어감
+- 헤지가 꺼져 있거나 후보가 하나면 스레드풀을 거치지 않고 호출 스레드에서 순차 실행
+- 헤지 경로의 호출은 HEDGE_MAX_WORKERS 크기 풀에서 실행. p90 시계는 1차가 풀에서 실제로 시작된 시점부터
+  (풀 대기 시간이 지연 표본/헤지 판단에 섞이지 않게)
+- 메트릭: hedge_events_total{chain, event} (fired / won / lost / skipped / fallback)
+
+환경 변수:
+    HEDGE_ENABLED        0 이면 헤지 없이 순차 폴백 (기본 1)
+    HEDGE_QUANTILE       기다리는 분위수 (기본 0.9)
+    HEDGE_WINDOW         체인별 지연 표본 수 (기본 200)
+    HEDGE_MIN_SAMPLES    이만큼 모이기 전엔 default_delay 사용 (기본 20)
+    HEDGE_BUDGET         1차 호출당 적립되는 헤지 토큰 (기본 0.1)
+    HEDGE_BURST          토큰 상한 (기본 3)
+    HEDGE_MAX_WORKERS    헤지 경로 스레드 수 (기본 80 = sync 라우트 스레드 40 × 요청당 최대 2호출)
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Tuple
+
+from . import metrics
+
+ENABLED = os.getenv("HEDGE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.9"))
+WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+BUDGET = float(os.getenv("HEDGE_BUDGET", "0.1"))
+BURST = float(os.getenv("HEDGE_BURST", "3"))
+
+MAX_WORKERS = max(2, int(os.getenv("HEDGE_MAX_WORKERS", "80")))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="hedge")
+_MISSING = object()
+
+
+class Policy:
+    """체인 하나의 1차 지연 표본 + 헤지 토큰"""
+
+    def __init__(self, name: str, default_delay: float):
+        self.name = name
+        self.default_delay = default_delay
+        self._latencies: deque = deque(maxlen=WINDOW)
+        self._tokens = BURST
+        self._lock = threading.Lock()
+        self.calls = self.hedges = self.hedge_wins = 0
+
+    def delay(self) -> float:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < MIN_SAMPLES:
+            return self.default_delay
+        return samples[min(len(samples) - 1, int(QUANTILE * len(samples)))]
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def start_call(self):
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(BURST, self._tokens + BUDGET)
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
+
+    def record_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = len(self._latencies)
+            tokens = self._tokens
+        return {"samples": samples, "delay_s": round(self.delay(), 2), "calls": self.calls,
+                "hedges": self.hedges, "hedge_wins": self.hedge_wins, "tokens": round(tokens, 2)}
+
+
+_policies: Dict[str, Policy] = {}
+_policies_lock = threading.Lock()
+
+
+def policy(chain: str, default_delay: float) -> Policy:
+    with _policies_lock:
+        p = _policies.get(chain)
+        if p is None:
+            p = _policies[chain] = Policy(chain, default_delay)
+        return p
+
+
+def stats() -> Dict[str, Any]:
+    with _policies_lock:
+        policies = list(_policies.values())
+    return {"enabled": ENABLED, "budget": BUDGET, "max_workers": MAX_WORKERS,
+            **{p.name: p.stats() for p in policies}}
+
+
+def _is_valid(result: Any) -> bool:
+    return result is not None
+
+
+def call(chain: str, attempts: List[Tuple[str, Callable[[], Any]]],
+         validate: Callable[[Any], bool] = _is_valid, default_delay: float = 10.0) -> Tuple[Any, str]:
+    """
+    attempts = [(라벨, 인자 없는 함수), ...] 우선순위 순. 반환 (결과, 사용한 라벨).
+    모두 무효면 마지막 무효 결과를 그대로 반환 (호출부가 raise_for_status 등으로 처리),
+    모두 예외면 마지막 예외를 다시 던짐
+    """
+    pol = policy(chain, default_delay)
+    pol.start_call()
+    if not ENABLED or len(attempts) == 1:
+        return _sequential(chain, pol, attempts, validate)
+
+    pending: Dict[Any, Tuple[int, str]] = {}
+    primary_started, primary_t0 = threading.Event(), []
+    next_i, hedge_armed, hedged = 0, True, False
+    last_result, last_label, last_exc = _MISSING, "", None
+
+    def run_primary(fn):
+        primary_t0.append(time.perf_counter())
+        primary_started.set()
+        return fn()
+
+    def launch():
+        nonlocal next_i
+        label, fn = attempts[next_i]
+        ctx = contextvars.copy_context()  # tracing/metrics 컨텍스트 유지
+        if next_i == 0:
+            fut = _executor.submit(ctx.run, run_primary, fn)
+
+            def _observe(f):
+                if f.exception() is None and validate(f.result()):
+                    pol.observe(time.perf_counter() - primary_t0[0])
+            fut.add_done_callback(_observe)
+        else:
+            fut = _executor.submit(ctx.run, fn)
+        pending[fut] = (next_i, label)
+        next_i += 1
+
+    launch()
+    while pending:
+        timeout = None
+        if hedge_armed and len(pending) == 1 and next_i < len(attempts):
+            primary_started.wait()  # 풀 대기 중이면 시계를 아직 시작하지 않음
+            timeout = max(0.0, pol.delay() - (time.perf_counter() - primary_t0[0]))
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if not done:  # 1차가 p90 안에 안 끝남
+            hedge_armed = False
+            if pol.try_hedge():
+                hedged = True
+                metrics.hedge_event(chain, "fired")
+                print(f"[hedging] {chain}: {attempts[0][0]} {pol.delay():.1f}s 초과 → {attempts[next_i][0]} 병렬 시작")
+                launch()
+            else:
+                metrics.hedge_event(chain, "skipped")
+            continue
+
+        for fut in done:
+            index, label = pending.pop(fut)
+            try:
+                result = fut.result()
+            except Exception as e:
+                print(f"[hedging] {chain}/{label} 실패: {e}")
+                last_exc = e
+                continue
+            if validate(result):
+                if hedged:
+                    metrics.hedge_event(chain, "won" if index > 0 else "lost")
+                    if index > 0:
+                        pol.record_win()
+                return result, label
+            last_result, last_label = result, label
+
+        # 무효 결과/예외 → 진행 중인 게 없으면 다음 후보 (순차 폴백)
+        if not pending and next_i < len(attempts):
+            hedge_armed = False
+            metrics.hedge_event(chain, "fallback")
+            launch()
+
+    if last_result is not _MISSING:
+        return last_result, last_label
+    raise last_exc
+
+
+def _sequential(chain: str, pol: Policy, attempts: List[Tuple[str, Callable[[], Any]]],
+                validate: Callable[[Any], bool]) -> Tuple[Any, str]:
+    """헤지 없는 순차 폴백 (호출 스레드에서 실행). 반환/예외 규칙은 call 과 같음"""
+    last_result, last_label, last_exc = _MISSING, "", None
+    for index, (label, fn) in enumerate(attempts):
+        if index > 0:
+            metrics.hedge_event(chain, "fallback")
+        t0 = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            print(f"[hedging] {chain}/{label} 실패: {e}")
+            last_exc = e
+            continue
+        if validate(result):
+            if index == 0:
+                pol.observe(time.perf_counter() - t0)
+            return result, label
+        last_result, last_label = result, label
+
+    if last_result is not _MISSING:
+        return last_result, last_label
+    raise last_exc
@@ -0,0 +1,251 @@
+# backend_fastapi/routes/http_cassette.py
+"""
+외부 HTTP 호출 녹화/재생 (벤치마크 결정성 확보용)
+
+OpenAI(chat/images), Google Fonts(목록/폰트 파일), ComfyUI 응답을 녹화해 두고
+재생 모드에서는 네트워크 없이 로컬에서 응답 → 점수 계산/렌더링/인코딩 같은
+CPU 구간의 회귀만 따로 측정할 수 있다.
+
+환경 변수:
+    HTTP_CASSETTE_MODE     off(기본) | record | replay
+    HTTP_CASSETTE_NAME     카세트 이름 (data/cassettes/<name>.jsonl), 기본 default
+    HTTP_CASSETTE_LATENCY  replay 지연: zero(기본) | recorded (녹화 당시 응답 시간만큼 대기)
+    HTTP_CASSETTE_IGNORE   JSON 본문 비교 시 무시할 키 (기본 client_id,seed,noise_seed)
+    HTTP_CASSETTE_PASSTHROUGH  녹화/재생하지 않을 호스트 (콤마 구분). BACKEND_PUBLIC_URL 호스트는 항상 포함
+                               (redesign 의 자기 자신 호출/배경 다운로드는 실제로 실행되어야 측정 의미가 있음)
+
+requests(HTTPAdapter.send) 와 httpx(HTTPTransport.handle_request) 전송 계층을 감싸므로
+모듈 전역 requests.get, requests.Session, openai SDK 클라이언트가 모두 대상이 된다.
+웹소켓은 녹화되지 않으므로 카세트 사용 중에는 ComfyUI 를 폴링 방식으로 호출한다.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+MODE = os.getenv("HTTP_CASSETTE_MODE", "off").strip().lower()
+NAME = os.getenv("HTTP_CASSETTE_NAME", "default").strip() or "default"
+LATENCY = os.getenv("HTTP_CASSETTE_LATENCY", "zero").strip().lower()
+IGNORE_KEYS = {k.strip() for k in os.getenv("HTTP_CASSETTE_IGNORE", "client_id,seed,noise_seed").split(",") if k.strip()}
+PASSTHROUGH_HOSTS = {h.strip().lower() for h in os.getenv("HTTP_CASSETTE_PASSTHROUGH", "").split(",") if h.strip()}
+_backend_host = urlsplit(os.getenv("BACKEND_PUBLIC_URL", "")).hostname
+if _backend_host:
+    PASSTHROUGH_HOSTS.add(_backend_host.lower())
+
+STORAGE_ROOT = os.getenv(
+    "STORAGE_ROOT",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+)
+CASSETTE_DIR = os.path.join(STORAGE_ROOT, "cassettes")
+
+# 녹화 파일에 남기지 않을 쿼리/헤더 (API 키 등)
+_SECRET_PARAMS = {"key", "api_key", "token"}
+# 본문을 이미 디코딩해 저장하므로 전송 관련 헤더는 버림
+_DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "set-cookie"}
+
+_lock = threading.Lock()
+_installed = False
+_entries: Dict[str, List[Dict[str, Any]]] = {}  # replay: key → 녹화 목록
+_by_url: Dict[str, List[Dict[str, Any]]] = {}  # replay: 본문 무시 키 → 녹화 목록
+_cursor: Dict[str, int] = {}
+_stats = {"recorded": 0, "replayed": 0, "missed": 0}
+
+
+def active() -> bool:
+    return _installed and MODE in ("record", "replay")
+
+
+def cassette_path() -> str:
+    return os.path.join(CASSETTE_DIR, f"{NAME}.jsonl")
+
+
+def stats() -> Dict[str, Any]:
+    return {"mode": MODE if _installed else "off", "name": NAME, "latency": LATENCY, **_stats}
+
+
+# ---------------------------------------------------------------
+# 키 계산
+# ---------------------------------------------------------------
+def _passthrough(url: str) -> bool:
+    return (urlsplit(url).hostname or "").lower() in PASSTHROUGH_HOSTS
+
+
+def _clean_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in _SECRET_PARAMS]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(sorted(query)), ""))
+
+
+def _strip(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {k: _strip(v) for k, v in obj.items() if k not in IGNORE_KEYS}
+    if isinstance(obj, list):
+        return [_strip(v) for v in obj]
+    return obj
+
+
+def _body_digest(body: Optional[bytes], content_type: str) -> str:
+    if not body:
+        return ""
+    if "multipart/form-data" in content_type:
+        return "multipart"  # boundary 가 매번 달라 본문 비교 불가
+    if "json" in content_type:
+        try:
+            body = json.dumps(_strip(json.loads(body)), sort_keys=True, ensure_ascii=False).encode("utf-8")
+        except ValueError:
+            pass
+    return hashlib.sha1(body).hexdigest()[:16]
+
+
+def _keys(method: str, url: str, body: Optional[bytes], content_type: str) -> Tuple[str, str]:
+    loose = f"{method.upper()} {_clean_url(url)}"
+    return f"{loose} {_body_digest(body, content_type)}", loose
+
+
+# ---------------------------------------------------------------
+# 녹화 / 재생 저장소
+# ---------------------------------------------------------------
+def _record(key: str, loose: str, status: int, headers: Dict[str, str], content: bytes, elapsed: float):
+    entry = {
+        "key": key,
+        "loose": loose,
+        "status": status,
+        "headers": {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS},
+        "body": base64.b64encode(content or b"").decode("ascii"),
+        "elapsed": round(elapsed, 4),
+    }
+    with _lock:
+        os.makedirs(CASSETTE_DIR, exist_ok=True)
+        with open(cassette_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        _stats["recorded"] += 1
+
+
+def _load():
+    path = cassette_path()
+    if not os.path.exists(path):
+        print(f"[cassette] 카세트 없음: {path} (모든 요청이 miss 처리됨)")
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            _entries.setdefault(entry["key"], []).append(entry)
+            _by_url.setdefault(entry["loose"], []).append(entry)
+    print(f"[cassette] replay {path}: {sum(len(v) for v in _entries.values())}건")
+
+
+def _lookup(key: str, loose: str) -> Optional[Dict[str, Any]]:
+    """같은 요청이 여러 번 녹화됐으면 순서대로 (끝나면 처음부터) 반환, 본문 불일치 시 URL 만으로 매칭"""
+    with _lock:
+        for table, k in ((_entries, key), (_by_url, loose)):
+            rows = table.get(k)
+            if rows:
+                idx = _cursor.get(k, 0)
+                _cursor[k] = idx + 1
+                _stats["replayed"] += 1
+                return rows[idx % len(rows)]
+        _stats["missed"] += 1
+    return None
+
+
+def _replay_delay(entry: Dict[str, Any]):
+    if LATENCY == "recorded" and entry.get("elapsed"):
+        time.sleep(entry["elapsed"])
+
+
+# ---------------------------------------------------------------
+# requests
+# ---------------------------------------------------------------
+def _patch_requests():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from requests.models import Response
+    from requests.structures import CaseInsensitiveDict
+
+    original_send = HTTPAdapter.send
+
+    def send(self, request, *args, **kwargs):
+        if _passthrough(request.url):
+            return original_send(self, request, *args, **kwargs)
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        if body is not None and not isinstance(body, bytes):
+            body = None  # 스트리밍 본문(파일 객체 등)은 비교하지 않음
+        key, loose = _keys(request.method, request.url, body, request.headers.get("Content-Type", ""))
+
+        if MODE == "replay":
+            entry = _lookup(key, loose)
+            if entry is None:
+                raise requests.ConnectionError(f"[cassette] 녹화 없음: {loose}", request=request)
+            _replay_delay(entry)
+            resp = Response()
+            resp.status_code = entry["status"]
+            resp.headers = CaseInsensitiveDict(entry["headers"])
+            resp._content = base64.b64decode(entry["body"])
+            resp.url = request.url
+            resp.request = request
+            resp.reason = "CASSETTE"
+            resp.elapsed = timedelta(seconds=entry["elapsed"] if LATENCY == "recorded" else 0)
+            return resp
+
+        started = time.perf_counter()
+        resp = original_send(self, request, *args, **kwargs)
+        content = resp.content  # 본문까지 받은 시점으로 시간 측정
+        _record(key, loose, resp.status_code, dict(resp.headers), content, time.perf_counter() - started)
+        return resp
+
+    HTTPAdapter.send = send
+
+
+# ---------------------------------------------------------------
+# httpx (openai SDK)
+# ---------------------------------------------------------------
+def _patch_httpx():
+    try:
+        import httpx
+    except ImportError:
+        return
+
+    original_handle = httpx.HTTPTransport.handle_request
+
+    def handle_request(self, request):
+        if _passthrough(str(request.url)):
+            return original_handle(self, request)
+        body = request.read()
+        key, loose = _keys(request.method, str(request.url), body, request.headers.get("content-type", ""))
+
+        if MODE == "replay":
+            entry = _lookup(key, loose)
+            if entry is None:
+                raise httpx.ConnectError(f"[cassette] 녹화 없음: {loose}", request=request)
+            _replay_delay(entry)
+            return httpx.Response(entry["status"], headers=entry["headers"],
+                                  content=base64.b64decode(entry["body"]), request=request)
+
+        started = time.perf_counter()
+        resp = original_handle(self, request)
+        content = resp.read()
+        _record(key, loose, resp.status_code, dict(resp.headers), content, time.perf_counter() - started)
+        headers = {k: v for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS}
+        return httpx.Response(resp.status_code, headers=headers, content=content, request=request)
+
+    httpx.HTTPTransport.handle_request = handle_request
+
+
+def install():
+    """HTTP_CASSETTE_MODE 가 record/replay 일 때 전송 계층 패치 (앱 시작 시 1회)"""
+    global _installed
+    if _installed or MODE not in ("record", "replay"):
+        return
+    if MODE == "replay":
+        _load()
+    _patch_requests()
+    _patch_httpx()
+    _installed = True
+    print(f"[cassette] mode={MODE} name={NAME} latency={LATENCY} path={cassette_path()}")
@@ -0,0 +1,157 @@
+# backend_fastapi/routes/image_analysis.py
+"""
+메뉴판 이미지 로컬 분석 (재디자인용, LLM 호출 없음)
+
+- 대표 색 팔레트: 축소 이미지(긴 변 ANALYSIS_EDGE) 픽셀에 NumPy 벡터화 k-means
+  (초기 중심은 밝기 분위수 → 같은 이미지면 같은 결과)
+- 밝기/대비/채도/색온도 통계 → 배경 스타일 키워드 (bright/dark, soft/high contrast, muted/vivid, warm/cool)
+- /redesign/menu-board 에서
+    · items 를 직접 받으면 비전 호출 없이 이 결과를 ColorPalette/DesignKeywords 로 바로 사용
+    · 아니면 비전 호출(메뉴 추출용)에 힌트로 넘기고, 응답에 팔레트/키워드가 없으면 이 값으로 채움
+
+환경 변수:
+    IMAGE_ANALYSIS_EDGE   분석용 축소 이미지의 긴 변 (기본 128)
+    IMAGE_ANALYSIS_K      k-means 군집 수 (기본 6, 비슷한 색은 합쳐서 최대 5색 반환)
+"""
+import io
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+ANALYSIS_EDGE = int(os.getenv("IMAGE_ANALYSIS_EDGE", "128"))
+K = max(2, int(os.getenv("IMAGE_ANALYSIS_K", "6")))
+MAX_COLORS = 5
+_MERGE_DIST = 28.0  # RGB 거리 이내의 중심은 같은 색으로 봄
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+@dataclass
+class ImageStats:
+    palette: List[str]                       # 비중 큰 순 HEX
+    weights: List[float]                     # 팔레트 색별 픽셀 비율
+    brightness: float                        # 평균 밝기 0~1
+    contrast: float                          # 밝기 표준편차 0~1
+    saturation: float                        # 평균 채도 0~1
+    warmth: float                            # 평균 (R-B)/255, 양수면 따뜻한 톤
+    keywords: List[str] = field(default_factory=list)
+
+    def hints(self) -> Dict[str, Any]:
+        """LLM 프롬프트용 (소수 둘째 자리)"""
+        d = asdict(self)
+        return {k: ([round(w, 2) for w in v] if k == "weights" else round(v, 2) if isinstance(v, float) else v)
+                for k, v in d.items()}
+
+
+# ---------------------------------------------------------------
+# 이미지 준비
+# ---------------------------------------------------------------
+def open_image(data: bytes, max_edge: int) -> Image.Image:
+    """바이트 → RGB, 긴 변 max_edge 이하. JPEG 은 draft 로 축소 디코딩 (원본 전체를 풀지 않음)"""
+    img = Image.open(io.BytesIO(data))
+    img.draft("RGB", (max_edge, max_edge))
+    img = img.convert("RGB")
+    img.thumbnail((max_edge, max_edge), Image.Resampling.BILINEAR)
+    return img
+
+
+def _pixels(img: Image.Image) -> np.ndarray:
+    small = img.convert("RGB")
+    if max(small.size) > ANALYSIS_EDGE:
+        small = small.copy()
+        small.thumbnail((ANALYSIS_EDGE, ANALYSIS_EDGE), Image.Resampling.BILINEAR)
+    return np.asarray(small, dtype=np.float32).reshape(-1, 3)
+
+
+# ---------------------------------------------------------------
+# k-means (N x K 거리 행렬을 한 번에 계산)
+# ---------------------------------------------------------------
+def kmeans(x: np.ndarray, k: int = K, iters: int = 15, tol: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
+    """(중심 (k,3), 군집별 픽셀 수 (k,)). 빈 군집은 이전 중심 유지"""
+    k = min(k, len(x))
+    order = np.argsort(x @ _LUMA, kind="stable")
+    centers = x[order[((np.arange(k) + 0.5) * len(x) / k).astype(int)]].copy()
+    x_sq = (x * x).sum(1, keepdims=True)
+    for _ in range(iters):
+        dist = x_sq - 2.0 * (x @ centers.T) + (centers * centers).sum(1)
+        labels = dist.argmin(1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=x[:, c], minlength=k) for c in range(3)], axis=1)
+        moved = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        shift = float(np.abs(moved - centers).max())
+        centers = moved
+        if shift < tol:
+            break
+    dist = x_sq - 2.0 * (x @ centers.T) + (centers * centers).sum(1)
+    return centers, np.bincount(dist.argmin(1), minlength=k)
+
+
+def _dominant(centers: np.ndarray, counts: np.ndarray) -> List[Tuple[np.ndarray, float]]:
+    """비중 큰 순으로, 앞선 색과 가까운 중심은 그 색에 합침"""
+    total = float(counts.sum()) or 1.0
+    kept: List[List[Any]] = []
+    for i in np.argsort(-counts):
+        if counts[i] == 0:
+            continue
+        for entry in kept:
+            if np.linalg.norm(entry[0] - centers[i]) < _MERGE_DIST:
+                entry[1] += counts[i] / total
+                break
+        else:
+            kept.append([centers[i], counts[i] / total])
+    kept.sort(key=lambda e: -e[1])
+    return [(c, float(w)) for c, w in kept[:MAX_COLORS]]
+
+
+def _hex(c: np.ndarray) -> str:
+    r, g, b = (int(v) for v in np.clip(np.rint(c), 0, 255))
+    return f"#{r:02X}{g:02X}{b:02X}"
+
+
+# ---------------------------------------------------------------
+# 통계 → 키워드
+# ---------------------------------------------------------------
+def style_keywords(brightness: float, contrast: float, saturation: float, warmth: float) -> List[str]:
+    """procedural_bg / DALL·E 프롬프트가 이해하는 영어 키워드"""
+    out = []
+    if brightness >= 0.68:
+        out.append("bright")
+    elif brightness <= 0.35:
+        out.append("dark")
+    if contrast >= 0.28:
+        out.append("high contrast")
+    elif contrast <= 0.12:
+        out.append("soft")
+    if saturation <= 0.06:
+        out.append("monochrome")
+    elif saturation <= 0.18:
+        out.append("muted")
+    elif saturation >= 0.45:
+        out.append("vivid")
+    if warmth >= 0.08:
+        out.append("warm tones")
+    elif warmth <= -0.08:
+        out.append("cool tones")
+    return out
+
+
+def analyze(img: Image.Image) -> ImageStats:
+    x = _pixels(img)
+    luma = x @ _LUMA / 255.0
+    mx, mn = x.max(1), x.min(1)
+    saturation = np.where(mx > 0, (mx - mn) / np.maximum(mx, 1e-6), 0.0)
+
+    dominant = _dominant(*kmeans(x))
+    brightness, contrast = float(luma.mean()), float(luma.std())
+    sat, warmth = float(saturation.mean()), float((x[:, 0] - x[:, 2]).mean() / 255.0)
+    return ImageStats(
+        palette=[_hex(c) for c, _ in dominant],
+        weights=[w for _, w in dominant],
+        brightness=brightness,
+        contrast=contrast,
+        saturation=sat,
+        warmth=warmth,
+        keywords=style_keywords(brightness, contrast, sat, warmth),
+    )
@@ -0,0 +1,148 @@
+# backend_fastapi/routes/image_derivatives.py
+"""
+한 번 생성한 광고 이미지에서 플랫폼별 규격을 파생 (GPU 재생성 없음)
+- 세일리언시 맵(NumPy, CPU)으로 가장 중요한 영역을 남기는 스마트 크롭
+- 크롭하면 주요 영역이 많이 잘리는 경우 → 아웃페인트 없이 흐린 배경으로 확장(패딩)
+- 결과는 원본 옆에 <원본>__<프리셋>.png 로 캐시
+"""
+import os
+from typing import Dict, List, Tuple, Any, Optional
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from . import metrics
+
+# 플랫폼 프리셋 (가로, 세로)
+PLATFORM_PRESETS: Dict[str, Tuple[int, int]] = {
+    "instagram_feed": (1080, 1080),   # 1:1
+    "instagram_story": (1080, 1920),  # 9:16
+    "banner": (1920, 1080),           # 16:9
+}
+
+# 크롭 후 남아야 하는 세일리언시 비율. 미만이면 패딩 확장으로 전환
+KEEP_RATIO = float(os.getenv("DERIVE_KEEP_RATIO", "0.8"))
+SALIENCY_SIDE = 128  # 세일리언시 계산용 축소 크기
+
+
+# ──────────────────────────────────────────────────────────────────
+# 세일리언시 / 크롭 윈도우
+# ──────────────────────────────────────────────────────────────────
+def saliency_map(img: Image.Image, side: int = SALIENCY_SIDE) -> np.ndarray:
+    """
+    축소 이미지에서 세일리언시 계산 (0~1)
+    = 평균색 대비 색 대비(frequency-tuned) + 그래디언트 크기 + 약한 중앙 가중치
+    """
+    small = img.convert("RGB").copy()
+    small.thumbnail((side, side))
+    a = np.asarray(small, dtype=np.float32) / 255.0
+
+    # 3x3 박스 블러 (노이즈 억제) - 패딩 후 shift 합
+    p = np.pad(a, ((1, 1), (1, 1), (0, 0)), mode="edge")
+    h, w = a.shape[:2]
+    blur = sum(p[dy:dy + h, dx:dx + w] for dy in range(3) for dx in range(3)) / 9.0
+
+    contrast = np.linalg.norm(blur - blur.reshape(-1, 3).mean(axis=0), axis=2)
+
+    gray = blur.mean(axis=2)
+    gy, gx = np.gradient(gray)
+    grad = np.hypot(gx, gy)
+
+    ys = np.linspace(-1.0, 1.0, h)[:, None]
+    xs = np.linspace(-1.0, 1.0, w)[None, :]
+    center = 1.0 - 0.3 * np.clip(xs ** 2 + ys ** 2, 0.0, 1.0)
+
+    sal = (contrast / (contrast.max() + 1e-6) + 0.5 * grad / (grad.max() + 1e-6)) * center
+    return sal / (sal.max() + 1e-6)
+
+
+def best_window(sal: np.ndarray, aspect: float) -> Tuple[float, float, float, float, float]:
+    """
+    목표 비율(가로/세로)의 최대 크기 윈도우를 한 축으로 슬라이드하며
+    세일리언시 합이 최대인 위치 탐색 (누적합으로 전 위치를 한 번에 계산).
+    반환: (x0, y0, x1, y1) 정규화 좌표 + 보존 비율
+    """
+    h, w = sal.shape
+    total = float(sal.sum()) or 1.0
+    if w / h > aspect:
+        win = max(1, min(w, int(round(h * aspect))))
+        cols = np.concatenate([[0.0], np.cumsum(sal.sum(axis=0))])
+        sums = cols[win:] - cols[:-win]
+        x = int(np.argmax(sums))
+        return x / w, 0.0, (x + win) / w, 1.0, float(sums[x]) / total
+    win = max(1, min(h, int(round(w / aspect))))
+    rows = np.concatenate([[0.0], np.cumsum(sal.sum(axis=1))])
+    sums = rows[win:] - rows[:-win]
+    y = int(np.argmax(sums))
+    return 0.0, y / h, 1.0, (y + win) / h, float(sums[y]) / total
+
+
+# ──────────────────────────────────────────────────────────────────
+# 파생 렌더
+# ──────────────────────────────────────────────────────────────────
+def _smart_crop(img: Image.Image, box: Tuple[float, float, float, float], size: Tuple[int, int]) -> Image.Image:
+    W, H = img.size
+    x0, y0, x1, y1 = box
+    crop = img.crop((int(x0 * W), int(y0 * H), int(round(x1 * W)), int(round(y1 * H))))
+    return crop.resize(size, Image.Resampling.LANCZOS)
+
+
+def _extend(img: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """원본 전체를 안쪽에 두고, 남는 영역은 같은 이미지를 흐리게 늘려 채움"""
+    tw, th = size
+    W, H = img.size
+
+    # 배경: cover 리사이즈를 작게 만들어 블러 후 확대 (빠름)
+    cover = max(tw / W, th / H)
+    bg = img.resize((max(1, int(W * cover / 8)), max(1, int(H * cover / 8))), Image.Resampling.BILINEAR)
+    bg = bg.filter(ImageFilter.GaussianBlur(6))
+    bg = bg.resize((int(W * cover) + 1, int(H * cover) + 1), Image.Resampling.BILINEAR)
+    left, top = (bg.width - tw) // 2, (bg.height - th) // 2
+    bg = bg.crop((left, top, left + tw, top + th))
+    bg = Image.fromarray((np.asarray(bg, dtype=np.float32) * 0.85).astype(np.uint8))
+
+    contain = min(tw / W, th / H)
+    fg = img.resize((max(1, int(W * contain)), max(1, int(H * contain))), Image.Resampling.LANCZOS)
+    bg.paste(fg, ((tw - fg.width) // 2, (th - fg.height) // 2))
+    return bg
+
+
+def derive_image(img: Image.Image, size: Tuple[int, int], sal: Optional[np.ndarray] = None) -> Tuple[Image.Image, Dict[str, Any]]:
+    """단일 규격 파생 → (이미지, {mode, retained})"""
+    img = img.convert("RGB")
+    sal = saliency_map(img) if sal is None else sal
+    x0, y0, x1, y1, retained = best_window(sal, size[0] / size[1])
+    if retained >= KEEP_RATIO:
+        return _smart_crop(img, (x0, y0, x1, y1), size), {"mode": "crop", "retained": round(retained, 3)}
+    return _extend(img, size), {"mode": "extend", "retained": 1.0}
+
+
+def derivative_path(src_path: str, preset: str) -> str:
+    stem, _ = os.path.splitext(src_path)
+    return f"{stem}__{preset}.png"
+
+
+def derive_platform_sizes(src_path: str, presets: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    원본 파일에서 프리셋별 파생 이미지를 만들고(또는 캐시 재사용) 경로를 반환.
+    세일리언시는 원본당 한 번만 계산.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    img, sal = None, None
+    src_mtime = os.path.getmtime(src_path)
+
+    for preset in presets:
+        out_path = derivative_path(src_path, preset)
+        if os.path.exists(out_path) and os.path.getmtime(out_path) >= src_mtime:
+            results[preset] = {"path": out_path, "cached": True}
+            continue
+
+        if img is None:
+            img = Image.open(src_path).convert("RGB")
+            sal = saliency_map(img)
+        out, info = derive_image(img, PLATFORM_PRESETS[preset], sal)
+        out.save(out_path, "PNG")
+        metrics.output_written("derivative", out_path)
+        results[preset] = {"path": out_path, "cached": False, **info}
+
+    return results
@@ -0,0 +1,197 @@
+# backend_fastapi/routes/image_encoding.py
+"""
+출력 이미지 인코딩 (포맷 협상 + 속도/용량 프리셋)
+
+image_from_copy / menu_service / 데모 fallback 이 같이 쓰는 인코딩 계층.
+- 포맷: 요청 본문의 format 필드 > Accept 헤더의 image/* > 기본 PNG (기존 클라이언트 호환)
+- 프리셋: fast (인코딩 시간 우선) / small (파일 크기 우선)
+- 결과에 인코딩 시간(ms)과 바이트 수를 담아 응답/메트릭에 보고
+
+encode()/transcode() 는 render_executor 워커에서도 실행되므로 메트릭 기록은 하지 않는다.
+부모 프로세스에서 report() 로 기록.
+
+환경 변수:
+    IMAGE_ENCODE_PRESET   기본 프리셋 (fast | small, 기본 fast)
+"""
+import io
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, features
+
+from . import metrics
+
+DEFAULT_FORMAT = "png"
+DEFAULT_PRESET = os.getenv("IMAGE_ENCODE_PRESET", "fast").strip().lower()
+PRESETS = ("fast", "small")
+
+MEDIA_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp", "avif": "image/avif"}
+EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp", "avif": "avif"}
+_ALIASES = {"jpg": "jpeg", "image/jpg": "jpeg", **{v: k for k, v in MEDIA_TYPES.items()}}
+
+# 포맷별 PIL save 인자. png small = 기존 optimize=True 경로
+_SAVE_ARGS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "png": {
+        "fast": {"compress_level": 1},
+        "small": {"optimize": True},
+    },
+    "jpeg": {
+        "fast": {"quality": 88, "subsampling": "4:2:0"},
+        "small": {"quality": 80, "optimize": True, "progressive": True, "subsampling": "4:2:0"},
+    },
+    "webp": {
+        "fast": {"quality": 82, "method": 1},
+        "small": {"quality": 78, "method": 4},
+    },
+    "avif": {
+        "fast": {"quality": 60, "speed": 9},
+        "small": {"quality": 50, "speed": 7},
+    },
+}
+
+# Accept q 값이 같을 때 우선순위 (인코딩이 빠르고 작은 순)
+_PREFERENCE = ("webp", "avif", "jpeg", "png")
+
+
+def available_formats() -> List[str]:
+    """이 Pillow 빌드로 인코딩 가능한 포맷"""
+    out = ["png", "jpeg"]
+    for fmt in ("webp", "avif"):
+        try:
+            if features.check(fmt):
+                out.append(fmt)
+        except Exception:
+            pass
+    return out
+
+
+FORMATS = available_formats()
+if DEFAULT_PRESET not in PRESETS:
+    DEFAULT_PRESET = "fast"
+
+
+@dataclass
+class Encoded:
+    data: bytes
+    format: str
+    preset: str
+    encode_ms: float
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.format]
+
+    @property
+    def ext(self) -> str:
+        return EXTENSIONS[self.format]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+    def info(self) -> Dict[str, Any]:
+        return {"format": self.format, "preset": self.preset,
+                "bytes": self.nbytes, "encode_ms": round(self.encode_ms, 1)}
+
+
+# ---------------------------------------------------------------
+# 협상
+# ---------------------------------------------------------------
+def normalize_format(fmt: Optional[str]) -> Optional[str]:
+    if fmt is None:
+        return None
+    fmt = fmt.strip().lower()
+    return _ALIASES.get(fmt, fmt) or None
+
+
+def _parse_accept(accept: str) -> List[Tuple[str, float]]:
+    """Accept 헤더에서 지원 포맷의 image/* 항목만 (포맷, q) 로. 와일드카드는 무시"""
+    out = []
+    for part in accept.split(","):
+        bits = [b.strip() for b in part.split(";")]
+        fmt = _ALIASES.get(bits[0].lower())
+        if fmt not in FORMATS:
+            continue
+        q = 1.0
+        for b in bits[1:]:
+            if b.startswith("q="):
+                try:
+                    q = float(b[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            out.append((fmt, q))
+    return out
+
+
+def negotiate(requested: Optional[str] = None, accept: Optional[str] = None,
+              preset: Optional[str] = None) -> Tuple[str, str]:
+    """
+    (포맷, 프리셋) 결정. 요청 포맷/프리셋이 지원 목록에 없으면 ValueError (라우트에서 400).
+    Accept 는 image/webp 처럼 명시된 항목만 보고, */* 나 application/json 뿐이면 PNG
+    """
+    preset = (preset or DEFAULT_PRESET).strip().lower()
+    if preset not in PRESETS:
+        raise ValueError(f"preset 은 {', '.join(PRESETS)} 중 하나여야 합니다.")
+
+    fmt = normalize_format(requested)
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"format 은 {', '.join(FORMATS)} 중 하나여야 합니다.")
+        return fmt, preset
+
+    offers = _parse_accept(accept or "")
+    if offers:
+        offers.sort(key=lambda o: (-o[1], _PREFERENCE.index(o[0])))
+        return offers[0][0], preset
+    return DEFAULT_FORMAT, preset
+
+
+# ---------------------------------------------------------------
+# 인코딩
+# ---------------------------------------------------------------
+def _prepare(img: Image.Image, fmt: str) -> Image.Image:
+    """JPEG 는 알파 불가 → 흰 배경에 합성. 팔레트/기타 모드는 RGB(A) 로"""
+    if fmt == "jpeg":
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            rgba = img.convert("RGBA")
+            bg = Image.new("RGB", rgba.size, (255, 255, 255))
+            bg.paste(rgba, mask=rgba.getchannel("A"))
+            return bg
+        return img if img.mode in ("RGB", "L") else img.convert("RGB")
+    if img.mode in ("RGB", "RGBA", "L") or fmt == "png":
+        return img
+    if img.mode in ("LA", "PA"):  # WebP/AVIF 는 LA 를 못 받음 → 알파 유지
+        return img.convert("RGBA")
+    return img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+
+def encode(img: Image.Image, fmt: str = DEFAULT_FORMAT, preset: Optional[str] = None) -> Encoded:
+    preset = preset or DEFAULT_PRESET
+    started = time.perf_counter()
+    buf = io.BytesIO()
+    _prepare(img, fmt).save(buf, format=fmt.upper(), **_SAVE_ARGS[fmt][preset])
+    return Encoded(buf.getvalue(), fmt, preset, (time.perf_counter() - started) * 1000)
+
+
+def transcode(data: bytes, fmt: str = DEFAULT_FORMAT, preset: Optional[str] = None,
+              source_preset: str = "fast") -> Encoded:
+    """
+    이미 인코딩된 이미지(ComfyUI 결과 PNG 등) → 요청 포맷/프리셋.
+    포맷과 프리셋이 원본과 같을 때만 그대로 통과 (source_preset: 원본이 인코딩된 방식,
+    ComfyUI/데모 PNG 는 최적화 없는 fast 상당) → png + small 요청이면 optimize 로 다시 인코딩
+    """
+    preset = preset or DEFAULT_PRESET
+    img = Image.open(io.BytesIO(data))
+    if (img.format or "").lower() == fmt and preset == source_preset:
+        return Encoded(data, fmt, preset, 0.0)
+    img.load()
+    return encode(img, fmt, preset)
+
+
+def report(enc: Encoded, kind: str) -> Dict[str, Any]:
+    """부모 프로세스에서 인코딩 메트릭 기록 + 응답용 dict"""
+    metrics.image_encoded(kind, enc.format, enc.preset, enc.encode_ms / 1000, enc.nbytes)
+    return enc.info()
@@ -35,19 +35,33 @@ requirements.txt (백엔드):
 """
 
 import os
+import io
+import json
 import uuid
 import time
+import base64
 import threading
 import requests
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+import hashlib
+from typing import Optional, Dict, Any, Tuple, Iterator, List, Callable
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from transformers import pipeline  # Hugging Face 번역기
 
+from . import http_cassette, image_encoding, metrics, render_executor, tracing
+from .image_derivatives import PLATFORM_PRESETS, derive_platform_sizes
+
+try:
+    import websocket  # websocket-client (ComfyUI 진행률/미리보기 구독)
+except ImportError:
+    websocket = None
+
 # ---- env 로드 (프로젝트 루트의 .env) ----
 ROOT_DIR = Path(__file__).resolve().parents[2]  # .../hidden-leaf-village
 load_dotenv(dotenv_path=ROOT_DIR / ".env", override=True)
@@ -64,6 +78,10 @@ STORAGE_ROOT = os.getenv(
 )
 OUTPUT_DIR = os.path.join(STORAGE_ROOT, "outputs")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+UPLOAD_DIR = os.path.join(STORAGE_ROOT, "uploads")
+LATENT_DIR = os.path.join(STORAGE_ROOT, "latents")  # img2img 원본 latent 캐시
+os.makedirs(LATENT_DIR, exist_ok=True)
+LATENT_CACHE_MAX = int(os.getenv("LATENT_CACHE_MAX", "200"))  # data/latents 보관 파일 수 (오래 안 쓴 것부터 삭제)
 
 # ComfyUI 설정 (ngrok 주소 권장)
 COMFYUI_URL = os.getenv("COMFYUI_URL", "http://127.0.0.1:8188").rstrip("/")
@@ -77,12 +95,41 @@ COMFYUI_MODELS = {
 # Hugging Face 번역 모델 (경량)
 HF_TRANSLATION_MODEL = os.getenv("HF_TRANSLATION_MODEL", "Helsinki-NLP/opus-mt-ko-en")
 
+# 품질 티어 (해상도/스텝). 낮은 티어일수록 GPU 점유 시간이 짧음
+QUALITY_TIERS: Dict[str, Dict[str, int]] = {
+    "draft": {"width": 256, "height": 256, "steps": 2},
+    "standard": {"width": 512, "height": 512, "steps": 4},
+    "high": {"width": 768, "height": 768, "steps": 4},
+}
+QUALITY_ORDER = ["draft", "standard", "high"]
+DEFAULT_QUALITY = os.getenv("IMAGE_QUALITY_DEFAULT", "standard")
+
+# 자동 하향 기준: ComfyUI 대기열 깊이 / 최근 p95 생성 시간(초)
+QUALITY_QUEUE_STEP = int(os.getenv("QUALITY_QUEUE_STEP", "3"))
+QUALITY_P95_LIMIT = float(os.getenv("QUALITY_P95_LIMIT", "30"))
+
+# 실시간 미리보기 (SSE 중계)
+COMFYUI_WS_TIMEOUT = float(os.getenv("COMFYUI_WS_TIMEOUT", "120"))
+PREVIEW_MAX_SIDE = int(os.getenv("PREVIEW_MAX_SIDE", "256"))
+
+# 결과 이미지 수신 방식: websocket(SaveImageWebsocket, 기본) | http(SaveImage + /view)
+COMFYUI_IMAGE_TRANSPORT = os.getenv("COMFYUI_IMAGE_TRANSPORT", "websocket").lower()
+WS_OUTPUT_NODE = "8"
+SAVE_LATENT_NODE = "11"
+
+# 이번 프로세스에서 ComfyUI input 폴더에 올린 latent 파일
+_uploaded_latents = set()
+
 # 에러 메시지 상수 정의
 class ErrorMessages:
     # 400 Bad Request
     TEXT_TOO_LONG = "텍스트 길이가 1000자를 초과합니다."
     TEXT_EMPTY = "유효한 텍스트를 입력해주세요."
     INVALID_SEED = "seed 값은 0 이상의 정수여야 합니다."
+    INVALID_QUALITY = f"quality 값은 auto, {', '.join(QUALITY_ORDER)} 중 하나여야 합니다."
+    INVALID_DERIVE = f"derive 값은 {', '.join(PLATFORM_PRESETS)} 중에서 선택해야 합니다."
+    SOURCE_NOT_FOUND = "원본 이미지 파일을 찾을 수 없습니다."
+    INVALID_DENOISE = "denoise 값은 0.05 ~ 1.0 사이여야 합니다."
     MALFORMED_REQUEST = "요청 형식이 올바르지 않습니다."
 
     # 500 Internal Server Error
@@ -101,6 +148,27 @@ class CopyToImageReq(BaseModel):
     text: str
     style: Optional[str] = None
     seed: Optional[int] = None
+    quality: Optional[str] = None  # None/auto → 기본 티어, 부하 시 자동 하향
+    derive: Optional[List[str]] = None  # 파생 규격 (instagram_feed, instagram_story, banner)
+    format: Optional[str] = None  # png | webp | avif | jpeg (생략 시 Accept 헤더, 없으면 png)
+    preset: Optional[str] = None  # fast | small (기본: IMAGE_ENCODE_PRESET)
+
+
+class VariationReq(BaseModel):
+    source: str  # data/outputs 또는 data/uploads 의 파일명(또는 /static URL)
+    text: Optional[str] = None  # 생략 시 원본 유지 위주의 기본 프롬프트
+    style: Optional[str] = None
+    seed: Optional[int] = None
+    denoise: float = 0.45  # 낮을수록 원본에 가까움. 실제 스텝 = 티어 스텝 × denoise (최소 1)
+    quality: Optional[str] = None
+    cache_latent: bool = True  # 원본 latent 캐시 (반복 변형 시 VAEEncode 생략)
+    format: Optional[str] = None
+    preset: Optional[str] = None
+
+
+class DeriveReq(BaseModel):
+    filename: str  # data/outputs 안의 원본 파일명
+    presets: Optional[List[str]] = None  # 생략 시 전체 프리셋
 
 
 # 글로벌 파이프라인 인스턴스
@@ -108,6 +176,100 @@ _pipeline_singleton = None
 _model_loading_lock = threading.Lock()
 
 
+class QualityController:
+    """ComfyUI 대기열 깊이와 최근 p95 생성 시간을 보고 품질 티어를 결정"""
+
+    def __init__(self, window: int = 50, queue_ttl: float = 2.0):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._queue_ttl = queue_ttl
+        self._queue_cache: Tuple[float, Optional[int]] = (0.0, None)
+
+    def record(self, seconds: float):
+        """성공한 ComfyUI 생성 시간 기록"""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < 5:
+            return None
+        return samples[int(round(0.95 * (len(samples) - 1)))]
+
+    def queue_depth(self) -> Optional[int]:
+        """/queue 의 실행 중 + 대기 작업 수 (짧게 캐시, 실패 시 None)"""
+        ts, depth = self._queue_cache
+        if time.time() - ts < self._queue_ttl:
+            return depth
+        try:
+            r = requests.get(f"{COMFYUI_URL}/queue", timeout=3)
+            r.raise_for_status()
+            q = r.json()
+            depth = len(q.get("queue_running", [])) + len(q.get("queue_pending", []))
+        except Exception as e:
+            print(f"[quality] 대기열 조회 실패: {e}")
+            depth = None
+        self._queue_cache = (time.time(), depth)
+        return depth
+
+    def select(self, requested: Optional[str]) -> Dict[str, Any]:
+        """요청 티어를 상한으로 두고 부하에 따라 단계적으로 하향"""
+        start = requested or DEFAULT_QUALITY
+        if start not in QUALITY_TIERS:
+            start = "standard"
+
+        depth = self.queue_depth()
+        p95 = self.p95()
+        steps_down, reasons = 0, []
+        if depth is not None and QUALITY_QUEUE_STEP > 0 and depth >= QUALITY_QUEUE_STEP:
+            steps_down += 1 if depth < 2 * QUALITY_QUEUE_STEP else 2
+            reasons.append(f"queue_depth={depth}")
+        if p95 is not None and p95 >= QUALITY_P95_LIMIT:
+            steps_down += 1
+            reasons.append(f"p95={p95:.1f}s")
+
+        used = QUALITY_ORDER[max(0, QUALITY_ORDER.index(start) - steps_down)]
+        return {
+            "requested": requested or "auto",
+            "used": used,
+            **QUALITY_TIERS[used],
+            "queue_depth": depth,
+            "p95_latency": round(p95, 2) if p95 is not None else None,
+            "degraded": used != start,
+            "reason": ", ".join(reasons) if used != start else None,
+        }
+
+
+_quality_controller = QualityController()
+
+
+def _comfyui_ws_url() -> str:
+    """http(s)://host → ws(s)://host/ws"""
+    if COMFYUI_URL.startswith("https://"):
+        return "wss://" + COMFYUI_URL[len("https://"):] + "/ws"
+    return "ws://" + COMFYUI_URL.split("://", 1)[-1] + "/ws"
+
+
+def _encode_preview(raw: bytes) -> Optional[Dict[str, Any]]:
+    """ComfyUI 미리보기 프레임 → 축소 JPEG(base64)"""
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(raw)).convert("RGB")
+        img.thumbnail((PREVIEW_MAX_SIDE, PREVIEW_MAX_SIDE))
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=70)
+        return {
+            "image": base64.b64encode(buf.getvalue()).decode("ascii"),
+            "width": img.width,
+            "height": img.height,
+        }
+    except Exception as e:
+        print(f"[stream] 미리보기 디코딩 실패: {e}")
+        return None
+
+
 class LocalModelPipeline:
     """허깅페이스 번역 + ComfyUI(ngrok) 파이프라인"""
 
@@ -163,13 +325,15 @@ class LocalModelPipeline:
             return text
 
         try:
-            out = self.hf_translator(text, max_length=256)
+            with metrics.upstream("hf_translator", HF_TRANSLATION_MODEL), tracing.span("translate", chars=len(text)):
+                out = self.hf_translator(text, max_length=256)
             english_text = (out[0].get("translation_text") or "").strip()
             return english_text or text
         except Exception as e:
             print(f"[HF 번역 실패] {e} → 원문 사용")
             return text
 
+    @tracing.traced("enhance_prompt")
     def enhance_prompt(self, text: str, style: Optional[str] = None) -> str:
         """프롬프트 강화: 번역 + 스타일 번역 + 기본 품질 키워드"""
         if not self.loaded:
@@ -193,10 +357,10 @@ class LocalModelPipeline:
 
         return enhanced
 
-    def generate_image_with_comfyui(self, prompt: str, seed: Optional[int] = None) -> bytes:
-        """ComfyUI 워크플로우 호출 → 이미지 바이트 반환"""
-        print(f"ComfyUI로 실제 이미지 생성: {prompt}")
-
+    def build_workflow(self, prompt: str, seed: Optional[int] = None,
+                       tier: Optional[Dict[str, Any]] = None, output: str = "save") -> Dict[str, Any]:
+        """FLUX txt2img 워크플로우 구성 (output: save=SaveImage, websocket=SaveImageWebsocket)"""
+        tier = tier or QUALITY_TIERS["standard"]
         workflow = {
             "1": {
                 "inputs": {"unet_name": COMFYUI_MODELS["unet"]},
@@ -223,8 +387,8 @@ class LocalModelPipeline:
             },
             "4": {
                 "inputs": {
-                    "width": 512,
-                    "height": 512,
+                    "width": tier["width"],
+                    "height": tier["height"],
                     "batch_size": 1,
                 },
                 "class_type": "EmptyLatentImage",
@@ -233,7 +397,7 @@ class LocalModelPipeline:
             "5": {
                 "inputs": {
                     "seed": seed or int(time.time()) % 1000000,
-                    "steps": 4,
+                    "steps": tier["steps"],
                     "cfg": 1.0,
                     "sampler_name": "euler",
                     "scheduler": "simple",
@@ -268,24 +432,206 @@ class LocalModelPipeline:
                 "_meta": {"title": "Save"},
             },
         }
-
-        try:
-            client_id = str(uuid.uuid4())
+        if output == "websocket":
+            workflow[WS_OUTPUT_NODE] = {
+                "inputs": {"images": ["7", 0]},
+                "class_type": "SaveImageWebsocket",
+                "_meta": {"title": "Send over websocket"},
+            }
+        return workflow
+
+    def build_img2img_workflow(self, prompt: str, seed: Optional[int], tier: Dict[str, Any], denoise: float,
+                               image_name: Optional[str] = None, latent_name: Optional[str] = None,
+                               save_latent_prefix: Optional[str] = None, output: str = "save") -> Dict[str, Any]:
+        """
+        img2img 워크플로우: LoadImage → VAEEncode (또는 캐시된 LoadLatent) → KSampler(denoise<1)
+        save_latent_prefix 를 주면 인코딩한 latent 를 SaveLatent 로 함께 저장
+
+        KSampler 는 denoise<1 이면 steps/denoise 길이의 스케줄에서 마지막 steps 개를 실행하므로
+        steps 를 티어 값 그대로 두면 시간이 줄지 않음 → max(1, round(티어 스텝 × denoise)) 로 줄여
+        티어와 같은 스케줄의 뒷부분만 실행
+        """
+        workflow = self.build_workflow(prompt, seed, tier, output=output)
+        del workflow["4"]  # EmptyLatentImage 대신 원본 latent 사용
+        workflow["5"]["inputs"]["steps"] = max(1, round(tier["steps"] * denoise))
+        workflow["5"]["inputs"]["denoise"] = denoise
+
+        if latent_name:
+            workflow["9"] = {
+                "inputs": {"latent": latent_name},
+                "class_type": "LoadLatent",
+                "_meta": {"title": "Load cached latent"},
+            }
+            workflow["5"]["inputs"]["latent_image"] = ["9", 0]
+            return workflow
+
+        workflow["9"] = {
+            "inputs": {"image": image_name},
+            "class_type": "LoadImage",
+            "_meta": {"title": "Load source"},
+        }
+        workflow["10"] = {
+            "inputs": {"pixels": ["9", 0], "vae": ["6", 0]},
+            "class_type": "VAEEncode",
+            "_meta": {"title": "Encode source"},
+        }
+        workflow["5"]["inputs"]["latent_image"] = ["10", 0]
+        if save_latent_prefix:
+            workflow[SAVE_LATENT_NODE] = {
+                "inputs": {"samples": ["10", 0], "filename_prefix": save_latent_prefix},
+                "class_type": "SaveLatent",
+                "_meta": {"title": "Cache latent"},
+            }
+        return workflow
+
+    def _upload_to_comfyui(self, name: str, data: bytes) -> str:
+        """ComfyUI input 폴더로 업로드 (/upload/image) → 서버측 파일명"""
+        r = requests.post(
+            f"{COMFYUI_URL}/upload/image",
+            files={"image": (name, data)},
+            data={"type": "input", "overwrite": "true"},
+            timeout=30,
+        )
+        r.raise_for_status()
+        return r.json().get("name", name)
+
+    def _fetch_saved_latent(self, prompt_id: str) -> Optional[bytes]:
+        """SaveLatent 결과(.latent)를 /view 로 가져오기"""
+        r = requests.get(f"{COMFYUI_URL}/history/{prompt_id}", timeout=10)
+        r.raise_for_status()
+        outputs = r.json().get(prompt_id, {}).get("outputs", {})
+        for info in outputs.get(SAVE_LATENT_NODE, {}).get("latents", []):
+            res = requests.get(f"{COMFYUI_URL}/view", params={
+                "filename": info["filename"],
+                "subfolder": info.get("subfolder", ""),
+                "type": info.get("type", "output"),
+            }, timeout=15)
+            if res.status_code == 200:
+                return res.content
+        return None
+
+    @tracing.traced("comfyui.variation")
+    def generate_variation(self, prompt: str, source_png: bytes, seed: Optional[int], tier: Dict[str, Any],
+                           denoise: float, cache_latent: bool = True) -> Tuple[bytes, str]:
+        """
+        원본 이미지를 부분 denoise 로 재샘플링 → (이미지 바이트, latent 캐시 상태 hit|miss|off)
+        같은 원본/해상도/VAE 조합의 latent 는 data/latents 에 저장해 다음 변형부터 VAEEncode 생략
+        캐시 경로가 실패하면(ComfyUI 재시작으로 input 폴더의 latent 소실 등) 원본 인코딩으로 다시 실행 → miss
+        """
+        key = hashlib.sha1(
+            source_png + f"{tier['width']}x{tier['height']}:{COMFYUI_MODELS['vae']}".encode()
+        ).hexdigest()[:16]
+        latent_file = f"variation_{key}.latent"
+        local_latent = os.path.join(LATENT_DIR, latent_file)
+
+        if cache_latent and os.path.exists(local_latent):
+            try:
+                if latent_file not in _uploaded_latents:
+                    with open(local_latent, "rb") as f:
+                        self._upload_to_comfyui(latent_file, f.read())
+                    _uploaded_latents.add(latent_file)
+                os.utime(local_latent)  # LRU 정리 기준
+                img_bytes, _ = self._run_variation(prompt, seed, tier, lambda output: self.build_img2img_workflow(
+                    prompt, seed, tier, denoise, latent_name=latent_file, output=output), fallback=False)
+                return img_bytes, "hit"
+            except Exception as e:
+                # ComfyUI 재시작 등으로 input 폴더의 latent 가 사라졌을 수 있음 → 다음엔 다시 업로드
+                _uploaded_latents.discard(latent_file)
+                print(f"[variation] latent 캐시 실패 → 원본 인코딩: {e}")
+
+        image_name = self._upload_to_comfyui(f"variation_{key}.png", source_png)
+        img_bytes, prompt_id = self._run_variation(prompt, seed, tier, lambda output: self.build_img2img_workflow(
+            prompt, seed, tier, denoise, image_name=image_name,
+            save_latent_prefix=f"latents/variation_{key}" if cache_latent else None, output=output))
+        if not cache_latent:
+            return img_bytes, "off"
+
+        if prompt_id:
+            try:
+                latent = self._fetch_saved_latent(prompt_id)
+                if latent:
+                    with open(local_latent, "wb") as f:
+                        f.write(latent)
+                    _prune_latents()
+                    self._upload_to_comfyui(latent_file, latent)
+                    _uploaded_latents.add(latent_file)
+            except Exception as e:
+                print(f"[variation] latent 캐시 저장 실패: {e}")
+
+        return img_bytes, "miss"
+
+    def _run_variation(self, prompt: str, seed: Optional[int], tier: Dict[str, Any],
+                       workflow_fn: Callable[[str], Dict[str, Any]], fallback: bool = True
+                       ) -> Tuple[Optional[bytes], Optional[str]]:
+        """img2img 워크플로우 실행 → (이미지 바이트, prompt_id)"""
+        prompt_id, img_bytes = None, None
+        for ev in self.stream_image_with_comfyui(prompt, seed, tier, workflow_fn=workflow_fn, fallback=fallback):
+            if ev["type"] == "queued":
+                prompt_id = ev["prompt_id"]
+            elif ev["type"] == "image":
+                img_bytes = ev["bytes"]
+        return img_bytes, prompt_id
+
+    def _queue_prompt(self, workflow: Dict[str, Any], client_id: str) -> str:
+        """/prompt 에 워크플로우 제출 → prompt_id"""
+        with metrics.upstream("comfyui", "prompt") as call, tracing.span("comfyui.queue"):
             response = requests.post(
                 f"{COMFYUI_URL}/prompt",
                 json={"prompt": workflow, "client_id": client_id},
                 timeout=15,
             )
+            call.status(response.status_code)
+
+        if response.status_code != 200:
+            try:
+                error_detail = response.json()
+            except Exception:
+                error_detail = response.text
+            raise Exception(f"ComfyUI 요청 실패: {response.status_code} - {error_detail}")
+
+        prompt_id = response.json()["prompt_id"]
+        print(f"ComfyUI 작업 ID: {prompt_id}")
+        return prompt_id
+
+    def _download_output_image(self, task_info: Dict[str, Any]) -> Optional[bytes]:
+        """history 의 outputs 에서 첫 이미지를 /view 로 내려받기"""
+        outputs = task_info.get("outputs", {})
+        for node_id, output in outputs.items():
+            if "images" in output:
+                for img_info in output["images"]:
+                    img_url = f"{COMFYUI_URL}/view"
+                    params = {
+                        "filename": img_info["filename"],
+                        "subfolder": img_info.get("subfolder", ""),
+                        "type": "output",
+                    }
+                    img_response = requests.get(img_url, params=params, timeout=15)
+                    if img_response.status_code == 200:
+                        return img_response.content
+        return None
+
+    @tracing.traced("comfyui.generate")
+    def generate_image_with_comfyui(self, prompt: str, seed: Optional[int] = None,
+                                    tier: Optional[Dict[str, Any]] = None) -> bytes:
+        """ComfyUI 워크플로우 호출 → 이미지 바이트 반환"""
+        for ev in self.stream_image_with_comfyui(prompt, seed, tier):
+            if ev["type"] == "image":
+                return ev["bytes"]
+        return self.generate_image_demo(prompt, seed)
 
-            if response.status_code != 200:
-                try:
-                    error_detail = response.json()
-                except Exception:
-                    error_detail = response.text
-                raise Exception(f"ComfyUI 요청 실패: {response.status_code} - {error_detail}")
+    def _generate_with_polling(self, prompt: str, seed: Optional[int] = None,
+                               tier: Optional[Dict[str, Any]] = None,
+                               workflow: Optional[Dict[str, Any]] = None, fallback: bool = True) -> bytes:
+        """SaveImage 워크플로우 + /history 폴링 + /view 다운로드 (웹소켓 불가 시). fallback=False 면 실패 시 예외"""
+        tier = tier or QUALITY_TIERS["standard"]
+        print(f"ComfyUI로 실제 이미지 생성: {prompt} ({tier['width']}x{tier['height']}, {tier['steps']} steps)")
 
-            prompt_id = response.json()["prompt_id"]
-            print(f"ComfyUI 작업 ID: {prompt_id}")
+        workflow = workflow or self.build_workflow(prompt, seed, tier)
+
+        try:
+            started = time.time()
+            client_id = str(uuid.uuid4())
+            prompt_id = self._queue_prompt(workflow, client_id)
 
             # 진행 상태 폴링 (최대 약 5분)
             for _ in range(160):
@@ -302,20 +648,12 @@ class LocalModelPipeline:
                 status = task_info.get("status", {})
 
                 if status.get("completed", False):
-                    outputs = task_info.get("outputs", {})
-                    for node_id, output in outputs.items():
-                        if "images" in output:
-                            for img_info in output["images"]:
-                                img_url = f"{COMFYUI_URL}/view"
-                                params = {
-                                    "filename": img_info["filename"],
-                                    "subfolder": img_info.get("subfolder", ""),
-                                    "type": "output",
-                                }
-                                img_response = requests.get(img_url, params=params, timeout=15)
-                                if img_response.status_code == 200:
-                                    print("ComfyUI 이미지 생성 완료")
-                                    return img_response.content
+                    img_bytes = self._download_output_image(task_info)
+                    if img_bytes:
+                        print("ComfyUI 이미지 생성 완료")
+                        _quality_controller.record(time.time() - started)
+                        metrics.observe_upstream("comfyui", "generate", time.time() - started)
+                        return img_bytes
 
                 if "error" in status:
                     raise Exception(f"ComfyUI 오류: {status['error']}")
@@ -323,56 +661,136 @@ class LocalModelPipeline:
             raise Exception("ComfyUI 타임아웃")
 
         except Exception as e:
+            metrics.observe_upstream("comfyui", "generate", time.time() - started, type(e).__name__)
+            if not fallback:
+                raise
             # ComfyUI 실패 시 데모 fallback 이미지 생성
             print(f"ComfyUI 실패, 데모 모드로 fallback: {e}")
             return self.generate_image_demo(prompt, seed)
 
-    def generate_image_demo(self, prompt: str, seed: Optional[int] = None) -> bytes:
-        """데모 이미지 생성 (ComfyUI 실패시 fallback)"""
-        from PIL import Image, ImageDraw, ImageFont
-        import io
+    def stream_image_with_comfyui(self, prompt: str, seed: Optional[int] = None,
+                                  tier: Optional[Dict[str, Any]] = None,
+                                  workflow_fn: Optional[Callable[[str], Dict[str, Any]]] = None,
+                                  fallback: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        ComfyUI 웹소켓을 구독하며 진행률/미리보기 이벤트를 yield.
+        마지막 이벤트는 {"type": "image", "bytes": ...}.
+        (미리보기 프레임은 ComfyUI를 --preview-method auto 로 실행해야 전송됨)
+
+        COMFYUI_IMAGE_TRANSPORT=websocket 이면 SaveImageWebsocket 노드로
+        결과 PNG를 같은 소켓으로 받아 /view 왕복과 GPU 서버 디스크 저장을 생략.
+
+        workflow_fn(output) 을 주면 기본 txt2img 대신 해당 워크플로우 실행 (img2img 등).
+        fallback=False 면 실패 시 데모 이미지 대신 예외를 그대로 던짐 (호출부가 다른 경로로 재시도할 때).
+        """
+        tier = tier or QUALITY_TIERS["standard"]
+        workflow_fn = workflow_fn or (lambda output: self.build_workflow(prompt, seed, tier, output=output))
+        if websocket is None or http_cassette.active():
+            print("[stream] websocket-client 미설치 또는 HTTP 카세트 사용 중 → 폴링 방식으로 생성")
+            yield {"type": "image", "bytes": self._generate_with_polling(prompt, seed, tier, workflow_fn("save"),
+                                                                         fallback)}
+            return
+
+        client_id = str(uuid.uuid4())
+        try:
+            ws = websocket.create_connection(f"{_comfyui_ws_url()}?clientId={client_id}", timeout=15)
+        except Exception as e:
+            print(f"[stream] ComfyUI 웹소켓 연결 실패 → 폴링 방식으로 생성: {e}")
+            yield {"type": "image", "bytes": self._generate_with_polling(prompt, seed, tier, workflow_fn("save"),
+                                                                         fallback)}
+            return
+
+        ws_output = COMFYUI_IMAGE_TRANSPORT == "websocket"
+        print(f"ComfyUI로 실제 이미지 생성: {prompt} ({tier['width']}x{tier['height']}, "
+              f"{tier['steps']} steps, transport={'websocket' if ws_output else 'http'})")
+        try:
+            started = time.time()
+            workflow = workflow_fn("websocket" if ws_output else "save")
+            prompt_id = self._queue_prompt(workflow, client_id)
+            yield {"type": "queued", "prompt_id": prompt_id}
+
+            ws.settimeout(COMFYUI_WS_TIMEOUT)
+            current_node = None
+            img_bytes = None
+            while True:
+                if time.time() - started > 300:
+                    raise Exception("ComfyUI 타임아웃")
+                msg = ws.recv()
+
+                if isinstance(msg, bytes):
+                    # 바이너리 프레임: [event(4B)][format(4B)][image bytes]
+                    if len(msg) <= 8:
+                        continue
+                    if ws_output and current_node == WS_OUTPUT_NODE:
+                        img_bytes = msg[8:]  # 최종 결과 (PNG)
+                        continue
+                    preview = _encode_preview(msg[8:])
+                    if preview:
+                        yield {"type": "preview", **preview}
+                    continue
+
+                event = json.loads(msg)
+                data = event.get("data", {})
+                if data.get("prompt_id") not in (None, prompt_id):
+                    continue
+
+                if event.get("type") == "progress":
+                    value, total = data.get("value", 0), data.get("max", 0) or 1
+                    yield {"type": "progress", "value": value, "max": total,
+                           "percent": round(100.0 * value / total, 1)}
+                elif event.get("type") == "execution_error":
+                    raise Exception(f"ComfyUI 오류: {data.get('exception_message', data)}")
+                elif event.get("type") == "executing":
+                    current_node = data.get("node")
+                    if current_node is None:
+                        break  # 실행 완료
+
+            if not ws_output:
+                hist_response = requests.get(f"{COMFYUI_URL}/history/{prompt_id}", timeout=10)
+                hist_response.raise_for_status()
+                img_bytes = self._download_output_image(hist_response.json().get(prompt_id, {}))
+            if not img_bytes:
+                raise Exception("ComfyUI 결과 이미지 없음")
 
+            print("ComfyUI 이미지 생성 완료")
+            _quality_controller.record(time.time() - started)
+            metrics.observe_upstream("comfyui", "generate", time.time() - started)
+            tracing.record("comfyui.execute", started, transport="websocket" if ws_output else "http")
+            yield {"type": "image", "bytes": img_bytes}
+
+        except Exception as e:
+            metrics.observe_upstream("comfyui", "generate", time.time() - started, type(e).__name__)
+            if not fallback:
+                raise
+            print(f"ComfyUI 실패, 데모 모드로 fallback: {e}")
+            yield {"type": "image", "bytes": self.generate_image_demo(prompt, seed)}
+        finally:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def generate_image_demo(self, prompt: str, seed: Optional[int] = None) -> bytes:
+        """데모 이미지 생성 (ComfyUI 실패시 fallback) — 그리기/인코딩은 render_executor 워커에서"""
         print(f"데모 이미지 생성 (fallback): {prompt}")
+        return render_executor.run(render_executor.demo_image_png, prompt, seed, COMFYUI_URL, HF_TRANSLATION_MODEL)
 
-        img = Image.new("RGB", (1024, 1024), color="lightcoral")
-        draw = ImageDraw.Draw(img)
 
+def _prune_latents():
+    """data/latents 를 LATENT_CACHE_MAX 개로 유지 (수정 시각이 오래된 것부터 삭제)"""
+    try:
+        entries = [e for e in os.scandir(LATENT_DIR) if e.is_file() and e.name.endswith(".latent")]
+    except OSError:
+        return
+    if len(entries) <= LATENT_CACHE_MAX:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for e in entries[:len(entries) - LATENT_CACHE_MAX]:
         try:
-            font = ImageFont.load_default()
-        except Exception:
-            font = None
-
-        title = "ComfyUI Connection Failed - Demo Mode"
-        if font:
-            bbox = draw.textbbox((0, 0), title, font=font)
-            title_w = bbox[2] - bbox[0]
-            x = (1024 - title_w) // 2
-            draw.text((x, 100), title, fill="white", font=font)
-
-        info_lines = [
-            f"Prompt: {prompt[:60]}{'...' if len(prompt) > 60 else ''}",
-            f"Seed: {seed or 'Random'}",
-            "",
-            "ComfyUI Status: Failed",
-            "Check ComfyUI server (ngrok)",
-            f"at {COMFYUI_URL}",
-            "",
-            "Translation: HuggingFace OK",
-            f"✓ {HF_TRANSLATION_MODEL}",
-        ]
-
-        y = 300
-        for line in info_lines:
-            if font:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                line_w = bbox[2] - bbox[0]
-                x = (1024 - line_w) // 2
-                draw.text((x, y), line, fill="white", font=font)
-            y += 35
-
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        return buf.getvalue()
+            os.remove(e.path)
+            _uploaded_latents.discard(e.name)
+        except OSError:
+            pass
 
 
 def _get_pipeline():
@@ -400,6 +818,16 @@ def _validate_request(req: CopyToImageReq) -> CopyToImageReq:
         if req.seed is not None and (not isinstance(req.seed, int) or req.seed < 0):
             raise HTTPException(status_code=400, detail=ErrorMessages.INVALID_SEED)
 
+        if req.quality is not None:
+            req.quality = req.quality.strip().lower()
+            if req.quality in ("", "auto"):
+                req.quality = None
+            elif req.quality not in QUALITY_TIERS:
+                raise HTTPException(status_code=400, detail=ErrorMessages.INVALID_QUALITY)
+
+        if req.derive and any(p not in PLATFORM_PRESETS for p in req.derive):
+            raise HTTPException(status_code=400, detail=ErrorMessages.INVALID_DERIVE)
+
         return req
 
     except HTTPException:
@@ -411,10 +839,74 @@ def _validate_request(req: CopyToImageReq) -> CopyToImageReq:
         )
 
 
+def _resolve_encoding(fmt: Optional[str], preset: Optional[str], request: Request) -> Tuple[str, str]:
+    """출력 포맷/프리셋: format 필드 > Accept 헤더 > png"""
+    try:
+        return image_encoding.negotiate(fmt, request.headers.get("accept"), preset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@tracing.traced("save_output")
+def _save_output(img_bytes: bytes, fmt: str = "png",
+                 preset: Optional[str] = None) -> Tuple[str, str, Dict[str, Any]]:
+    """생성 이미지(ComfyUI/데모 PNG)를 요청 포맷으로 outputs 에 저장 → (절대 경로, 공개 URL, 인코딩 정보)"""
+    enc = render_executor.run(image_encoding.transcode, img_bytes, fmt, preset)
+    save_name = f"image_from_copy_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.{enc.ext}"
+    save_path = os.path.join(OUTPUT_DIR, save_name)
+
+    with open(save_path, "wb") as f:
+        f.write(enc.data)
+    metrics.output_written("image_from_copy", nbytes=enc.nbytes)
+
+    file_path = os.path.abspath(save_path).replace("\\", "/")
+    file_url = f"{BACKEND_PUBLIC_URL}/static/outputs/{save_name}"
+    return file_path, file_url, image_encoding.report(enc, "image_from_copy")
+
+
+@tracing.traced("derive")
+def _derive(file_path: str, presets: List[str]) -> Dict[str, Dict[str, Any]]:
+    """원본 옆에 플랫폼 규격 파생본 생성(캐시) → 프리셋별 URL/경로"""
+    out = {}
+    for preset, info in derive_platform_sizes(file_path, list(dict.fromkeys(presets))).items():
+        name = os.path.basename(info["path"])
+        out[preset] = {
+            **info,
+            "path": os.path.abspath(info["path"]).replace("\\", "/"),
+            "url": f"{BACKEND_PUBLIC_URL}/static/outputs/{name}",
+            "size": PLATFORM_PRESETS[preset],
+        }
+    return out
+
+
+def _build_response(req: CopyToImageReq, enhanced_prompt: str, quality: Dict[str, Any],
+                    file_path: str, file_url: str, timing: Dict[str, float],
+                    derivatives: Optional[Dict[str, Any]] = None,
+                    encoding: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "ok": True,
+        "output_path": file_path,
+        "file_url": file_url,
+        "derivatives": derivatives or {},
+        "metadata": {
+            "original_text": req.text,
+            "enhanced_prompt": enhanced_prompt,
+            "style": req.style,
+            "seed": req.seed,
+            "model_used": "ComfyUI + HF Translation",
+            "demo_mode": False,
+            "quality": quality,
+            "encoding": encoding,
+            "timing": {k: round(v, 2) for k, v in timing.items()},
+        },
+    }
+
+
 @router.post("/image-from-copy")
-def image_from_copy(req: CopyToImageReq):
+def image_from_copy(req: CopyToImageReq, request: Request):
     """텍스트로부터 이미지 생성 - (HF 번역 + 프롬프트 강화) → ComfyUI 생성"""
     validated_req = _validate_request(req)
+    fmt, preset = _resolve_encoding(validated_req.format, validated_req.preset, request)
     t0 = time.time()
 
     try:
@@ -425,38 +917,184 @@ def image_from_copy(req: CopyToImageReq):
         enhanced_prompt = pipeline.enhance_prompt(validated_req.text, validated_req.style)
         enhancement_time = time.time() - t1
 
-        # 2) ComfyUI로 실제 이미지 생성
+        # 2) 품질 티어 결정 (부하 시 자동 하향) → ComfyUI로 실제 이미지 생성
+        quality = _quality_controller.select(validated_req.quality)
         t2 = time.time()
-        img_bytes = pipeline.generate_image_with_comfyui(enhanced_prompt, validated_req.seed)
+        img_bytes = pipeline.generate_image_with_comfyui(enhanced_prompt, validated_req.seed, quality)
         generation_time = time.time() - t2
 
-        # 3) 파일 저장
-        save_name = f"image_from_copy_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.png"
-        save_path = os.path.join(OUTPUT_DIR, save_name)
+        # 3) 파일 저장 (요청 포맷으로 변환)
+        file_path, file_url, encoding = _save_output(img_bytes, fmt, preset)
+
+        # 4) 플랫폼 규격 파생 (선택, 같은 렌더 재사용)
+        t3 = time.time()
+        derivatives = _derive(file_path, validated_req.derive) if validated_req.derive else None
+        derive_time = time.time() - t3
+
+        return _build_response(validated_req, enhanced_prompt, quality, file_path, file_url, {
+            "enhancement_time": enhancement_time,
+            "generation_time": generation_time,
+            "derive_time": derive_time,
+            "total_time": time.time() - t0,
+        }, derivatives, encoding)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"{ErrorMessages.UNKNOWN_ERROR}: {str(e)}",
+        )
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-        with open(save_path, "wb") as f:
-            f.write(img_bytes)
 
-        file_path = os.path.abspath(save_path).replace("\\", "/")
-        file_url = f"{BACKEND_PUBLIC_URL}/static/outputs/{save_name}"
+@router.post("/image-from-copy/stream")
+def image_from_copy_stream(req: CopyToImageReq, request: Request):
+    """
+    /image-from-copy 와 동일하지만 SSE(text/event-stream)로 진행 상황을 중계.
+    이벤트: status → queued → progress / preview(반복) → done | error
+    done 의 data 는 /image-from-copy 응답과 같은 형식.
+    """
+    validated_req = _validate_request(req)
+    fmt, preset = _resolve_encoding(validated_req.format, validated_req.preset, request)
 
-        total_time = time.time() - t0
+    def events() -> Iterator[str]:
+        t0 = time.time()
+        try:
+            pipeline = _get_pipeline()
+
+            yield _sse("status", {"stage": "prompt"})
+            t1 = time.time()
+            enhanced_prompt = pipeline.enhance_prompt(validated_req.text, validated_req.style)
+            enhancement_time = time.time() - t1
+
+            quality = _quality_controller.select(validated_req.quality)
+            yield _sse("status", {"stage": "generating", "quality": quality["used"]})
+
+            t2 = time.time()
+            first_preview_time = None
+            img_bytes = None
+            for ev in pipeline.stream_image_with_comfyui(enhanced_prompt, validated_req.seed, quality):
+                if ev["type"] == "image":
+                    img_bytes = ev["bytes"]
+                    continue
+                if ev["type"] == "preview" and first_preview_time is None:
+                    first_preview_time = time.time() - t0
+                yield _sse(ev.pop("type"), ev)
+            generation_time = time.time() - t2
+
+            file_path, file_url, encoding = _save_output(img_bytes, fmt, preset)
+            t3 = time.time()
+            derivatives = _derive(file_path, validated_req.derive) if validated_req.derive else None
+            timing = {
+                "enhancement_time": enhancement_time,
+                "generation_time": generation_time,
+                "derive_time": time.time() - t3,
+                "total_time": time.time() - t0,
+            }
+            if first_preview_time is not None:
+                timing["first_preview_time"] = first_preview_time
+            yield _sse("done", _build_response(validated_req, enhanced_prompt, quality, file_path, file_url,
+                                               timing, derivatives, encoding))
+
+        except HTTPException as e:
+            yield _sse("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            yield _sse("error", {"status_code": 500, "detail": f"{ErrorMessages.UNKNOWN_ERROR}: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _resolve_source(source: str) -> Optional[str]:
+    """파일명/URL → data/outputs 또는 data/uploads 안의 실제 경로"""
+    name = os.path.basename(source.split("?", 1)[0].rstrip("/"))
+    for base in (OUTPUT_DIR, UPLOAD_DIR):
+        path = os.path.join(base, name)
+        if name and os.path.isfile(path):
+            return path
+    return None
+
+
+@tracing.traced("prepare_source")
+def _prepare_source(path: str, tier: Dict[str, Any]) -> bytes:
+    """원본을 티어 해상도로 중앙 크롭/리사이즈한 PNG 바이트"""
+    from PIL import Image, ImageOps
+
+    img = Image.open(path).convert("RGB")
+    img = ImageOps.fit(img, (tier["width"], tier["height"]), Image.Resampling.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@router.post("/image-from-copy/variation")
+def image_variation(req: VariationReq, request: Request):
+    """기존 결과(또는 업로드)를 img2img 부분 denoise 로 변형 - 원본 톤 유지 + 더 빠른 생성"""
+    if not (0.05 <= req.denoise <= 1.0):
+        raise HTTPException(status_code=400, detail=ErrorMessages.INVALID_DENOISE)
+    if req.seed is not None and req.seed < 0:
+        raise HTTPException(status_code=400, detail=ErrorMessages.INVALID_SEED)
+    quality_name = (req.quality or "").strip().lower()
+    if quality_name in ("", "auto"):
+        quality_name = None
+    elif quality_name not in QUALITY_TIERS:
+        raise HTTPException(status_code=400, detail=ErrorMessages.INVALID_QUALITY)
+    if req.text and len(req.text) > 1000:
+        raise HTTPException(status_code=400, detail=ErrorMessages.TEXT_TOO_LONG)
+
+    fmt, preset = _resolve_encoding(req.format, req.preset, request)
+
+    src_path = _resolve_source(req.source)
+    if not src_path:
+        raise HTTPException(status_code=404, detail=ErrorMessages.SOURCE_NOT_FOUND)
+
+    t0 = time.time()
+    try:
+        pipeline = _get_pipeline()
+
+        t1 = time.time()
+        if req.text and req.text.strip():
+            enhanced_prompt = pipeline.enhance_prompt(req.text, req.style)
+        else:
+            enhanced_prompt = pipeline.enhance_prompt("a variation of the same advertisement image", req.style)
+        enhancement_time = time.time() - t1
+
+        quality = _quality_controller.select(quality_name)
+        source_png = _prepare_source(src_path, quality)
+
+        t2 = time.time()
+        img_bytes, latent_cache = pipeline.generate_variation(
+            enhanced_prompt, source_png, req.seed, quality, req.denoise, req.cache_latent)
+        generation_time = time.time() - t2
+
+        file_path, file_url, encoding = _save_output(img_bytes, fmt, preset)
 
         return {
             "ok": True,
             "output_path": file_path,
             "file_url": file_url,
             "metadata": {
-                "original_text": validated_req.text,
+                "source": os.path.basename(src_path),
+                "original_text": req.text,
                 "enhanced_prompt": enhanced_prompt,
-                "style": validated_req.style,
-                "seed": validated_req.seed,
-                "model_used": "ComfyUI + HF Translation",
-                "demo_mode": False,
+                "style": req.style,
+                "seed": req.seed,
+                "denoise": req.denoise,
+                "latent_cache": latent_cache,
+                "model_used": "ComfyUI img2img + HF Translation",
+                "quality": quality,
+                "encoding": encoding,
                 "timing": {
                     "enhancement_time": round(enhancement_time, 2),
                     "generation_time": round(generation_time, 2),
-                    "total_time": round(total_time, 2),
+                    "total_time": round(time.time() - t0, 2),
                 },
             },
         }
@@ -470,6 +1108,31 @@ def image_from_copy(req: CopyToImageReq):
         )
 
 
+@router.post("/image-from-copy/derive")
+def derive_from_output(req: DeriveReq):
+    """이미 생성된 결과에서 플랫폼 규격 파생본만 생성 (GPU 사용 안 함)"""
+    presets = req.presets or list(PLATFORM_PRESETS)
+    if any(p not in PLATFORM_PRESETS for p in presets):
+        raise HTTPException(status_code=400, detail=ErrorMessages.INVALID_DERIVE)
+
+    src_path = os.path.join(OUTPUT_DIR, os.path.basename(req.filename))
+    if not os.path.isfile(src_path):
+        raise HTTPException(status_code=404, detail=ErrorMessages.SOURCE_NOT_FOUND)
+
+    t0 = time.time()
+    try:
+        derivatives = _derive(src_path, presets)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"{ErrorMessages.UNKNOWN_ERROR}: {str(e)}")
+
+    return {
+        "ok": True,
+        "source": os.path.basename(src_path),
+        "derivatives": derivatives,
+        "timing": {"derive_time": round(time.time() - t0, 2)},
+    }
+
+
 @router.get("/model-status")
 def model_status():
     """현재 모델/연결 상태 확인"""
@@ -529,10 +1192,16 @@ def model_status():
             "url": COMFYUI_URL,
             "models": comfyui_models,
             "expected_models": COMFYUI_MODELS,
+            "image_transport": COMFYUI_IMAGE_TRANSPORT if websocket is not None else "http",
         },
         "prompt_enhancement": {
             "base_quality": "detailed, sharp, high quality",
         },
+        "quality": {
+            "default": DEFAULT_QUALITY,
+            "tiers": QUALITY_TIERS,
+            "recent_p95_latency": _quality_controller.p95(),
+        },
         "status": "ready" if all_models_ready else "not_ready",
         "message": "모든 시스템 준비됨" if all_models_ready else "브릿지/ComfyUI 연결/모델 확인 필요",
     }
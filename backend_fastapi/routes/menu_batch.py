@@ -0,0 +1,205 @@
+# backend_fastapi/routes/menu_batch.py
+"""
+메뉴판 배치 렌더 (POST /menu-board/batch)
+
+프랜차이즈 지점별 가격/시즌 타이틀처럼 같은 메뉴판을 여러 벌 만들 때
+/menu-board 를 N 번 부르면 매번 배경을 다시 받고 폰트 패밀리를 다시 고른다.
+
+- 변형(variant)은 base 위에 덮어쓰는 MenuReq 필드. 변형마다 따로 검증 → 하나가 틀려도 배치는 계속
+- 배경은 URL 별로 부모에서 한 번만 받아 디코딩/리사이즈, 폰트 패밀리도 스타일별로 한 번만 골라
+  모든 변형이 공유 (워커에는 raw RGB 와 폰트 파일 경로를 넘김, face 는 워커 LRU 에 남음)
+- 렌더/인코딩은 render_executor 워커에서 병렬, 끝나는 순서대로 스트리밍
+    · output=ndjson (기본): 변형마다 data/outputs 에 저장하고 한 줄씩 {"index", "ok", "url", ...}
+      마지막 줄은 {"done": true, ...} 요약
+    · output=zip: 저장하지 않고 이미지를 ZIP 으로 바로 스트리밍 (+ manifest.json 에 변형별 결과/오류)
+
+환경 변수:
+    MENU_BATCH_MAX   한 번에 받는 변형 수 (기본 50)
+"""
+import json
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+
+from . import font_service, image_encoding, menu_descriptions, menu_service, render_executor, tracing
+from .menu_service import MenuReq
+
+router = APIRouter()
+
+BATCH_MAX = int(os.getenv("MENU_BATCH_MAX", "50"))
+OUTPUTS = ("ndjson", "zip")
+
+
+class MenuBatchReq(BaseModel):
+    base: Dict[str, Any] = Field(default_factory=dict, description="모든 변형에 공통인 MenuReq 필드")
+    variants: List[Dict[str, Any]] = Field(..., description="base 위에 덮어쓸 MenuReq 필드 (지점/가격대/시즌별)")
+    output: str = Field("ndjson", description="ndjson | zip")
+    format: Optional[str] = Field(None, description="png | webp | avif | jpeg (생략 시 Accept 헤더, 없으면 png)")
+    preset: Optional[str] = Field(None, description="fast | small")
+
+
+class _ZipStream:
+    """zipfile 이 쓰는 바이트를 모아 두었다가 제너레이터에서 꺼내 보냄 (seek 불가 스트림으로 취급됨)"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+# ---------------------------------------------------------------
+# 준비 (검증 + 공유 자원)
+# ---------------------------------------------------------------
+def _validate(base: Dict[str, Any], variants: List[Dict[str, Any]]) -> List[Tuple[int, Optional[MenuReq], Optional[str]]]:
+    out = []
+    for i, v in enumerate(variants):
+        try:
+            req = MenuReq(**{**base, **v})
+            menu_service.normalize_items(req)
+            out.append((i, req, None))
+        except ValidationError as e:
+            out.append((i, None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())))
+        except (ValueError, TypeError) as e:
+            out.append((i, None, str(e)))
+    return out
+
+
+@tracing.traced("batch_prepare")
+def _shared_resources(reqs: List[MenuReq]) -> Tuple[Dict[Optional[str], Any], Dict[str, Optional[str]]]:
+    """배경 URL → (raw RGB, 크기) | None, 스타일 → 폰트 파일 경로"""
+    backgrounds: Dict[Optional[str], Any] = {}
+    for url in dict.fromkeys(r.background_url for r in reqs):
+        if not url:
+            backgrounds[url] = None  # 흰 배경은 워커에서 바로 만듦
+            continue
+        canvas = menu_service.load_background(url)
+        backgrounds[url] = (canvas.tobytes(), canvas.size)
+
+    fonts = font_service.FontResolver()
+    for r in reqs:
+        for style in menu_service.menu_font_styles(r).values():
+            fonts.path(style)
+    return backgrounds, fonts.families
+
+
+def _slug(req: MenuReq, index: int) -> str:
+    name = menu_service.menu_title(req)
+    name = re.sub(r"[^\w가-힣-]+", "_", name).strip("_")[:40] or "menu"
+    return f"{index:03d}_{name}"
+
+
+def _render_all(validated, fmt: str, preset: str) -> Iterator[Tuple[int, Optional[MenuReq], Any, Optional[str]]]:
+    """(index, req, pages | None, error) 를 끝나는 순서대로"""
+    ok = [(i, req) for i, req, err in validated if req is not None]
+    for i, req, err in validated:
+        if req is None:
+            yield i, None, None, err
+    if not ok:
+        return
+
+    backgrounds, families = _shared_resources([req for _, req in ok])
+    workers = max(1, render_executor.stats()["workers"])
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="menu-batch") as pool:
+        futures = {
+            pool.submit(render_executor.run, render_executor.render_menu_variant,
+                        req.model_dump(exclude={"format", "preset"}), backgrounds[req.background_url],
+                        families, fmt, preset): (i, req)
+            for i, req in ok
+        }
+        for fut in as_completed(futures):
+            i, req = futures[fut]
+            try:
+                yield i, req, fut.result(), None
+            except Exception as e:
+                yield i, req, None, f"렌더링 실패: {e}"
+
+
+# ---------------------------------------------------------------
+# 출력
+# ---------------------------------------------------------------
+def _ndjson(validated, fmt: str, preset: str, descriptions: Optional[Dict[str, Any]]) -> Iterator[str]:
+    started = time.perf_counter()
+    done = failed = 0
+    for i, req, pages, err in _render_all(validated, fmt, preset):
+        if err is None:
+            try:
+                resp = menu_service.publish_pages(pages)
+                line = {"index": i, "ok": True, "url": resp["url"], "page_urls": resp["page_urls"],
+                        "encoding": resp["encoding"]}
+            except HTTPException as e:
+                err = e.detail
+        if err is not None:
+            line = {"index": i, "ok": False, "error": err}
+            failed += 1
+        else:
+            done += 1
+        yield json.dumps(line, ensure_ascii=False) + "\n"
+    yield json.dumps({"done": True, "ok": done, "failed": failed, "descriptions": descriptions,
+                      "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}) + "\n"
+
+
+def _zip(validated, fmt: str, preset: str, descriptions: Optional[Dict[str, Any]]) -> Iterator[bytes]:
+    stream = _ZipStream()
+    manifest = []
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED) as zf:
+        for i, req, pages, err in _render_all(validated, fmt, preset):
+            if err is not None:
+                manifest.append({"index": i, "ok": False, "error": err})
+                continue
+            stem = _slug(req, i)
+            names = []
+            for no, enc in enumerate(pages, start=1):
+                name = f"{stem}.{enc.ext}" if no == 1 else f"{stem}_p{no}.{enc.ext}"
+                zf.writestr(name, enc.data)  # 이미 압축된 포맷이라 STORED
+                image_encoding.report(enc, "menu_board")
+                names.append(name)
+            manifest.append({"index": i, "ok": True, "files": names, "encoding": pages[0].info()})
+            yield stream.drain()
+        manifest.sort(key=lambda m: m["index"])
+        zf.writestr("manifest.json", json.dumps({"items": manifest, "descriptions": descriptions},
+                                                ensure_ascii=False, indent=2))
+    yield stream.drain()
+
+
+@router.post("/menu-board/batch", tags=["Image Generation"])
+def batch_menu_endpoint(req: MenuBatchReq, request: Request):
+    output = req.output.strip().lower()
+    if output not in OUTPUTS:
+        raise HTTPException(status_code=400, detail=f"output 은 {', '.join(OUTPUTS)} 중 하나여야 합니다.")
+    if not req.variants:
+        raise HTTPException(status_code=400, detail="variants 가 비어 있습니다.")
+    if len(req.variants) > BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"variants 는 최대 {BATCH_MAX}개까지 가능합니다.")
+    fmt, preset = menu_service.negotiate_encoding(req.format, req.preset, request)
+    validated = _validate(req.base, req.variants)
+    # auto_desc 변형들의 빈 설명은 (테마, 언어) 별 LLM 1회로 함께 채움
+    auto = [r for _, r, _ in validated if r is not None and r.auto_desc]
+    descriptions = menu_descriptions.fill_descriptions(auto) if auto else None
+
+    if output == "zip":
+        return StreamingResponse(
+            _zip(validated, fmt, preset, descriptions),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="menu_boards.zip"'},
+        )
+    return StreamingResponse(
+        _ndjson(validated, fmt, preset, descriptions),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
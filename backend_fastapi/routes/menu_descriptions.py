@@ -0,0 +1,205 @@
+# backend_fastapi/routes/menu_descriptions.py
+"""
+메뉴 설명 자동 생성 (MenuReq.auto_desc)
+
+- desc 가 없는 아이템을 모아 LLM 호출 한 번으로 생성 (아이템마다 호출하지 않음, JSON 응답)
+- (정규화한 메뉴명, 테마, 언어) 단위로 data/menu_desc_cache.json 에 캐시 → 같은 메뉴는 다시 비용을 내지 않음
+- MENU_DESC_TIMEOUT 안에 못 받으면 설명 없이 렌더를 진행. 호출은 백그라운드에서 계속되어
+  끝나면 캐시에 들어가므로 다음 렌더부터는 설명이 붙음
+- 배치 렌더는 여러 변형의 아이템을 (테마, 언어) 별로 묶어 한 번에 요청
+
+환경 변수:
+    MENU_DESC_MODEL       설명 생성 모델 (기본 gpt-4o-mini)
+    MENU_DESC_TIMEOUT     렌더가 기다리는 최대 초 (기본 8)
+    MENU_DESC_LANGUAGE    기본 언어 (기본 ko)
+    MENU_DESC_CACHE_MAX   캐시 항목 수 상한 (기본 5000, 넘으면 오래된 것부터 삭제)
+"""
+import json
+import os
+import threading
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import metrics, tracing
+
+MODEL = os.getenv("MENU_DESC_MODEL", "gpt-4o-mini")
+TIMEOUT = float(os.getenv("MENU_DESC_TIMEOUT", "8"))
+DEFAULT_LANGUAGE = os.getenv("MENU_DESC_LANGUAGE", "ko").strip().lower() or "ko"
+CACHE_MAX = int(os.getenv("MENU_DESC_CACHE_MAX", "5000"))
+_CALL_TIMEOUT = 60.0  # 백그라운드로 넘어간 호출의 HTTP 제한
+
+STORAGE_ROOT = os.getenv(
+    "STORAGE_ROOT",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+)
+CACHE_PATH = os.path.join(STORAGE_ROOT, "menu_desc_cache.json")
+
+_LANG_NAMES = {"ko": "한국어", "en": "English", "ja": "日本語", "zh": "中文"}
+
+_lock = threading.Lock()
+_cache: Optional["OrderedDict[str, str]"] = None
+_inflight: Dict[Tuple[str, str, str], Any] = {}  # (테마, 언어, 이름들) → 진행 중 호출 (중복 요청 방지)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="menu-desc")
+_client = None
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", name or "").lower().split())
+
+
+def cache_key(name: str, theme: Optional[str], language: str) -> str:
+    return f"{language}|{normalize_name(theme or '')}|{normalize_name(name)}"
+
+
+# ---------------------------------------------------------------
+# 캐시
+# ---------------------------------------------------------------
+def _load() -> "OrderedDict[str, str]":
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_PATH, encoding="utf-8") as f:
+                _cache = OrderedDict(json.load(f))
+        except (OSError, ValueError):
+            _cache = OrderedDict()
+    return _cache
+
+
+def _save():
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    tmp = f"{CACHE_PATH}.{uuid.uuid4().hex[:6]}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_cache, f, ensure_ascii=False)
+    os.replace(tmp, CACHE_PATH)
+
+
+def _store(entries: Dict[str, str]):
+    if not entries:
+        return
+    with _lock:
+        cache = _load()
+        for k, v in entries.items():
+            cache[k] = v
+            cache.move_to_end(k)
+        while len(cache) > CACHE_MAX:
+            cache.popitem(last=False)
+        try:
+            _save()
+        except OSError as e:
+            print(f"[menu_descriptions] 캐시 저장 실패: {e}")
+
+
+def cache_info() -> Dict[str, Any]:
+    with _lock:
+        return {"items": len(_load()), "max": CACHE_MAX}
+
+
+# ---------------------------------------------------------------
+# LLM 호출 (그룹당 1회)
+# ---------------------------------------------------------------
+def _openai():
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=_CALL_TIMEOUT, max_retries=0)
+    return _client
+
+
+def _generate(names: List[str], theme: Optional[str], language: str) -> Dict[str, str]:
+    """메뉴명 목록 → {메뉴명: 설명}. 결과는 캐시에 저장 (타임아웃 후 끝나도 저장됨)"""
+    lang = _LANG_NAMES.get(language, language)
+    system_prompt = f"""
+당신은 음식점 메뉴판 카피라이터입니다. 각 메뉴에 어울리는 짧은 설명을 {lang}로 씁니다.
+- 메뉴당 한 문장, 25자 안팎 (영어는 8단어 안팎), 과장/가격/이모지 금지
+- 가게 테마: "{theme or '일반'}"
+- 반드시 JSON 객체로만 답하세요: {{"descriptions": {{"<메뉴명 그대로>": "<설명>", ...}}}}
+"""
+    try:
+        with metrics.upstream("openai", MODEL):
+            resp = _openai().chat.completions.create(
+                model=MODEL,
+                temperature=0.6,
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": json.dumps({"menu": names}, ensure_ascii=False)},
+                ],
+            )
+        data = json.loads(resp.choices[0].message.content or "{}").get("descriptions", {})
+    except Exception as e:
+        print(f"[menu_descriptions] 생성 실패: {e}")
+        return {}
+
+    by_norm = {normalize_name(k): str(v).strip() for k, v in data.items() if isinstance(v, str) and v.strip()}
+    out = {n: by_norm[normalize_name(n)] for n in names if normalize_name(n) in by_norm}
+    _store({cache_key(n, theme, language): d for n, d in out.items()})
+    return out
+
+
+# ---------------------------------------------------------------
+# 요청에 채우기
+# ---------------------------------------------------------------
+def fill_descriptions(reqs: List[Any], generate: bool = True) -> Dict[str, Any]:
+    """
+    auto_desc 인 MenuReq 들의 빈 desc 를 캐시 → (테마, 언어) 별 LLM 1회로 채움 (제자리 수정).
+    generate=False 면 캐시만 사용 (미리보기).
+    반환: {"cached", "generated", "missing", "timed_out"}
+    """
+    info = {"cached": 0, "generated": 0, "missing": 0, "timed_out": False}
+    todo: Dict[Tuple[Optional[str], str], List[Any]] = {}
+    with _lock:
+        cache = _load()
+        for req in reqs:
+            if not req.auto_desc:
+                continue
+            language = (getattr(req, "language", None) or DEFAULT_LANGUAGE).strip().lower()
+            for it in req.items:
+                if it.desc or not (it.name or "").strip():
+                    continue
+                desc = cache.get(cache_key(it.name, req.theme, language))
+                metrics.cache_event("menu_desc", desc is not None)
+                if desc is not None:
+                    it.desc = desc
+                    info["cached"] += 1
+                else:
+                    todo.setdefault((req.theme, language), []).append(it)
+    if not todo:
+        return info
+    if not generate:
+        info["missing"] = sum(len(v) for v in todo.values())
+        return info
+
+    with tracing.span("auto_desc", items=sum(len(v) for v in todo.values()), groups=len(todo)):
+        futures = {}
+        for (theme, language), items in todo.items():
+            names = sorted({it.name.strip() for it in items})
+            key = (normalize_name(theme or ""), language, "\n".join(names))
+            with _lock:
+                fut = _inflight.get(key)
+                if fut is None:
+                    fut = _inflight[key] = _executor.submit(_generate, names, theme, language)
+                    fut.add_done_callback(lambda _f, k=key: _inflight.pop(k, None))
+            futures[(theme, language)] = fut
+
+        deadline = time.monotonic() + TIMEOUT
+        for group, fut in futures.items():
+            try:
+                result = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                info["timed_out"] = True
+                result = {}
+            by_norm = {normalize_name(k): v for k, v in result.items()}
+            for it in todo[group]:
+                desc = by_norm.get(normalize_name(it.name))
+                if desc:
+                    it.desc = desc
+                    info["generated"] += 1
+                else:
+                    info["missing"] += 1
+    if info["timed_out"]:
+        print(f"[menu_descriptions] {TIMEOUT:g}s 초과 → 설명 없이 렌더 (생성은 백그라운드에서 계속)")
+    return info
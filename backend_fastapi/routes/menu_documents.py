@@ -0,0 +1,388 @@
+# backend_fastapi/routes/menu_documents.py
+"""
+저장된 메뉴 문서 + 부분 다시 그리기 (PATCH /menu-board/{id})
+
+가게는 디자인보다 가격을 훨씬 자주 바꾼다. /menu-board 는 매번 배경 다운로드, 폰트 선택,
+전체 측정, 전체 인코딩을 하지만, 문서로 저장해 두면 바뀐 줄만 다시 그린다.
+
+- 문서: /menu-board 요청 스펙(MenuReq)을 data/menu_docs/<id>.json 에 저장
+- 렌더 상태 (프로세스 메모리 LRU): 리사이즈된 배경, 배경+타이틀을 미리 합성한 정적 레이어,
+  레이아웃(LayoutPlan), 그려진 페이지, 페이지별 인코딩 결과
+- PATCH 처리 모드
+    · incremental: 품목/가격만 바뀌고 블록 높이가 같음 → 바뀐 아이템 영역만 정적 레이어에서 잘라
+      그 영역에 걸치는 run 을 다시 그려 붙임 (dirty rect), 바뀐 페이지만 다시 인코딩
+    · relayout: 줄 수가 바뀌거나 아이템 추가/삭제 → 정적 레이어는 그대로 두고 텍스트만 다시 배치
+    · full: 배경/타이틀/폰트가 바뀌었거나 캐시에 없음 (생성 후/재시작 후 첫 PATCH) → 전체 렌더+인코딩은
+      render_executor 워커에서 하고, 워커가 돌려준 렌더 상태 스냅샷(배경/정적 레이어/레이아웃/페이지,
+      폰트는 패밀리 경로만)을 그대로 캐시 → 다음 PATCH 부터 incremental (부모에서 다시 렌더하지 않음)
+- incremental/relayout 은 배율/단 수를 유지한다 (줄 수가 바뀌면 relayout 에서 다시 탐색)
+- 문서 파일은 MENU_DOC_MAX 개까지 보관. 생성 수를 세다가 넘으면 마지막 수정이 오래된 것부터
+  90% 까지 삭제 (매 생성마다 디렉터리를 훑지 않음)
+
+환경 변수:
+    MENU_DOC_CACHE_MAX   렌더 상태를 메모리에 유지할 문서 수 (기본 16)
+    MENU_DOC_MAX         data/menu_docs 에 보관할 문서 수 (기본 1000)
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from PIL import Image, ImageDraw
+from pydantic import BaseModel
+
+from . import font_service, image_encoding, menu_descriptions, menu_layout, menu_service, render_executor, tracing
+from .menu_service import MenuItem, MenuReq
+
+router = APIRouter()
+
+CACHE_MAX = int(os.getenv("MENU_DOC_CACHE_MAX", "16"))
+DOC_MAX = int(os.getenv("MENU_DOC_MAX", "1000"))
+
+DOC_DIR = os.path.join(menu_service.STORAGE_ROOT, "menu_docs")
+_DOC_ID = re.compile(r"^[0-9a-f]{12}$")
+
+
+class ItemPatch(BaseModel):
+    index: int
+    name: Optional[str] = None
+    price: Optional[int] = None
+    desc: Optional[str] = None
+
+
+class MenuPatch(BaseModel):
+    """생략한 필드는 저장된 값 유지. items 는 전체 교체, updates 는 인덱스별 부분 수정"""
+    shop_name: Optional[str] = None
+    theme: Optional[str] = None
+    title: Optional[str] = None
+    background_url: Optional[str] = None
+    font_styles: Optional[List[str]] = None
+    items: Optional[List[MenuItem]] = None
+    updates: Optional[List[ItemPatch]] = None
+    format: Optional[str] = None
+    preset: Optional[str] = None
+
+
+# ---------------------------------------------------------------
+# 문서 저장소
+# ---------------------------------------------------------------
+def _doc_path(doc_id: str) -> str:
+    return os.path.join(DOC_DIR, f"{doc_id}.json")
+
+
+def save(doc_id: str, spec: Dict[str, Any]):
+    os.makedirs(DOC_DIR, exist_ok=True)
+    tmp = f"{_doc_path(doc_id)}.{uuid.uuid4().hex[:6]}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(spec, f, ensure_ascii=False)
+    os.replace(tmp, _doc_path(doc_id))
+
+
+_doc_count: Optional[int] = None  # 대략의 문서 수 (첫 생성 때 한 번 세고 이후 증가만)
+_doc_count_lock = threading.Lock()
+
+
+def create(spec: Dict[str, Any]) -> str:
+    global _doc_count
+    doc_id = uuid.uuid4().hex[:12]
+    save(doc_id, spec)
+    with _doc_count_lock:
+        _doc_count = len(_doc_entries()) if _doc_count is None else _doc_count + 1
+        over = _doc_count > DOC_MAX
+    if over:
+        _prune_docs()
+    return doc_id
+
+
+def _doc_entries() -> List[os.DirEntry]:
+    try:
+        return [e for e in os.scandir(DOC_DIR) if e.is_file() and e.name.endswith(".json")]
+    except OSError:
+        return []
+
+
+def _prune_docs():
+    """mtime(마지막 저장) 오래된 순으로 DOC_MAX 의 90% 까지 삭제 + 렌더 상태도 버림"""
+    global _doc_count
+    entries = _doc_entries()
+    keep = max(1, DOC_MAX * 9 // 10)
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    removed = 0
+    for e in entries[:max(0, len(entries) - keep)]:
+        try:
+            os.remove(e.path)
+        except OSError:
+            continue
+        removed += 1
+        with _states_lock:
+            _states.pop(e.name[:-len(".json")], None)
+    with _doc_count_lock:
+        _doc_count = len(entries) - removed
+
+
+def load(doc_id: str) -> Optional[Dict[str, Any]]:
+    if not _DOC_ID.match(doc_id):
+        return None
+    try:
+        with open(_doc_path(doc_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def apply_patch(spec: Dict[str, Any], patch: MenuPatch) -> Dict[str, Any]:
+    new = dict(spec)
+    new.update(patch.model_dump(exclude_unset=True, exclude={"items", "updates", "format", "preset"}))
+    items = [dict(it) for it in spec.get("items", [])]
+    if patch.items is not None:
+        items = [it.model_dump() for it in patch.items]
+    for u in patch.updates or []:
+        if not 0 <= u.index < len(items):
+            raise ValueError(f"updates.index {u.index} 가 범위를 벗어났습니다 (0~{len(items) - 1}).")
+        items[u.index].update(u.model_dump(exclude_unset=True, exclude={"index"}))
+    new["items"] = items
+    return new
+
+
+# ---------------------------------------------------------------
+# 렌더 상태 캐시
+# ---------------------------------------------------------------
+@dataclass
+class _RenderState:
+    design: Tuple[Any, ...]          # 정적 레이어를 결정하는 값 (배경, 타이틀, 폰트 스타일)
+    background_url: Optional[str]
+    background: Image.Image
+    text_color: str
+    font_for: Callable[[str, int], Any]
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    plan: Optional[menu_layout.LayoutPlan] = None
+    static: Optional[Image.Image] = None
+    static_scale: Optional[float] = None
+    pages: List[Image.Image] = field(default_factory=list)
+    encoded: Dict[Tuple[int, str, str], image_encoding.Encoded] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_states: "OrderedDict[str, _RenderState]" = OrderedDict()
+_states_lock = threading.Lock()
+
+
+def _design_key(req: MenuReq) -> Tuple[Any, ...]:
+    return (req.background_url, menu_service.menu_title(req), tuple(req.font_styles or ()), req.theme)
+
+
+def _get_state(doc_id: str) -> Optional[_RenderState]:
+    with _states_lock:
+        state = _states.get(doc_id)
+        if state is not None:
+            _states.move_to_end(doc_id)
+        return state
+
+
+def _put_state(doc_id: str, state: _RenderState):
+    with _states_lock:
+        _states[doc_id] = state
+        _states.move_to_end(doc_id)
+        while len(_states) > CACHE_MAX:
+            _states.popitem(last=False)
+
+
+def cache_info() -> Dict[str, Any]:
+    with _states_lock:
+        return {"documents": len(_states), "max": CACHE_MAX}
+
+
+# ---------------------------------------------------------------
+# 렌더
+# ---------------------------------------------------------------
+def _build_static(state: _RenderState):
+    """배경 + 타이틀 (모든 페이지 공통) 을 미리 합성"""
+    static = state.background.copy()
+    first = state.plan.pages[0]
+    menu_layout.draw_layout(ImageDraw.Draw(static), first, state.text_color,
+                            runs=[r for r in first.runs if r.item < 0])
+    state.static, state.static_scale = static, state.plan.scale
+
+
+def _draw_pages(state: _RenderState):
+    if state.static is None or state.static_scale != state.plan.scale:
+        _build_static(state)
+    state.pages = []
+    for layout in state.plan.pages:
+        page = state.static.copy()
+        menu_layout.draw_layout(ImageDraw.Draw(page), layout, state.text_color,
+                                runs=[r for r in layout.runs if r.item >= 0])
+        state.pages.append(page)
+    state.encoded.clear()
+
+
+def _dirty_rect(state: _RenderState, block: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    """블록 영역 + 글리프가 삐져나올 여유 (획/받침이 줄 상자 밖으로 나가는 폭)"""
+    spec = state.plan.spec
+    pad_y, pad_x = spec.item_size // 2, spec.item_size // 4
+    w, h = state.static.size
+    x0, y0, x1, y1 = block
+    return max(0, x0 - pad_x), max(0, y0 - pad_y), min(w, x1 + pad_x), min(h, y1 + pad_y)
+
+
+def _repaint(state: _RenderState, page_no: int, rect: Tuple[int, int, int, int]):
+    """정적 레이어에서 rect 를 잘라 그 영역에 걸치는 아이템 run 을 모두 다시 그려 붙임 (잘린 부분은 자동 클리핑)"""
+    layout = state.plan.pages[page_no]
+    x0, y0, x1, y1 = rect
+    tile = state.static.crop(rect)
+    spec = state.plan.spec
+    runs = [r for r in layout.runs
+            if r.item >= 0 and r.y < y1 and r.y + 2 * spec.size(r.role) > y0]
+    menu_layout.draw_layout(ImageDraw.Draw(tile), layout, state.text_color, offset=(-x0, -y0), runs=runs)
+    state.pages[page_no].paste(tile, (x0, y0))
+    for key in [k for k in state.encoded if k[0] == page_no]:
+        del state.encoded[key]
+
+
+def render_snapshot(spec: Dict[str, Any], fmt: str, preset: str
+                    ) -> Tuple[List[image_encoding.Encoded], Dict[str, Any]]:
+    """
+    (render_executor 워커에서 실행) 전체 렌더 → (페이지 인코딩, 렌더 상태 스냅샷).
+    폰트 객체/폰트 함수는 넘기지 않고 고른 패밀리 경로만 넘김 → 부모가 restore_snapshot 으로 다시 붙임
+    """
+    req = MenuReq(**spec)
+    menu_service.normalize_items(req)
+    fonts = font_service.FontResolver()
+    background = menu_service.load_background(req.background_url)
+    state = _RenderState(_design_key(req), req.background_url, background,
+                         menu_service.get_text_color(background), menu_service.menu_font_for(req, fonts))
+    state.plan = menu_service.solve_menu_layout(req, state.font_for)
+    _draw_pages(state)
+    encoded = [image_encoding.encode(page, fmt, preset) for page in state.pages]
+    for layout in state.plan.pages:
+        layout.fonts = {}
+    return encoded, {
+        "design": state.design, "background_url": state.background_url, "background": state.background,
+        "text_color": state.text_color, "families": fonts.families, "plan": state.plan,
+        "static": state.static, "static_scale": state.static_scale, "pages": state.pages,
+        "items": [it.model_dump() for it in req.items],
+    }
+
+
+def restore_snapshot(req: MenuReq, snapshot: Dict[str, Any], encoded: List[image_encoding.Encoded],
+                     fmt: str, preset: str) -> _RenderState:
+    """워커 스냅샷 → 렌더 상태 (워커와 같은 패밀리로 폰트만 다시 연결, 방금 인코딩한 페이지도 캐시)"""
+    font_for = menu_service.menu_font_for(req, font_service.FontResolver(snapshot["families"]))
+    plan = snapshot["plan"]
+    for layout in plan.pages:
+        layout.fonts = {role: font_for(role, plan.spec.size(role)) for role in menu_layout.ROLES}
+    state = _RenderState(snapshot["design"], snapshot["background_url"], snapshot["background"],
+                         snapshot["text_color"], font_for, items=snapshot["items"], plan=plan,
+                         static=snapshot["static"], static_scale=snapshot["static_scale"], pages=snapshot["pages"])
+    state.encoded = {(no, fmt, preset): enc for no, enc in enumerate(encoded)}
+    return state
+
+
+@tracing.traced("render_document")
+def render_document(doc_id: str, spec: Dict[str, Any]) -> Tuple[Optional[_RenderState], Dict[str, Any]]:
+    """
+    (렌더 상태, 처리 정보). full 모드면 상태 None → 호출부가 render_executor 로 전체 렌더하고
+    돌려받은 스냅샷으로 상태를 채움
+    """
+    req = MenuReq(**spec)
+    menu_service.normalize_items(req)
+    items = [it.model_dump() for it in req.items]
+    state = _get_state(doc_id)
+
+    if state is None or state.design != _design_key(req):
+        return None, {"mode": "full"}
+
+    with state.lock:
+        changed = [i for i, (a, b) in enumerate(zip(state.items, items)) if a != b]
+        mode = "incremental" if len(items) == len(state.items) else "relayout"
+        if mode == "incremental" and not changed:
+            return state, {"mode": "unchanged", "dirty_items": []}
+
+        dirty = []
+        if mode == "incremental":
+            for i in changed:
+                hit = menu_layout.relayout_item(state.plan, i, req.items[i])
+                if hit is None:
+                    mode = "relayout"
+                    break
+                dirty.append((i,) + hit)
+        if mode == "relayout":
+            # 줄 수가 바뀜 → 배율/단 다시 탐색, 같은 배율이면 정적 레이어 재사용
+            state.plan = menu_service.solve_menu_layout(req, state.font_for)
+            _draw_pages(state)
+        else:
+            for _, page_no, block in dirty:
+                _repaint(state, page_no, _dirty_rect(state, block))
+        state.items = items
+
+    info = {"mode": mode, "dirty_items": [d[0] for d in dirty] if mode == "incremental" else changed}
+    return state, info
+
+
+def encode_pages(state: _RenderState, fmt: str, preset: str) -> List[image_encoding.Encoded]:
+    """
+    바뀐 페이지만 다시 인코딩 (워커), 나머지는 이전 결과 재사용.
+    같은 문서의 다른 PATCH 가 pages 를 고치거나 encoded 를 비우지 못하게 state.lock 을 잡고 실행
+    """
+    out = []
+    with state.lock:
+        for no, page in enumerate(state.pages):
+            key = (no, fmt, preset)
+            enc = state.encoded.get(key)
+            if enc is None:
+                enc = state.encoded[key] = render_executor.run(image_encoding.encode, page, fmt, preset)
+            out.append(enc)
+    return out
+
+
+# ---------------------------------------------------------------
+# API
+# ---------------------------------------------------------------
+@router.patch("/menu-board/{doc_id}", tags=["Image Generation"])
+def patch_menu_endpoint(doc_id: str, patch: MenuPatch, request: Request):
+    spec = load(doc_id)
+    if spec is None:
+        raise HTTPException(status_code=404, detail="메뉴 문서를 찾을 수 없습니다.")
+    fmt, preset = menu_service.negotiate_encoding(patch.format, patch.preset, request)
+    try:
+        spec = apply_patch(spec, patch)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    req = MenuReq(**spec)
+    descriptions = menu_descriptions.fill_descriptions([req]) if req.auto_desc else None
+
+    t0 = time.perf_counter()
+    try:
+        render_spec = req.model_dump(exclude={"format", "preset"})
+        state, info = render_document(doc_id, render_spec)
+        if state is None:
+            # full: 렌더 + 인코딩을 워커에서, 렌더 상태는 워커 결과로 채움
+            pages, snapshot = render_executor.run(render_executor.render_menu_document, render_spec, fmt, preset)
+            _put_state(doc_id, restore_snapshot(req, snapshot, pages, fmt, preset))
+            t2 = time.perf_counter()
+            encode_ms = sum(p.encode_ms for p in pages)
+            t1 = t2 - encode_ms / 1000
+        else:
+            t1 = time.perf_counter()
+            pages = encode_pages(state, fmt, preset)
+            t2 = time.perf_counter()
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"렌더링 실패: {e}")
+
+    save(doc_id, spec)
+    resp = menu_service.publish_pages(pages)
+    resp["document_id"] = doc_id
+    resp["descriptions"] = descriptions
+    resp["render"] = {**info, "render_ms": round((t1 - t0) * 1000, 1), "encode_ms": round((t2 - t1) * 1000, 1)}
+    return resp
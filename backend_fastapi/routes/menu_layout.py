@@ -0,0 +1,488 @@
+# backend_fastapi/routes/menu_layout.py
+"""
+메뉴판 텍스트 레이아웃 엔진
+
+- 글자별 advance 폭을 (폰트, 크기) 단위로 캐시 → 문자열 폭 = advance 합 (textbbox 재측정 없음)
+- 줄바꿈은 한 번 훑는 선형 알고리즘
+    · keep-all(기본): 띄어쓰기에서 우선 줄바꿈, 한 줄에 띄어쓰기가 없으면 한글 음절 단위로 줄바꿈
+    · break-all: 한글/CJK 음절 사이 어디서나 줄바꿈
+    · 금칙: 닫는 문장부호(, . ) 」 등)는 줄 머리에, 여는 괄호는 줄 끝에 오지 않음,
+      숫자와 단위(3,000원 / 2인분)는 떨어지지 않음
+- 타이틀/이름/가격/설명 위치를 그리기 전에 한 번에 계산 (MenuLayout) → draw_layout 으로 그리기
+- 아이템별 블록 영역(blocks)을 남겨 두어 한 아이템만 바뀌면 그 영역만 다시 배치 (relayout_item)
+- solve_layout: 아이템이 많으면 글자 크기/간격 배율을 이분 탐색해 맞추고, min_scale 로도 안 되면
+  다단 → 여러 페이지로 넘김. 탐색은 기준 크기 글자 폭을 비례 환산한 값으로만 계산 (래스터화 없음)
+
+PIL 외 의존성이 없어 scripts/bench_menu_layout.py 에서 단독으로 불러 쓸 수 있다.
+커닝은 무시하므로 실제 렌더 폭과 1px 안팎 차이가 날 수 있다.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from PIL import ImageDraw, ImageFont
+
+# 줄 머리에 올 수 없는 문자 (닫는 부호)
+NO_LINE_START = set(",.!?:;%)]}>·…~、。，．！？：；）」』】〉》〕’”ー")
+# 줄 끝에 올 수 없는 문자 (여는 부호/통화 기호)
+NO_LINE_END = set("([{<「『【〈《〔‘“₩$#")
+# 라틴 단어 안에서 이 문자 뒤는 줄바꿈 허용
+BREAK_AFTER = set("-/")
+
+
+def is_cjk(ch: str) -> bool:
+    """한글 음절/자모, 한자, 가나, 전각 문자"""
+    o = ord(ch)
+    return (
+        0xAC00 <= o <= 0xD7A3 or 0x1100 <= o <= 0x11FF or 0x3130 <= o <= 0x318F
+        or 0x3040 <= o <= 0x30FF or 0x3400 <= o <= 0x4DBF or 0x4E00 <= o <= 0x9FFF
+        or 0xF900 <= o <= 0xFAFF or 0xFF00 <= o <= 0xFFEF
+    )
+
+
+# ---------------------------------------------------------------
+# 글자 폭 캐시
+# ---------------------------------------------------------------
+class GlyphAdvances:
+    """폰트 하나(크기 고정)의 글자별 advance 폭"""
+    __slots__ = ("font", "size", "_adv")
+
+    def __init__(self, font: ImageFont.ImageFont):
+        self.font = font
+        self.size = int(getattr(font, "size", 10))
+        self._adv = {}
+
+    def advance(self, ch: str) -> float:
+        a = self._adv.get(ch)
+        if a is None:
+            a = self._adv[ch] = float(self.font.getlength(ch))
+        return a
+
+    def width(self, text: str) -> float:
+        adv = self._adv
+        total = 0.0
+        for ch in text:
+            a = adv.get(ch)
+            if a is None:
+                a = self.advance(ch)
+            total += a
+        return total
+
+
+class ScaledAdvances:
+    """기준 크기 GlyphAdvances 를 선형 비례로 다른 크기에 사용 (자동 맞춤 탐색용, 폰트 로드 없음)"""
+    __slots__ = ("base", "size", "_k")
+
+    def __init__(self, base: GlyphAdvances, size: int):
+        self.base = base
+        self.size = size
+        self._k = size / max(1, base.size)
+
+    def advance(self, ch: str) -> float:
+        return self.base.advance(ch) * self._k
+
+    def width(self, text: str) -> float:
+        return self.base.width(text) * self._k
+
+
+Metrics = Union[GlyphAdvances, ScaledAdvances]
+
+_ADVANCES_MAX = 256
+_advances: "OrderedDict[Tuple[Any, int], GlyphAdvances]" = OrderedDict()
+_advances_lock = threading.Lock()
+
+
+def advances_for(font: ImageFont.ImageFont) -> GlyphAdvances:
+    """(폰트 파일, 크기) 별 GlyphAdvances (font_service 의 face LRU 와 같은 키 단위)"""
+    path = getattr(font, "path", None)
+    key = (path if isinstance(path, str) else id(font), int(getattr(font, "size", 10)))
+    with _advances_lock:
+        cached = _advances.get(key)
+        if cached is not None:
+            _advances.move_to_end(key)
+            return cached
+        cached = _advances[key] = GlyphAdvances(font)
+        while len(_advances) > _ADVANCES_MAX:
+            _advances.popitem(last=False)
+        return cached
+
+
+def _metrics(font_or_metrics: Any) -> Metrics:
+    if isinstance(font_or_metrics, (GlyphAdvances, ScaledAdvances)):
+        return font_or_metrics
+    return advances_for(font_or_metrics)
+
+
+# ---------------------------------------------------------------
+# 줄바꿈
+# ---------------------------------------------------------------
+def _break_kind(prev: str, cur: str) -> int:
+    """prev 와 cur 사이 줄바꿈 가능 여부: 0=불가, 1=음절 경계, 2=띄어쓰기"""
+    if cur.isspace() or cur in NO_LINE_START or prev in NO_LINE_END:
+        return 0
+    if prev.isspace():
+        return 2
+    if prev.isdigit() and not cur.isdigit():
+        return 0  # 숫자 + 단위
+    if is_cjk(prev) or is_cjk(cur) or prev in BREAK_AFTER:
+        return 1
+    return 0
+
+
+def _break_paragraph(text: str, adv: Metrics, max_width: float, keep_all: bool, out: List[str]):
+    n = len(text)
+    start = 0
+    width = 0.0
+    space_at, space_w = -1, 0.0  # 마지막 띄어쓰기 경계와 그 지점까지의 폭
+    soft_at, soft_w = -1, 0.0    # 마지막 경계 (음절 포함)
+    for i in range(n):
+        ch = text[i]
+        if i > start:
+            kind = _break_kind(text[i - 1], ch)
+            if kind:
+                soft_at, soft_w = i, width
+                if kind == 2:
+                    space_at, space_w = i, width
+        a = adv.advance(ch)
+        while width + a > max_width and i > start and not ch.isspace():
+            if keep_all and space_at > start:
+                cut, cut_w = space_at, space_w
+            elif soft_at > start:
+                cut, cut_w = soft_at, soft_w
+            else:
+                cut, cut_w = i, width  # 경계가 없으면 강제 분리
+            out.append(text[start:cut].rstrip())
+            start = cut
+            width -= cut_w
+            if space_at > cut:
+                space_w -= cut_w
+            else:
+                space_at = -1
+            if soft_at > cut:
+                soft_w -= cut_w
+            else:
+                soft_at = -1
+        width += a
+    if start < n:
+        out.append(text[start:].rstrip())
+
+
+def break_lines(text: str, font: Any, max_width: float, word_break: str = "keep-all") -> List[str]:
+    """
+    text 를 max_width(px) 안에 들어가는 줄 목록으로. 연속 공백은 하나로, 줄바꿈 문자는 유지
+    font 는 PIL 폰트 또는 GlyphAdvances/ScaledAdvances
+    """
+    if not text:
+        return []
+    adv = _metrics(font)
+    lines: List[str] = []
+    for para in text.splitlines():
+        para = " ".join(para.split())
+        if not para:
+            continue
+        if max_width <= 0:
+            lines.append(para)
+            continue
+        _break_paragraph(para, adv, max_width, word_break != "break-all", lines)
+    return lines
+
+
+def text_width(text: str, font: Any) -> float:
+    return _metrics(font).width(text)
+
+
+# ---------------------------------------------------------------
+# 메뉴판 레이아웃
+# ---------------------------------------------------------------
+ROLES = ("title", "item", "desc")
+
+
+@dataclass
+class LayoutSpec:
+    """render_menu 기본값 (1080x1528, 78/44/30). 크기/세로 간격은 scaled() 로 함께 줄어듦"""
+    width: int = 1080
+    height: int = 1528
+    title_size: int = 78
+    item_size: int = 44
+    desc_size: int = 30
+    title_top: int = 110
+    items_top: int = 240
+    bottom_margin: int = 90
+    margin_x: int = 120
+    title_gap: int = 52       # 타이틀 마지막 줄 아래 ~ 첫 아이템
+    name_gap: int = 6         # 이름 줄 간격
+    desc_line_gap: int = 4
+    item_gap: int = 24
+    price_gap: int = 24       # 이름과 가격 사이 최소 간격
+    column_gap: int = 56
+    word_break: str = "keep-all"
+    # 자동 맞춤
+    min_scale: float = 0.6    # 이보다 작게는 줄이지 않고 다단/페이지로 넘김
+    max_columns: int = 2
+    max_pages: int = 10
+
+    def size(self, role: str) -> int:
+        return getattr(self, f"{role}_size")
+
+    def resized(self, factor: float) -> "LayoutSpec":
+        """페이지 전체를 factor 배로 (캔버스/여백 포함, 미리보기용). scaled() 는 글자/세로 간격만"""
+        if factor == 1.0:
+            return self
+        k = lambda v: max(1, int(round(v * factor)))
+        return replace(
+            self,
+            width=k(self.width), height=k(self.height),
+            title_size=k(self.title_size), item_size=k(self.item_size), desc_size=k(self.desc_size),
+            title_top=k(self.title_top), items_top=k(self.items_top), bottom_margin=k(self.bottom_margin),
+            margin_x=k(self.margin_x), title_gap=k(self.title_gap), name_gap=k(self.name_gap),
+            desc_line_gap=k(self.desc_line_gap), item_gap=k(self.item_gap), price_gap=k(self.price_gap),
+            column_gap=k(self.column_gap),
+        )
+
+    def scaled(self, scale: float) -> "LayoutSpec":
+        if scale == 1.0:
+            return self
+        k = lambda v: max(1, int(round(v * scale)))
+        return replace(
+            self,
+            title_size=k(self.title_size), item_size=k(self.item_size), desc_size=k(self.desc_size),
+            items_top=k(self.items_top), title_gap=k(self.title_gap), name_gap=k(self.name_gap),
+            desc_line_gap=k(self.desc_line_gap), item_gap=k(self.item_gap),
+        )
+
+
+@dataclass
+class TextRun:
+    x: int
+    y: int
+    text: str
+    role: str
+    item: int = -1            # 아이템 인덱스 (타이틀은 -1)
+
+
+@dataclass
+class MenuLayout:
+    """페이지 하나. fonts 는 그릴 때 쓰는 역할별 실제 폰트 (탐색 단계에서는 비어 있음)"""
+    width: int
+    height: int
+    limit: int                # 아이템이 내려갈 수 있는 최대 y
+    runs: List[TextRun] = field(default_factory=list)
+    bottom: int = 0           # 마지막 텍스트 아래 y
+    fonts: Dict[str, Any] = field(default_factory=dict)
+    blocks: Dict[int, Tuple[int, int, int, int]] = field(default_factory=dict)  # 아이템 → (x0, y0, x1, y1)
+
+    @property
+    def overflow(self) -> bool:
+        return self.bottom > self.limit
+
+
+@dataclass
+class LayoutPlan:
+    pages: List[MenuLayout]
+    scale: float
+    columns: int
+    attempts: int = 0         # 탐색 중 계산한 레이아웃 수 (래스터화 없음)
+    spec: Optional[LayoutSpec] = None  # 최종 배치에 쓴 (배율 적용된) spec
+
+    @property
+    def fits(self) -> bool:
+        return not any(p.overflow for p in self.pages)
+
+
+def format_price(price: Any) -> str:
+    return f"{price:,}원"
+
+
+def column_width(spec: LayoutSpec, columns: int) -> float:
+    content_w = spec.width - 2 * spec.margin_x
+    return (content_w - (columns - 1) * spec.column_gap) / columns
+
+
+def _item_block(it: Any, m: Dict[str, Metrics], spec: LayoutSpec, col_w: float) -> Tuple[List[TextRun], int]:
+    """아이템 하나를 (0, 0) 기준 상대 좌표로 배치하고 높이 반환"""
+    runs: List[TextRun] = []
+    y = 0
+    price_str = format_price(it.price)
+    price_w = m["item"].width(price_str)
+    runs.append(TextRun(int(col_w - price_w), 0, price_str, "item"))
+    name_w = max(spec.item_size, col_w - price_w - spec.price_gap)
+    for line in break_lines(it.name.strip(), m["item"], name_w, spec.word_break) or [""]:
+        if line:
+            runs.append(TextRun(0, y, line, "item"))
+        y += spec.item_size + spec.name_gap
+    if it.desc:
+        for line in break_lines(it.desc.strip(), m["desc"], col_w, spec.word_break):
+            runs.append(TextRun(0, y, line, "desc"))
+            y += spec.desc_size + spec.desc_line_gap
+    return runs, y
+
+
+def layout_pages(
+    title: str,
+    items: Iterable[Any],
+    m: Dict[str, Metrics],
+    spec: LayoutSpec,
+    columns: int = 1,
+    paginate: bool = False,
+) -> List[MenuLayout]:
+    """
+    m: 역할(title/item/desc)별 글자 폭. 아이템은 단(column)을 넘어 쪼개지 않음.
+    paginate=False 면 마지막 단에 계속 쌓아 overflow 로 표시, True 면 새 페이지 (타이틀 반복)
+    """
+    content_w = spec.width - 2 * spec.margin_x
+    col_w = column_width(spec, columns)
+    limit = spec.height - spec.bottom_margin
+
+    # 타이틀 (중앙 정렬, 넘치면 줄바꿈) — 모든 페이지 공통
+    title_runs: List[TextRun] = []
+    y = spec.title_top
+    for line in break_lines(title, m["title"], content_w, spec.word_break):
+        lw = m["title"].width(line)
+        title_runs.append(TextRun(int((spec.width - lw) // 2), y, line, "title"))
+        y += spec.title_size + spec.name_gap
+    top = max(spec.items_top, y - spec.name_gap + spec.title_gap)
+
+    def new_page() -> MenuLayout:
+        return MenuLayout(spec.width, spec.height, limit, runs=list(title_runs), bottom=top)
+
+    pages = [new_page()]
+    col, y = 0, top
+    for idx, it in enumerate(items):
+        runs, block_h = _item_block(it, m, spec, col_w)
+        if y > top and y + block_h > limit:
+            if col + 1 < columns:
+                col, y = col + 1, top
+            elif paginate:
+                pages.append(new_page())
+                col, y = 0, top
+        page = pages[-1]
+        x = spec.margin_x + int(col * (col_w + spec.column_gap))
+        page.runs.extend(TextRun(r.x + x, r.y + y, r.text, r.role, idx) for r in runs)
+        page.blocks[idx] = (x, y, x + int(col_w), y + block_h)
+        page.bottom = max(page.bottom, y + block_h)
+        y += block_h + spec.item_gap
+    return pages
+
+
+def layout_menu(
+    title: str,
+    items: Iterable[Any],
+    title_font: ImageFont.ImageFont,
+    item_font: ImageFont.ImageFont,
+    desc_font: ImageFont.ImageFont,
+    spec: Optional[LayoutSpec] = None,
+) -> MenuLayout:
+    """고정 크기 1단 1페이지 레이아웃 (넘치면 overflow). 폰트 크기는 각 폰트 객체 기준"""
+    fonts = {"title": title_font, "item": item_font, "desc": desc_font}
+    m = {role: advances_for(f) for role, f in fonts.items()}
+    spec = replace(spec or LayoutSpec(), **{f"{role}_size": m[role].size for role in ROLES})
+    page = layout_pages(title, items, m, spec)[0]
+    page.fonts = fonts
+    return page
+
+
+# ---------------------------------------------------------------
+# 자동 맞춤 (배율 이분 탐색 → 다단 → 페이지)
+# ---------------------------------------------------------------
+_SEARCH_PRECISION = 0.01
+
+
+def solve_layout(
+    title: str,
+    items: List[Any],
+    font_for: Callable[[str, int], ImageFont.ImageFont],
+    spec: Optional[LayoutSpec] = None,
+) -> LayoutPlan:
+    """
+    font_for(role, size) → PIL 폰트. 탐색은 기준 크기 글자 폭을 비례 환산한 값으로만 하고
+    (중간 시도는 폰트 로드/래스터화 없음), 정해진 크기로 실제 폰트를 한 번 받아 최종 배치한다.
+
+    순서: 1단에서 min_scale 까지 줄여 맞추기 → 2단, 3단... → 그래도 안 되면
+    min_scale 기준 필요한 페이지 수를 구하고 그 페이지 수 안에서 가장 큰 배율.
+    spec.max_pages 를 넘으면 ValueError (아이템을 버리지 않음).
+    """
+    spec = spec or LayoutSpec()
+    items = list(items)
+    base = {role: advances_for(font_for(role, spec.size(role))) for role in ROLES}
+    attempts = 0
+
+    def attempt(scale: float, columns: int, paginate: bool) -> List[MenuLayout]:
+        nonlocal attempts
+        attempts += 1
+        s = spec.scaled(scale)
+        m = {role: ScaledAdvances(base[role], s.size(role)) for role in ROLES}
+        return layout_pages(title, items, m, s, columns, paginate)
+
+    def fits(pages: List[MenuLayout], max_pages: int = 1) -> bool:
+        return len(pages) <= max_pages and not any(p.overflow for p in pages)
+
+    def search(columns: int, paginate: bool, max_pages: int) -> float:
+        """lo(맞음) ~ hi(안 맞음) 사이 이분 탐색"""
+        lo, hi = spec.min_scale, 1.0
+        while hi - lo > _SEARCH_PRECISION:
+            mid = (lo + hi) / 2
+            if fits(attempt(mid, columns, paginate), max_pages):
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+    scale, columns, paginate, max_pages = None, 1, False, 1
+    for columns in range(1, max(1, spec.max_columns) + 1):
+        if fits(attempt(1.0, columns, False)):
+            scale = 1.0
+            break
+        if fits(attempt(spec.min_scale, columns, False)):
+            scale = search(columns, False, 1)
+            break
+    if scale is None:
+        columns, paginate = max(1, spec.max_columns), True
+        max_pages = min(len(attempt(spec.min_scale, columns, True)), spec.max_pages)
+        scale = 1.0 if fits(attempt(1.0, columns, True), max_pages) else search(columns, True, max_pages)
+
+    # 최종: 실제 폰트/글자 폭으로 배치 (힌팅 등으로 넘치면 조금씩 줄여 재시도)
+    for _ in range(4):
+        s = spec.scaled(scale)
+        fonts = {role: font_for(role, s.size(role)) for role in ROLES}
+        m = {role: advances_for(f) for role, f in fonts.items()}
+        pages = layout_pages(title, items, m, s, columns, paginate)
+        attempts += 1
+        if fits(pages, max_pages) or scale <= spec.min_scale:
+            break
+        scale = max(spec.min_scale, scale - 0.02)
+    if len(pages) > spec.max_pages:
+        # 잘라 내면 아이템이 조용히 빠짐 → 호출부(라우트)에서 400 / 배치 항목 오류로
+        raise ValueError(f"메뉴가 최대 {spec.max_pages}페이지에 들어가지 않습니다 "
+                         f"(최소 배율로 {len(pages)}페이지 필요). 품목을 줄이거나 나눠서 만들어 주세요.")
+    for p in pages:
+        p.fonts = fonts
+    return LayoutPlan(pages, scale, columns, attempts, s)
+
+
+def relayout_item(plan: LayoutPlan, index: int, item: Any) -> Optional[Tuple[int, Tuple[int, int, int, int]]]:
+    """
+    아이템 하나만 같은 배율/단/폰트로 다시 배치해 plan 을 갱신 → (페이지, 블록 영역).
+    블록 높이가 바뀌면 아래 아이템이 밀리므로 갱신하지 않고 None (전체 재배치 필요)
+    """
+    for page_no, page in enumerate(plan.pages):
+        if index in page.blocks:
+            break
+    else:
+        return None
+    x0, y0, x1, y1 = page.blocks[index]
+    m = {role: advances_for(f) for role, f in page.fonts.items()}
+    runs, block_h = _item_block(item, m, plan.spec, column_width(plan.spec, plan.columns))
+    if block_h != y1 - y0:
+        return None
+    page.runs = [r for r in page.runs if r.item != index]
+    page.runs.extend(TextRun(r.x + x0, r.y + y0, r.text, r.role, index) for r in runs)
+    return page_no, page.blocks[index]
+
+
+def draw_layout(draw: ImageDraw.ImageDraw, layout: MenuLayout, fill: Any, offset: Tuple[int, int] = (0, 0),
+                runs: Optional[Iterable[TextRun]] = None):
+    """runs 를 주면 그 run 들만 (정적 레이어/부분 다시 그리기용)"""
+    ox, oy = offset
+    for run in layout.runs if runs is None else runs:
+        draw.text((run.x + ox, run.y + oy), run.text, font=layout.fonts[run.role], fill=fill)
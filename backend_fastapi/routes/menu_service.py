@@ -1,26 +1,40 @@
 # backend_fastapi/routes/menu_service.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel, Field
 from typing import List, Optional, Tuple, Dict, Any
 from PIL import Image, ImageDraw, ImageFont
-import os, io, requests, random, json, base64, numpy as np
+import os, io, requests, random, json, base64, time, threading, numpy as np
 import textwrap
+from collections import OrderedDict
 
 from openai import OpenAI
 
+from . import background_library, font_service, hedging, image_analysis, image_encoding, menu_descriptions, menu_layout, metrics, procedural_bg, render_executor, tracing
+
 # ──────────────────────────────────────────────────────────────────
 # 기본 설정
 # ──────────────────────────────────────────────────────────────────
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 router = APIRouter()
 
-# 폰트/경로
-FONT_CACHE: Dict[Tuple[str, int], ImageFont.FreeTypeFont] = {}
-GOOGLE_FONTS_API_KEY = os.getenv("GOOGLE_FONTS_API_KEY")
-GOOGLE_FONTS_LIST_CACHE: Optional[List[Dict[str, Any]]] = None
+# 폰트/경로 (다운로드/캐시는 font_service)
+FONT_DIR = font_service.FONT_DIR
+DEFAULT_FONT_REGULAR = font_service.DEFAULT_FONT_REGULAR
+
+# 배경 엔진 기본값: dalle(라이브러리 → DALL·E) | procedural(NumPy 즉시 생성) | auto(라이브러리 → procedural)
+MENU_BG_ENGINE = os.getenv("MENU_BG_ENGINE", "dalle").strip().lower()
+BG_ENGINES = ("dalle", "procedural", "auto")
+
+# 배경 폴백 체인 헤지: 지연 표본이 모이기 전 dall-e-3 를 기다리는 초 (이후엔 관측 p90)
+DALLE_HEDGE_DELAY = float(os.getenv("DALLE_HEDGE_DELAY", "30"))
+
+# 재디자인 비전 호출에 보내는 이미지: 긴 변(기본 1024 → gpt-4o-mini 타일 6 → 4개), JPEG 품질
+REDESIGN_VISION_EDGE = int(os.getenv("REDESIGN_VISION_EDGE", "1024"))
+REDESIGN_VISION_QUALITY = int(os.getenv("REDESIGN_VISION_QUALITY", "85"))
 
-FONT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "fonts"))
-DEFAULT_FONT_REGULAR = os.path.join(FONT_DIR, "NotoSansKR-Regular.ttf")
+# 편집 화면 미리보기: 렌더 배율(기본 0.4 → 432x611), 축소 배경 캐시 개수
+PREVIEW_SCALE = float(os.getenv("MENU_PREVIEW_SCALE", "0.4"))
+PREVIEW_BG_CACHE_MAX = int(os.getenv("MENU_PREVIEW_BG_CACHE", "8"))
 
 # 저장 루트: routes 기준 2단계 ↑ 의 data (main.py와 동일한 project_root/data)
 STORAGE_ROOT = os.getenv(
@@ -31,19 +45,25 @@ STORAGE_ROOT = os.getenv(
 # ──────────────────────────────────────────────────────────────────
 # Pydantic 모델
 # ──────────────────────────────────────────────────────────────────
+class MenuItem(BaseModel):
+    name: str
+    price: int
+    desc: Optional[str] = None
+
 class RedesignReq(BaseModel):
     target_image_url: str = Field(..., description="기존 메뉴판 이미지의 URL")
     redesign_request: str = Field(..., description="재디자인을 위한 컨셉 요청")
+    items: Optional[List[MenuItem]] = Field(None, description="메뉴를 직접 주면 비전 호출 없이 로컬 분석만으로 재디자인")
+    title: Optional[str] = Field(None, description="새 타이틀 (items 를 줄 때, 없으면 Menu)")
 
 class BgReq(BaseModel):
     size: Tuple[int, int] = (1080, 1528)
     design_keywords: Optional[List[str]] = Field(None)
     color_palette: Optional[List[str]] = Field(None)
-
-class MenuItem(BaseModel):
-    name: str
-    price: int
-    desc: Optional[str] = None
+    fresh: bool = Field(False, description="true 면 배경 라이브러리를 건너뛰고 새로 생성")
+    engine: Optional[str] = Field(None, description="dalle | procedural | auto (기본: MENU_BG_ENGINE, 없으면 dalle)")
+    format: Optional[str] = Field(None, description="png | webp | avif | jpeg (생략 시 Accept 헤더, 없으면 png)")
+    preset: Optional[str] = Field(None, description="fast | small (기본: IMAGE_ENCODE_PRESET)")
 
 class MenuReq(BaseModel):
     shop_name: Optional[str] = None
@@ -53,8 +73,15 @@ class MenuReq(BaseModel):
     font_styles: Optional[List[str]] = None
     items: List[MenuItem]
     auto_desc: Optional[bool] = False
+    language: Optional[str] = Field(None, description="auto_desc 설명 언어 (기본: MENU_DESC_LANGUAGE, 없으면 ko)")
     model: Optional[str] = "gpt-4o-mini"
     temperature: Optional[float] = 0.7
+    format: Optional[str] = Field(None, description="png | webp | avif | jpeg (생략 시 Accept 헤더, 없으면 png)")
+    preset: Optional[str] = Field(None, description="fast | small (기본: IMAGE_ENCODE_PRESET)")
+
+class MenuPreviewReq(MenuReq):
+    scale: Optional[float] = Field(None, description="미리보기 배율 0.2~1.0 (기본: MENU_PREVIEW_SCALE)")
+    page: int = Field(0, description="여러 페이지일 때 미리볼 페이지 (0부터)")
 
 # ──────────────────────────────────────────────────────────────────
 # 헬퍼
@@ -65,19 +92,35 @@ def _safe_open_image_from_bytes(b: bytes) -> Image.Image:
         img = img.convert("RGB")
     return img
 
-def get_base64_image(image_url: str) -> Optional[str]:
+@tracing.traced("fetch_target_image")
+def fetch_target_image(image_url: str, max_edge: int = REDESIGN_VISION_EDGE) -> Optional[Image.Image]:
+    """재디자인 대상 이미지 (긴 변 max_edge 이하로 축소 디코딩)"""
     try:
         r = requests.get(image_url, timeout=15)
         r.raise_for_status()
-        img = _safe_open_image_from_bytes(r.content)
-        buff = io.BytesIO()
-        img.save(buff, format="JPEG", quality=92)
-        return base64.b64encode(buff.getvalue()).decode("utf-8")
+        return image_analysis.open_image(r.content, max_edge)
     except Exception as e:
-        print(f"[get_base64_image] failed: {e}")
+        print(f"[fetch_target_image] failed: {e}")
         return None
 
-def gpt_analyze_and_design(base64_img: str, request_txt: str) -> dict:
+def vision_base64(img: Image.Image) -> str:
+    buff = io.BytesIO()
+    img.save(buff, format="JPEG", quality=REDESIGN_VISION_QUALITY)
+    return base64.b64encode(buff.getvalue()).decode("utf-8")
+
+def get_base64_image(image_url: str) -> Optional[str]:
+    img = fetch_target_image(image_url)
+    return vision_base64(img) if img is not None else None
+
+@tracing.traced("vision_analyze")
+def gpt_analyze_and_design(base64_img: str, request_txt: str,
+                           stats: Optional[image_analysis.ImageStats] = None) -> dict:
+    hints = ""
+    if stats is not None:
+        hints = f"""
+로컬 분석 결과 (기존 메뉴판): {json.dumps(stats.hints(), ensure_ascii=False)}
+- 색/스타일은 이 값을 기준으로 요청 컨셉에 맞게 조정하세요. 그대로 써도 되면 ColorPalette 는 생략 가능
+"""
     system_prompt = f"""
 당신은 메뉴판을 재디자인하는 전문 '아트 디렉터'입니다.
 아래 JSON 스키마를 반드시 따르세요.
@@ -88,22 +131,23 @@ def gpt_analyze_and_design(base64_img: str, request_txt: str) -> dict:
 - DesignKeywords: 3~5개 영어 키워드 (배경 스타일)
 - ColorPalette: 2~3개 HEX 색상 (예: ["#112233","#abcdef"])
 - FontStyles: 2개 스타일 설명 (예: ["붓글씨 제목체","고딕 본문체"])
-
+{hints}
 사용자 요청: "{request_txt}"
 """
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0.7,
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": [
-                    {"type": "text", "text": "메뉴판 이미지를 분석하고 재디자인 파라미터를 JSON으로 생성해줘."},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_img}"}}
-                ]}
-            ]
-        )
+        with metrics.upstream("openai", "gpt-4o-mini"):
+            resp = client.chat.completions.create(
+                model="gpt-4o-mini",
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": [
+                        {"type": "text", "text": "메뉴판 이미지를 분석하고 재디자인 파라미터를 JSON으로 생성해줘."},
+                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_img}"}}
+                    ]}
+                ]
+            )
         content = resp.choices[0].message.content
         return json.loads(content) if content else {}
     except Exception as e:
@@ -131,9 +175,23 @@ def _openai_image_to_pil(img_obj: Any, size: Tuple[int, int]) -> Optional[Image.
         return None
 
 def generate_dalle_background(keywords: List[str], colors: List[str], size: Tuple[int, int]) -> Optional[Image.Image]:
-    if not keywords or not colors:
-        return Image.new("RGB", size, "#F0F0F0")
-
+    # 최종 폴백: 절차적 배경 (키워드/팔레트 기반, 즉시 생성)
+    img = _dalle_background(keywords, colors, size) if keywords and colors else None
+    return img or procedural_background(keywords, colors, size)
+
+@tracing.traced("procedural_background")
+def procedural_background(keywords: List[str], colors: List[str], size: Tuple[int, int]) -> Image.Image:
+    return procedural_bg.render(keywords, colors, size)
+
+# 모델별 세로형 크기/품질 (dall-e-3 값은 gpt-image-1 에서 4xx)
+_IMAGE_MODEL_ARGS: Dict[str, Dict[str, str]] = {
+    "dall-e-3": {"size": "1024x1792", "quality": "standard"},
+    "gpt-image-1": {"size": "1024x1536", "quality": "medium"},
+}
+
+@tracing.traced("dalle_background")
+def _dalle_background(keywords: List[str], colors: List[str], size: Tuple[int, int]) -> Optional[Image.Image]:
+    """DALL·E 배경 (모든 모델 실패 시 None → 라이브러리에 저장하지 않음)"""
     prompt = (
         "A high-quality restaurant menu background. "
         f"Style keywords: {', '.join(keywords)}. "
@@ -141,117 +199,48 @@ def generate_dalle_background(keywords: List[str], colors: List[str], size: Tupl
         "Artistic, abstract, minimalist; lots of negative space; "
         "NO letters, NO text; pure background texture."
     )
-    # 1차: dall-e-3, 2차: gpt-image-1 폴백
-    for model_name in ("dall-e-3", "gpt-image-1"):
-        try:
-            resp = client.images.generate(
-                model=model_name,
-                prompt=prompt,
-                size="1024x1792",
-                quality="standard",
-                n=1
-            )
-            img = _openai_image_to_pil(resp.data[0], size)
-            if img is not None:
-                return img
-        except Exception as e:
-            print(f"[generate_dalle_background] {model_name} failed: {e}")
-
-    # 최종 폴백: 단색
-    return Image.new("RGB", size, "#F0F0F0")
-
-def _fallback_font(size: int) -> ImageFont.ImageFont:
+    def attempt(model_name: str):
+        def generate() -> Optional[Image.Image]:
+            with metrics.upstream("openai", model_name):
+                resp = client.images.generate(
+                    model=model_name,
+                    prompt=prompt,
+                    n=1,
+                    **_IMAGE_MODEL_ARGS[model_name]
+                )
+            return _openai_image_to_pil(resp.data[0], size)
+        return model_name, generate
+
+    # 1차: dall-e-3, 2차: gpt-image-1 (1차 실패 또는 관측 p90 초과 시 병렬 헤지)
     try:
-        return ImageFont.truetype(DEFAULT_FONT_REGULAR, size)
-    except Exception:
-        return ImageFont.load_default()
+        img, _ = hedging.call("menu_background", [attempt(m) for m in ("dall-e-3", "gpt-image-1")],
+                              default_delay=DALLE_HEDGE_DELAY)
+        return img
+    except Exception as e:
+        print(f"[generate_dalle_background] failed: {e}")
+        return None
 
-def get_google_font(style_desc: str, size: int) -> ImageFont.ImageFont:
+def get_google_font(style_desc: str, size: int, fonts: Optional[font_service.FontResolver] = None) -> ImageFont.ImageFont:
     """
     style_desc에 '명조','손글씨' 등의 한글 키워드가 들어오면
     Google Fonts category를 유추. 실패 시 폴백 폰트.
-    + 동일 (style_desc, size) 조합은 캐시.
+    + 같은 요청 안에서는 fonts(FontResolver)를 넘겨 스타일별 패밀리를 재사용.
     """
-    cache_key = (style_desc or "sans", size)
-    if cache_key in FONT_CACHE:
-        return FONT_CACHE[cache_key]
-
-    if not GOOGLE_FONTS_API_KEY:
-        f = _fallback_font(size)
-        FONT_CACHE[cache_key] = f
-        return f
-    try:
-        global GOOGLE_FONTS_LIST_CACHE
-        if not GOOGLE_FONTS_LIST_CACHE:
-            resp = requests.get(
-                f"https://www.googleapis.com/webfonts/v1/webfonts?key={GOOGLE_FONTS_API_KEY}&sort=popularity",
-                timeout=20
-            )
-            resp.raise_for_status()
-            GOOGLE_FONTS_LIST_CACHE = resp.json().get("items", [])
-
-        if "명조" in (style_desc or "") or "serif" in (style_desc or "").lower():
-            category = "serif"
-        elif "손글씨" in (style_desc or "") or "hand" in (style_desc or "").lower():
-            category = "handwriting"
-        else:
-            category = "sans-serif"
-
-        candidates = [f for f in GOOGLE_FONTS_LIST_CACHE
-                      if "korean" in f.get("subsets", []) and f.get("category") == category]
-
-        font_url = None
-        if candidates:
-            selected = random.choice(candidates)
-            if "files" in selected:
-                font_url = selected["files"].get("regular") or next(iter(selected["files"].values()), None)
-
-        if font_url:
-            f_res = requests.get(font_url, timeout=20)
-            f_res.raise_for_status()
-            font = ImageFont.truetype(io.BytesIO(f_res.content), size)
-        else:
-            font = _fallback_font(size)
-
-        FONT_CACHE[cache_key] = font
-        return font
-    except Exception as e:
-        print(f"[get_google_font] fallback due to: {e}")
-        f = _fallback_font(size)
-        FONT_CACHE[cache_key] = f
-        return f
+    return (fonts or font_service.FontResolver()).get(style_desc, size)
 
 def get_text_color(background: Image.Image) -> str:
     thumb = background.resize((48, 48)).convert("L")
     mean_val = float(np.array(thumb).mean())
     return "#333333" if mean_val > 128 else "#FFFFFF"
 
-def _textsize(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont) -> Tuple[int, int]:
-    bbox = draw.textbbox((0, 0), text, font=font)
-    w = bbox[2] - bbox[0]
-    h = bbox[3] - bbox[1]
-    return w, h
-
-def _wrap_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, max_width: int) -> List[str]:
-    if not text:
-        return []
-    # 대충 2~3회전으로 맞추기: 폭이 넘치면 단어 단위 wrap
-    words = text.split()
-    lines, cur = [], ""
-    for w in words:
-        test = (cur + " " + w).strip()
-        if _textsize(draw, test, font)[0] <= max_width:
-            cur = test
-        else:
-            if cur:
-                lines.append(cur)
-            cur = w
-    if cur:
-        lines.append(cur)
-    return lines
-
 def render_menu(req: MenuReq) -> Image.Image:
-    # 입력 방어
+    """첫 페이지만 (기존 호출부 호환)"""
+    return render_menu_pages(req)[0]
+
+MENU_SIZE = (1080, 1528)
+
+def normalize_items(req: MenuReq):
+    """입력 방어: 빈 목록 거부, 가격 문자열 → int"""
     if not req.items or len(req.items) == 0:
         raise ValueError("items가 비어 있습니다.")
     for it in req.items:
@@ -261,65 +250,143 @@ def render_menu(req: MenuReq) -> Image.Image:
             except Exception:
                 it.price = 0
 
-    w, h = 1080, 1528
-
-    # 배경 준비
-    if req.background_url:
+def load_background(url: Optional[str], size: Tuple[int, int] = MENU_SIZE) -> Image.Image:
+    """배경 URL → 메뉴판 크기 RGB 캔버스 (없거나 실패하면 흰 배경)"""
+    w, h = size
+    if url:
         try:
-            r = requests.get(req.background_url, timeout=15)
-            r.raise_for_status()
-            bg = _safe_open_image_from_bytes(r.content)
-            canvas = bg.resize((w, h), Image.Resampling.LANCZOS).convert("RGB")
+            with tracing.span("background_download"):
+                r = requests.get(url, timeout=15)
+                r.raise_for_status()
+                bg = _safe_open_image_from_bytes(r.content)
+            return bg.resize((w, h), Image.Resampling.LANCZOS).convert("RGB")
         except Exception as e:
             print(f"[render_menu] background load failed: {e}")
-            canvas = Image.new("RGB", (w, h), (255, 255, 255))
-    else:
-        canvas = Image.new("RGB", (w, h), (255, 255, 255))
+    return Image.new("RGB", (w, h), (255, 255, 255))
 
-    draw = ImageDraw.Draw(canvas)
-    text_color = get_text_color(canvas)
+def menu_title(req: MenuReq) -> str:
+    return req.title or req.shop_name or "Menu"
 
-    # 폰트
-    final_title = req.title or req.shop_name or "Menu"
+def menu_font_styles(req: MenuReq) -> Dict[str, str]:
+    """역할(title/item/desc) → 폰트 스타일 설명"""
     title_font_style = req.font_styles[0] if req.font_styles else (req.theme or "고딕")
     item_font_style  = req.font_styles[1] if (req.font_styles and len(req.font_styles) > 1) else (req.theme or "고딕")
+    return {"title": title_font_style, "item": item_font_style, "desc": item_font_style}
+
+def menu_font_for(req: MenuReq, fonts: Optional[font_service.FontResolver] = None):
+    """(role, size) → 폰트. 스타일별 패밀리는 fonts(FontResolver) 에서 1회 선택, 크기만 바꿔 재사용"""
+    role_styles = menu_font_styles(req)
+    fonts = fonts or font_service.FontResolver()
+    return lambda role, size: get_google_font(role_styles[role], size, fonts)
+
+def solve_menu_layout(req: MenuReq, font_for, scale: float = 1.0) -> menu_layout.LayoutPlan:
+    """타이틀/이름/가격/설명 위치를 먼저 계산 (배율/단/페이지 탐색은 글자 폭 계산만). scale 은 페이지 전체 배율"""
+    w, h = MENU_SIZE
+    with tracing.span("layout", items=len(req.items)) as sp:
+        plan = menu_layout.solve_layout(menu_title(req), req.items, font_for,
+                                        menu_layout.LayoutSpec(width=w, height=h).resized(scale))
+        if sp is not None:
+            sp.set(scale=round(plan.scale, 3), columns=plan.columns, pages=len(plan.pages), attempts=plan.attempts)
+    return plan
+
+@tracing.traced("render")
+def render_menu_pages(req: MenuReq, canvas: Optional[Image.Image] = None,
+                      fonts: Optional[font_service.FontResolver] = None, scale: float = 1.0) -> List[Image.Image]:
+    """
+    아이템이 많으면 글자 크기를 줄이고, 그래도 넘치면 2단 → 여러 페이지로 나눠 렌더.
+    canvas(이미 받아 둔 배경) / fonts(패밀리 선택을 공유할 해석기) 는 배치 렌더/미리보기용,
+    scale 은 미리보기용 페이지 배율 (canvas 도 그 크기여야 함)
+    """
+    normalize_items(req)
+    canvas = load_background(req.background_url) if canvas is None else canvas
+    text_color = get_text_color(canvas)
+    plan = solve_menu_layout(req, menu_font_for(req, fonts), scale)
+
+    pages = []
+    for layout in plan.pages:
+        page = canvas.copy() if len(plan.pages) > 1 else canvas
+        menu_layout.draw_layout(ImageDraw.Draw(page), layout, text_color)
+        pages.append(page)
+    return pages
+
+# 미리보기: 요청마다 배경을 다시 받지 않도록 축소 배경 캐시, 스타일별 폰트 패밀리도 고정
+_preview_backgrounds: "OrderedDict[Tuple[Optional[str], Tuple[int, int]], Image.Image]" = OrderedDict()
+_preview_lock = threading.Lock()
+_preview_fonts = font_service.FontResolver()
+
+def _preview_background(url: Optional[str], size: Tuple[int, int]) -> Image.Image:
+    key = (url, size)
+    with _preview_lock:
+        cached = _preview_backgrounds.get(key)
+        if cached is not None:
+            _preview_backgrounds.move_to_end(key)
+    metrics.cache_event("menu_preview_bg", cached is not None)
+    if cached is None:
+        cached = load_background(url, size)
+        with _preview_lock:
+            _preview_backgrounds[key] = cached
+            while len(_preview_backgrounds) > PREVIEW_BG_CACHE_MAX:
+                _preview_backgrounds.popitem(last=False)
+    return cached.copy()
+
+@tracing.traced("render_preview")
+def render_menu_preview(req: MenuReq, scale: float = PREVIEW_SCALE) -> List[Image.Image]:
+    """편집 화면용 저해상도 렌더 (캐시된 배경/폰트, 디스크 저장 없음)"""
+    w, h = MENU_SIZE
+    canvas = _preview_background(req.background_url, (max(1, round(w * scale)), max(1, round(h * scale))))
+    return render_menu_pages(req, canvas, _preview_fonts, scale)
+
+def _write_output(path: str, data: bytes, kind: str):
+    with open(path, "wb") as f:
+        f.write(data)
+    metrics.output_written(kind, path, len(data))
+
+def _save_extra_pages(pages: List[image_encoding.Encoded], first_name: str, storage: str) -> List[str]:
+    """menu_123456.png → menu_123456_p2.png, _p3 ... 파일명 목록"""
+    stem = os.path.splitext(first_name)[0]
+    names = []
+    for i, enc in enumerate(pages, start=2):
+        name = f"{stem}_p{i}.{enc.ext}"
+        _write_output(os.path.join(storage, name), enc.data, "menu_board")
+        names.append(name)
+    return names
+
+def publish_pages(pages: List[image_encoding.Encoded]) -> Dict[str, Any]:
+    """인코딩된 페이지를 outputs 에 저장 → 응답 필드 (url, page_urls, encoding ...)"""
+    storage = os.path.join(STORAGE_ROOT, "outputs")
+    os.makedirs(storage, exist_ok=True)
 
-    title_font = get_google_font(title_font_style, 78)
-    item_font  = get_google_font(item_font_style, 44)
-    desc_font  = get_google_font(item_font_style, 30)
-
-    # 타이틀 (중앙 정렬)
-    title_w, title_h = _textsize(draw, final_title, title_font)
-    draw.text(((w - title_w) // 2, 110), final_title, font=title_font, fill=text_color)
-
-    # 아이템 리스트
-    y = 240
-    left_x = 120
-    right_margin = 120
-    line_gap = 24
-    desc_max_width = w - left_x - right_margin
-
-    for it in req.items:
-        name = it.name.strip()
-        price_str = f"{it.price:,}원"
-
-        # 좌측 이름
-        draw.text((left_x, y), name, font=item_font, fill=text_color)
-
-        # 우측 가격 (오른쪽 정렬)
-        price_w, price_h = _textsize(draw, price_str, item_font)
-        draw.text((w - right_margin - price_w, y), price_str, font=item_font, fill=text_color)
-        y += max(price_h, 44) + 6
+    fname = f"menu_{random.randint(0, 999999):06}.{pages[0].ext}"
+    output_path = os.path.join(storage, fname)
+    try:
+        _write_output(output_path, pages[0].data, "menu_board")
+        extra = _save_extra_pages(pages[1:], fname, storage)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"이미지 저장 실패: {e}")
 
-        # 설명 (존재 시 줄바꿈)
-        if it.desc:
-            for line in _wrap_text(draw, it.desc.strip(), desc_font, desc_max_width):
-                draw.text((left_x, y), line, font=desc_font, fill=text_color)
-                y += _textsize(draw, line, desc_font)[1] + 4
+    base_url = os.getenv("BACKEND_PUBLIC_URL", "https://hidden-leaf-village.onrender.com")
+    public_url = f"{base_url}/static/outputs/{fname}"
+    page_urls = [public_url] + [f"{base_url}/static/outputs/{n}" for n in extra]
+    encoding = image_encoding.report(pages[0], "menu_board")
+    for page in pages[1:]:
+        image_encoding.report(page, "menu_board")
 
-        y += line_gap
+    return {
+        "ok": True,
+        "url": public_url,                 # 기존 키 유지
+        "image_url": public_url,           # 프론트가 이 키를 볼 가능성이 큼
+        "path": f"/static/outputs/{fname}",# 디버깅/로깅용(선택)
+        "filename": fname,
+        "page_urls": page_urls,            # 전체 페이지 (아이템이 많으면 2장 이상, 첫 장 = url)
+        "encoding": encoding,              # 첫 장 인코딩 {format, preset, bytes, encode_ms}
+    }
 
-    return canvas
+def negotiate_encoding(fmt: Optional[str], preset: Optional[str], request: Request) -> Tuple[str, str]:
+    """format 필드 > Accept 헤더 > png. 지원하지 않는 값은 400"""
+    try:
+        return image_encoding.negotiate(fmt, request.headers.get("accept"), preset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # ──────────────────────────────────────────────────────────────────
 # API
@@ -328,13 +395,27 @@ def render_menu(req: MenuReq) -> Image.Image:
 def redesign_menu_board_endpoint(req: RedesignReq):
     base_url = os.getenv("BACKEND_PUBLIC_URL", "https://hidden-leaf-village.onrender.com")
 
-    base64_img = get_base64_image(req.target_image_url)
-    if not base64_img:
+    target = fetch_target_image(req.target_image_url)
+    if target is None:
         raise HTTPException(status_code=400, detail="이미지 URL 로드 실패")
-
-    design_data = gpt_analyze_and_design(base64_img, req.redesign_request)
-    if not design_data or "MenuItems" not in design_data:
-        raise HTTPException(status_code=500, detail="AI 이미지 분석 실패")
+    with tracing.span("local_analyze"):
+        stats = image_analysis.analyze(target)
+
+    if req.items:
+        # 메뉴를 이미 알고 있으면 비전 호출 없이 로컬 팔레트/스타일로 바로 진행
+        design_data = {
+            "MenuItems": [it.model_dump() for it in req.items],
+            "NewTitle": req.title,
+            "DesignKeywords": [req.redesign_request] + stats.keywords,
+            "ColorPalette": stats.palette[:3],
+            "FontStyles": [],
+        }
+    else:
+        design_data = gpt_analyze_and_design(vision_base64(target), req.redesign_request, stats)
+        if not design_data or "MenuItems" not in design_data:
+            raise HTTPException(status_code=500, detail="AI 이미지 분석 실패")
+        design_data["DesignKeywords"] = design_data.get("DesignKeywords") or stats.keywords
+        design_data["ColorPalette"] = design_data.get("ColorPalette") or stats.palette[:3]
 
     try:
         # 1) 배경 생성
@@ -342,8 +423,9 @@ def redesign_menu_board_endpoint(req: RedesignReq):
             "design_keywords": design_data.get("DesignKeywords", []),
             "color_palette": design_data.get("ColorPalette", []),
         }
-        bg_resp = requests.post(f"{base_url}/generate/menu-background", json=bg_req_data, timeout=60)
-        bg_resp.raise_for_status()
+        with tracing.span("self_call.menu_background"):
+            bg_resp = requests.post(f"{base_url}/generate/menu-background", json=bg_req_data, timeout=60)
+            bg_resp.raise_for_status()
         new_bg_url = bg_resp.json().get("background_url")
 
         # 2) 메뉴 보드 생성
@@ -354,74 +436,111 @@ def redesign_menu_board_endpoint(req: RedesignReq):
             "background_url": new_bg_url,
             "font_styles": design_data.get("FontStyles", []),
         }
-        board_resp = requests.post(f"{base_url}/generate/menu-board", json=menu_req_data, timeout=60)
-        board_resp.raise_for_status()
-        return board_resp.json()
+        if req.items:
+            menu_req_data["theme"] = req.redesign_request  # FontStyles 대신 요청 문구로 폰트/설명 톤
+        with tracing.span("self_call.menu_board"):
+            board_resp = requests.post(f"{base_url}/generate/menu-board", json=menu_req_data, timeout=60)
+            board_resp.raise_for_status()
+        resp = board_resp.json()
+        resp["analysis"] = {**stats.hints(), "vision": not req.items}
+        return resp
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"재디자인 중 오류 발생: {e}")
 
 @router.post("/menu-background", tags=["Image Generation"])
-def make_menu_background_endpoint(req: BgReq):
-    img = generate_dalle_background(req.design_keywords or [], req.color_palette or [], req.size)
-    if not img:
-        raise HTTPException(status_code=500, detail="AI 배경 생성 실패")
-
+def make_menu_background_endpoint(req: BgReq, request: Request):
+    keywords, colors = req.design_keywords or [], req.color_palette or []
+    engine = (req.engine or MENU_BG_ENGINE).strip().lower()
+    if engine not in BG_ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine 은 {', '.join(BG_ENGINES)} 중 하나여야 합니다.")
+    fmt, preset = negotiate_encoding(req.format, req.preset, request)
     storage = os.path.join(STORAGE_ROOT, "outputs")
     os.makedirs(storage, exist_ok=True)
-
-    fname = f"bg_{random.randint(0, 999999):06}.png"
-    img.save(os.path.join(storage, fname), "PNG", optimize=True)
-
+    fname = f"bg_{random.randint(0, 999999):06}.{image_encoding.EXTENSIONS[fmt]}"
     base_url = os.getenv("BACKEND_PUBLIC_URL", "https://hidden-leaf-village.onrender.com")
-    return {"ok": True, "background_url": f"{base_url}/static/outputs/{fname}"}
-
-@router.post("/menu-board", tags=["Image Generation"])
-def generate_menu_endpoint(req: MenuReq):
-    try:
-        img = render_menu(req)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"렌더링 실패: {e}")
-
-    storage = os.path.join(STORAGE_ROOT, "outputs")
-    os.makedirs(storage, exist_ok=True)
 
-    fname = f"menu_{random.randint(0, 999999):06}.png"
-    output_path = os.path.join(storage, fname)
-    try:
-        img.save(output_path, "PNG", optimize=True)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"이미지 저장 실패: {e}")
+    # 1) 라이브러리 (정확/근사 매칭) → DALL·E 호출 없이 바로 반환 (라이브러리는 PNG, 다른 포맷이면 변환)
+    if engine != "procedural" and not req.fresh and keywords and colors:
+        with tracing.span("bg_library_lookup"):
+            found = background_library.lookup(keywords, colors, req.size)
+        if found:
+            entry, match = found
+            encoding = None
+            if fmt == "png":
+                background_library.publish(entry, storage, fname)
+            else:
+                with open(background_library.file_path(entry), "rb") as f:
+                    enc = render_executor.run(image_encoding.transcode, f.read(), fmt, preset)
+                _write_output(os.path.join(storage, fname), enc.data, "menu_background")
+                encoding = image_encoding.report(enc, "menu_background")
+            return {"ok": True, "background_url": f"{base_url}/static/outputs/{fname}",
+                    "source": f"library_{match}", "library_id": entry["id"], "encoding": encoding}
+
+    # 2) DALL·E 생성 → 라이브러리에 저장 (procedural/auto 이거나 실패 시 절차적 배경)
+    img = _dalle_background(keywords, colors, req.size) if engine == "dalle" and keywords and colors else None
+    source = "dalle"
+    entry = None
+    if img is None:
+        source = "procedural" if engine != "dalle" else "fallback_procedural"
+        enc = render_executor.run(render_executor.procedural_image, keywords, colors, tuple(req.size), fmt, preset)
+    else:
+        # 라이브러리 원본은 재사용되므로 PNG small 로 한 번만 인코딩
+        png = render_executor.run(image_encoding.encode, img, "png", "small")
+        entry = background_library.store(img, keywords, colors, req.size, data=png.data)
+        enc = png if fmt == "png" else render_executor.run(image_encoding.encode, img, fmt, preset)
+
+    if entry and fmt == "png":
+        background_library.publish(entry, storage, fname)
+        metrics.output_written("menu_background", os.path.join(storage, fname))
+    else:
+        _write_output(os.path.join(storage, fname), enc.data, "menu_background")
 
-    base_url = os.getenv("BACKEND_PUBLIC_URL", "https://hidden-leaf-village.onrender.com")
-    public_url = f"{base_url}/static/outputs/{fname}"
-    return {"ok": True, "url": public_url}
+    return {"ok": True, "background_url": f"{base_url}/static/outputs/{fname}",
+            "source": source, "library_id": entry["id"] if entry else None,
+            "encoding": image_encoding.report(enc, "menu_background")}
 
 @router.post("/menu-board", tags=["Image Generation"])
-def generate_menu_endpoint(req: MenuReq):
+def generate_menu_endpoint(req: MenuReq, request: Request):
+    fmt, preset = negotiate_encoding(req.format, req.preset, request)
+    # 문서에는 생성 설명을 넣기 전 스펙을 저장 (이름이 바뀌면 설명도 다시 생성되도록)
+    spec = req.model_dump(exclude={"format", "preset"})
+    descriptions = menu_descriptions.fill_descriptions([req]) if req.auto_desc else None
     try:
-        img = render_menu(req)
+        # 렌더 + 인코딩은 워커 프로세스에서 (요청 스레드는 GIL 을 잡지 않음)
+        pages = render_executor.run(render_executor.render_menu_image, req.model_dump(), fmt, preset)
+    except ValueError as e:  # 빈 items, max_pages 초과 등
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"렌더링 실패: {e}")
 
-    storage = os.path.join(STORAGE_ROOT, "outputs")
-    os.makedirs(storage, exist_ok=True)
+    resp = publish_pages(pages)
+    # 이후 가격/품목만 바꿀 때 PATCH /menu-board/{document_id} 로 부분 렌더
+    from . import menu_documents
+    resp["document_id"] = menu_documents.create(spec)
+    resp["descriptions"] = descriptions
+    return resp
 
-    fname = f"menu_{random.randint(0, 999999):06}.png"
-    output_path = os.path.join(storage, fname)
+@router.post("/menu-board/preview", tags=["Image Generation"])
+def preview_menu_endpoint(req: MenuPreviewReq):
+    """
+    편집 중 미리보기: 축소 렌더 → JPEG 바이트를 바로 반환 (파일 저장/문서 생성/LLM 호출 없음).
+    auto_desc 는 이미 캐시된 설명만 붙임. 저장은 /menu-board 로
+    """
+    scale = min(1.0, max(0.2, req.scale or PREVIEW_SCALE))
+    t0 = time.perf_counter()
+    if req.auto_desc:
+        menu_descriptions.fill_descriptions([req], generate=False)
     try:
-        img.save(output_path, "PNG", optimize=True)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"이미지 저장 실패: {e}")
-
-    base_url = os.getenv("BACKEND_PUBLIC_URL", "https://hidden-leaf-village.onrender.com")
-    public_url = f"{base_url}/static/outputs/{fname}"
-
-    return {
-        "ok": True,
-        "url": public_url,                 # 기존 키 유지
-        "image_url": public_url,           # 프론트가 이 키를 볼 가능성이 큼
-        "path": f"/static/outputs/{fname}",# 디버깅/로깅용(선택)
-        "filename": fname                  
-    }
-
-
+        pages = render_menu_preview(req, scale)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    t1 = time.perf_counter()
+    page = pages[min(max(0, req.page), len(pages) - 1)]
+    enc = image_encoding.encode(page, "jpeg", "fast")
+    image_encoding.report(enc, "menu_preview")
+    return Response(content=enc.data, media_type=enc.media_type, headers={
+        "Cache-Control": "no-store",
+        "X-Preview-Pages": str(len(pages)),
+        "X-Render-Ms": f"{(t1 - t0) * 1000:.1f}",
+        "X-Encode-Ms": f"{enc.encode_ms:.1f}",
+    })
@@ -0,0 +1,430 @@
+# backend_fastapi/routes/menu_vector.py
+"""
+메뉴판 벡터 출력 (POST /menu-board/vector) — 인쇄소용 SVG / PDF
+
+1080x1528 PNG 는 인쇄하기엔 작고, A4/A3/포스터마다 래스터를 다시 렌더해 늘리면 글자가 뭉개진다.
+- 레이아웃은 render_menu 와 같은 solve_menu_layout 으로 한 번만 계산 (픽셀 좌표, 1080x1528 기준)
+- 글자는 벡터: 사용한 글자만 남긴 폰트 서브셋을 파일에 내장 (SVG 는 @font-face WOFF, PDF 는 Type0/Identity-H)
+- 배경은 JPEG 한 장으로 한 번만 내장 (배경이 없으면 흰 바탕, 래스터 없음)
+- 용지 크기는 좌표 변환만 다름 → 같은 본문/폰트/배경을 용지마다 감싸기만 함 (다시 렌더하지 않음).
+  A 계열 비율(1:1.414)이 메뉴판 비율과 같아 A4~A1 은 여백 없이 맞고, 나머지는 가운데 맞춤
+
+폰트 서브셋에는 fontTools 가 필요하다 (없으면 503).
+
+환경 변수:
+    MENU_VECTOR_BG_QUALITY   내장 배경 JPEG 품질 (기본 90)
+"""
+import base64
+import hashlib
+import io
+import os
+import random
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+from xml.sax.saxutils import escape
+
+from fastapi import APIRouter, HTTPException
+from pydantic import Field
+from PIL import Image, ImageColor
+
+from . import font_service, menu_descriptions, menu_layout, menu_service, metrics, render_executor
+from .menu_service import MenuReq
+
+try:
+    from fontTools import subset as ft_subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    ft_subset = TTFont = None
+
+router = APIRouter()
+
+BG_QUALITY = int(os.getenv("MENU_VECTOR_BG_QUALITY", "90"))
+FORMATS = ("svg", "pdf")
+MEDIA_TYPES = {"svg": "image/svg+xml", "pdf": "application/pdf"}
+
+# 용지 (가로 mm, 세로 mm). poster = 24x36 인치
+PAPER_SIZES_MM: Dict[str, Tuple[float, float]] = {
+    "a5": (148, 210), "a4": (210, 297), "a3": (297, 420),
+    "a2": (420, 594), "a1": (594, 841), "poster": (609.6, 914.4),
+}
+_PT_PER_MM = 72 / 25.4
+
+
+class MenuVectorReq(MenuReq):
+    output: str = Field("pdf", description="pdf | svg")
+    papers: List[str] = Field(default_factory=lambda: ["a4"],
+                              description=f"용지 크기 ({', '.join(PAPER_SIZES_MM)}). 레이아웃은 한 번만 계산")
+
+
+@dataclass
+class FontSubset:
+    """폰트 파일 하나의 서브셋 (PDF 는 sfnt, SVG 는 woff)"""
+    name: str                                # 문서 안 이름 (F0, F1 ...)
+    base_font: str                           # PDF BaseFont (서브셋 태그 포함)
+    sfnt: bytes
+    woff: bytes
+    cff: bool                                # CFF 아웃라인 (OTF) 이면 True
+    gids: Dict[str, int]                     # 글자 → 서브셋 glyph id
+    widths: Dict[int, int]                   # glyph id → advance (1000 단위)
+    ascent: int
+    descent: int
+    bbox: Tuple[int, int, int, int]
+
+
+@dataclass
+class VectorRun:
+    x: float
+    baseline: float
+    text: str
+    font: str                                # FontSubset.name
+    size: int
+
+
+@dataclass
+class VectorMenu:
+    """한 번 배치한 메뉴판 (픽셀 좌표). 용지/포맷별 출력은 이것만으로 만든다"""
+    width: int
+    height: int
+    pages: List[List[VectorRun]]
+    fonts: Dict[str, FontSubset]
+    text_color: Tuple[int, int, int]
+    background: Optional[bytes] = None       # JPEG
+    background_size: Tuple[int, int] = (0, 0)
+    _svg_bodies: Dict[int, str] = field(default_factory=dict)
+
+
+# ---------------------------------------------------------------
+# 폰트 서브셋
+# ---------------------------------------------------------------
+def _font_source(font: Any) -> Tuple[Any, bytes]:
+    """PIL 폰트 → (식별 키, 폰트 파일 바이트). 비트맵 기본 폰트는 내장 불가"""
+    path = getattr(font, "path", None)
+    if isinstance(path, str):
+        with open(path, "rb") as f:
+            return (path, getattr(font, "index", 0)), f.read()
+    if hasattr(path, "getvalue"):
+        data = path.getvalue()
+        return (hashlib.sha1(data).hexdigest(), getattr(font, "index", 0)), data
+    raise ValueError("벡터 출력에 쓸 수 있는 폰트 파일이 없습니다 (TrueType/OpenType 필요).")
+
+
+def _subset_tag(chars: str) -> str:
+    digest = hashlib.md5(chars.encode("utf-8")).digest()
+    return "".join(chr(ord("A") + b % 26) for b in digest[:6])
+
+
+def subset_font(name: str, data: bytes, index: int, chars: str) -> FontSubset:
+    options = ft_subset.Options()
+    options.layout_features = []             # 레이아웃은 이미 계산됨 (커닝/합자 없음)
+    options.hinting = False
+    options.notdef_outline = True
+    options.name_IDs = [1, 2, 6]
+    options.name_languages = ["*"]
+    font = TTFont(io.BytesIO(data), fontNumber=index, lazy=False)
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(text=chars)
+    subsetter.subset(font)
+
+    cmap = font.getBestCmap() or {}
+    upm = font["head"].unitsPerEm
+    k = 1000 / upm
+    gids = {ch: font.getGlyphID(cmap[ord(ch)]) if ord(ch) in cmap else 0 for ch in chars}
+    hmtx = font["hmtx"]
+    widths = {gid: round(hmtx[font.getGlyphName(gid)][0] * k) for gid in set(gids.values()) | {0}}
+    head, hhea = font["head"], font["hhea"]
+    ps_name = re.sub(r"[^A-Za-z0-9_-]", "", font["name"].getDebugName(6) or "") or name
+
+    buf = io.BytesIO()
+    font.flavor = None
+    font.save(buf)
+    sfnt = buf.getvalue()
+    buf = io.BytesIO()
+    font.flavor = "woff"
+    font.save(buf)
+    return FontSubset(
+        name=name,
+        base_font=f"{_subset_tag(chars)}+{ps_name}",
+        sfnt=sfnt,
+        woff=buf.getvalue(),
+        cff="CFF " in font,
+        gids=gids,
+        widths=widths,
+        ascent=round(hhea.ascent * k),
+        descent=round(hhea.descent * k),
+        bbox=tuple(round(v * k) for v in (head.xMin, head.yMin, head.xMax, head.yMax)),
+    )
+
+
+# ---------------------------------------------------------------
+# 레이아웃 → VectorMenu (한 번)
+# ---------------------------------------------------------------
+def build(plan: menu_layout.LayoutPlan, background: Optional[Image.Image], text_color: str) -> VectorMenu:
+    if ft_subset is None:
+        raise RuntimeError("fontTools 가 설치되어 있지 않아 벡터 출력을 할 수 없습니다.")
+    first = plan.pages[0]
+    sources: Dict[Any, Tuple[bytes, str]] = {}   # 키 → (파일, 문서 안 이름)
+    used: Dict[Any, set] = {}
+    pages: List[List[VectorRun]] = []
+    for layout in plan.pages:
+        runs = []
+        for run in layout.runs:
+            font = layout.fonts[run.role]
+            key, data = _font_source(font)
+            if key not in sources:
+                sources[key] = (data, f"F{len(sources)}")
+            used.setdefault(key, set()).update(run.text)
+            # PIL draw.text 기본 anchor 는 "la" (왼쪽, ascender) → 기준선 = y + ascent
+            runs.append(VectorRun(run.x, run.y + font.getmetrics()[0], run.text,
+                                  sources[key][1], int(getattr(font, "size", 10))))
+        pages.append(runs)
+
+    fonts = {}
+    for key, (data, name) in sources.items():
+        fonts[name] = subset_font(name, data, key[1], "".join(sorted(used[key])))
+
+    jpeg, bg_size = None, (0, 0)
+    if background is not None:
+        buf = io.BytesIO()
+        background.convert("RGB").save(buf, format="JPEG", quality=BG_QUALITY)
+        jpeg, bg_size = buf.getvalue(), background.size
+    return VectorMenu(first.width, first.height, pages, fonts, ImageColor.getrgb(text_color)[:3], jpeg, bg_size)
+
+
+def render(req: MenuReq, fonts: Optional[font_service.FontResolver] = None) -> VectorMenu:
+    """render_menu_pages 와 같은 배경/글자색/레이아웃 → VectorMenu (래스터화는 배경만)"""
+    menu_service.normalize_items(req)
+    canvas = menu_service.load_background(req.background_url)
+    text_color = menu_service.get_text_color(canvas)
+    plan = menu_service.solve_menu_layout(req, menu_service.menu_font_for(req, fonts))
+    return build(plan, canvas if req.background_url else None, text_color)
+
+
+def paper_points(paper: str) -> Tuple[float, float]:
+    w, h = PAPER_SIZES_MM[paper]
+    return w * _PT_PER_MM, h * _PT_PER_MM
+
+
+# ---------------------------------------------------------------
+# SVG
+# ---------------------------------------------------------------
+def _svg_body(menu: VectorMenu, page_no: int) -> str:
+    body = menu._svg_bodies.get(page_no)
+    if body is not None:
+        return body
+    w, h = menu.width, menu.height
+    used = {r.font for r in menu.pages[page_no]}
+    faces = "".join(
+        f'@font-face{{font-family:"{name}";src:url(data:font/woff;base64,'
+        f'{base64.b64encode(f.woff).decode()}) format("woff");}}'
+        for name, f in menu.fonts.items() if name in used
+    )
+    parts = [f"<defs><style>{faces}text{{font-kerning:none;white-space:pre}}</style></defs>"]
+    if menu.background:
+        parts.append(f'<image x="0" y="0" width="{w}" height="{h}" preserveAspectRatio="none" '
+                     f'href="data:image/jpeg;base64,{base64.b64encode(menu.background).decode()}"/>')
+    else:
+        parts.append(f'<rect width="{w}" height="{h}" fill="#FFFFFF"/>')
+    r, g, b = menu.text_color
+    parts.append(f'<g fill="#{r:02X}{g:02X}{b:02X}">')
+    for run in menu.pages[page_no]:
+        parts.append(f'<text x="{run.x:g}" y="{run.baseline:g}" font-family="{run.font}" '
+                     f'font-size="{run.size}">{escape(run.text)}</text>')
+    parts.append("</g></svg>")
+    body = menu._svg_bodies[page_no] = "".join(parts)
+    return body
+
+
+def to_svg(menu: VectorMenu, page_no: int, paper: str) -> bytes:
+    """용지 크기는 width/height(mm) 만 다르고 viewBox 는 픽셀 좌표 그대로"""
+    w_mm, h_mm = PAPER_SIZES_MM[paper]
+    head = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{w_mm:g}mm" height="{h_mm:g}mm" '
+            f'viewBox="0 0 {menu.width} {menu.height}">')
+    return (head + _svg_body(menu, page_no)).encode("utf-8")
+
+
+# ---------------------------------------------------------------
+# PDF (Type0 / Identity-H 폰트, DCTDecode 배경)
+# ---------------------------------------------------------------
+class _PdfWriter:
+    def __init__(self):
+        self.objects: List[Optional[bytes]] = []
+
+    def reserve(self) -> int:
+        self.objects.append(None)
+        return len(self.objects)
+
+    def set(self, num: int, body: Union[str, bytes]):
+        self.objects[num - 1] = body.encode("latin-1") if isinstance(body, str) else body
+
+    def add(self, body: Union[str, bytes]) -> int:
+        num = self.reserve()
+        self.set(num, body)
+        return num
+
+    def stream(self, data: bytes, extra: str = "", compress: bool = True) -> int:
+        if compress:
+            data = zlib.compress(data, 6)
+            extra += " /Filter /FlateDecode"
+        return self.add(b"<< /Length %d%s >>\nstream\n" % (len(data), extra.encode("latin-1"))
+                        + data + b"\nendstream")
+
+    def tobytes(self, root: int) -> bytes:
+        out = io.BytesIO()
+        out.write(b"%PDF-1.6\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for i, body in enumerate(self.objects, start=1):
+            offsets.append(out.tell())
+            out.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+        xref = out.tell()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.objects) + 1))
+        for off in offsets:
+            out.write(b"%010d 00000 n \n" % off)
+        out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                  % (len(self.objects) + 1, root, xref))
+        return out.getvalue()
+
+
+def _to_unicode(gids: Dict[str, int]) -> bytes:
+    pairs = sorted({gid: ch for ch, gid in gids.items() if gid}.items())
+    lines = ["/CIDInit /ProcSet findresource begin", "12 dict begin", "begincmap",
+             "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+             "/CMapName /Adobe-Identity-UCS def", "/CMapType 2 def",
+             "1 begincodespacerange", "<0000> <FFFF>", "endcodespacerange"]
+    for i in range(0, len(pairs), 100):
+        chunk = pairs[i:i + 100]
+        lines.append(f"{len(chunk)} beginbfchar")
+        lines.extend(f"<{gid:04X}> <{ch.encode('utf-16-be').hex().upper()}>" for gid, ch in chunk)
+        lines.append("endbfchar")
+    lines += ["endcmap", "CMapName currentdict /CMap defineresource pop", "end", "end"]
+    return "\n".join(lines).encode("ascii")
+
+
+def _pdf_font(pdf: _PdfWriter, f: FontSubset) -> int:
+    if f.cff:
+        file_ref = pdf.stream(f.sfnt, " /Subtype /OpenType")
+        file_key, subtype, extra = "FontFile3", "CIDFontType0", ""
+    else:
+        file_ref = pdf.stream(f.sfnt, f" /Length1 {len(f.sfnt)}")
+        file_key, subtype, extra = "FontFile2", "CIDFontType2", " /CIDToGIDMap /Identity"
+    descriptor = pdf.add(
+        f"<< /Type /FontDescriptor /FontName /{f.base_font} /Flags 4 "
+        f"/FontBBox [{' '.join(map(str, f.bbox))}] /ItalicAngle 0 /Ascent {f.ascent} "
+        f"/Descent {f.descent} /CapHeight {f.ascent} /StemV 80 /{file_key} {file_ref} 0 R >>"
+    )
+    widths = " ".join(f"{gid} [{w}]" for gid, w in sorted(f.widths.items()))
+    cid_font = pdf.add(
+        f"<< /Type /Font /Subtype /{subtype} /BaseFont /{f.base_font} "
+        f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+        f"/FontDescriptor {descriptor} 0 R /W [{widths}]{extra} >>"
+    )
+    to_unicode = pdf.stream(_to_unicode(f.gids))
+    return pdf.add(
+        f"<< /Type /Font /Subtype /Type0 /BaseFont /{f.base_font} /Encoding /Identity-H "
+        f"/DescendantFonts [{cid_font} 0 R] /ToUnicode {to_unicode} 0 R >>"
+    )
+
+
+def _pdf_text_ops(menu: VectorMenu, page_no: int) -> bytes:
+    """픽셀 좌표계(y 아래로) 기준 텍스트 연산자. 글자는 Tm 의 -1 로 다시 뒤집음"""
+    r, g, b = (c / 255 for c in menu.text_color)
+    ops = [f"{r:.4f} {g:.4f} {b:.4f} rg"]
+    for run in menu.pages[page_no]:
+        f = menu.fonts[run.font]
+        hexstr = "".join(f"{f.gids.get(ch, 0):04X}" for ch in run.text)
+        ops.append(f"BT /{run.font} {run.size} Tf 1 0 0 -1 {run.x:g} {run.baseline:g} Tm <{hexstr}> Tj ET")
+    return "\n".join(ops).encode("ascii")
+
+
+def to_pdf(menu: VectorMenu, paper: str) -> bytes:
+    """모든 페이지를 한 PDF 로. 폰트/배경 객체는 페이지끼리 공유"""
+    pdf = _PdfWriter()
+    catalog, pages_ref = pdf.reserve(), pdf.reserve()
+    font_refs = {name: _pdf_font(pdf, f) for name, f in menu.fonts.items()}
+    image_ref = None
+    if menu.background:
+        bw, bh = menu.background_size
+        image_ref = pdf.stream(menu.background, f" /Type /XObject /Subtype /Image /Width {bw} /Height {bh} "
+                                                f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode",
+                               compress=False)
+
+    pw, ph = paper_points(paper)
+    w, h = menu.width, menu.height
+    k = min(pw / w, ph / h)
+    ox, oy = (pw - w * k) / 2, (ph - h * k) / 2
+    fonts_dict = " ".join(f"/{name} {ref} 0 R" for name, ref in font_refs.items())
+    xobjects = f" /XObject << /Im0 {image_ref} 0 R >>" if image_ref else ""
+    kids = []
+    for page_no in range(len(menu.pages)):
+        if image_ref:
+            backdrop = f"q {w} 0 0 {-h} 0 {h} cm /Im0 Do Q"
+        else:
+            backdrop = f"q 1 1 1 rg 0 0 {w} {h} re f Q"
+        content = (f"q {k:.6f} 0 0 {-k:.6f} {ox:.3f} {oy + h * k:.3f} cm\n{backdrop}\n".encode("ascii")
+                   + _pdf_text_ops(menu, page_no) + b"\nQ")
+        contents = pdf.stream(content)
+        kids.append(pdf.add(
+            f"<< /Type /Page /Parent {pages_ref} 0 R /MediaBox [0 0 {pw:.2f} {ph:.2f}] "
+            f"/Resources << /Font << {fonts_dict} >>{xobjects} >> /Contents {contents} 0 R >>"
+        ))
+    pdf.set(pages_ref, f"<< /Type /Pages /Kids [{' '.join(f'{n} 0 R' for n in kids)}] /Count {len(kids)} >>")
+    pdf.set(catalog, f"<< /Type /Catalog /Pages {pages_ref} 0 R >>")
+    return pdf.tobytes(catalog)
+
+
+def export(menu: VectorMenu, output: str, papers: List[str]) -> List[Tuple[str, List[bytes]]]:
+    """[(용지, 파일들)]. PDF 는 용지당 1개(여러 페이지), SVG 는 페이지당 1개"""
+    if output == "pdf":
+        return [(paper, [to_pdf(menu, paper)]) for paper in papers]
+    return [(paper, [to_svg(menu, i, paper) for i in range(len(menu.pages))]) for paper in papers]
+
+
+# ---------------------------------------------------------------
+# API
+# ---------------------------------------------------------------
+@router.post("/menu-board/vector", tags=["Image Generation"])
+def vector_menu_endpoint(req: MenuVectorReq):
+    output = req.output.strip().lower()
+    if output not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"output 은 {', '.join(FORMATS)} 중 하나여야 합니다.")
+    papers = list(dict.fromkeys(p.strip().lower() for p in req.papers)) or ["a4"]
+    unknown = [p for p in papers if p not in PAPER_SIZES_MM]
+    if unknown:
+        raise HTTPException(status_code=400,
+                            detail=f"papers 는 {', '.join(PAPER_SIZES_MM)} 중에서 고르세요: {', '.join(unknown)}")
+    if ft_subset is None:
+        raise HTTPException(status_code=503, detail="fontTools 가 설치되어 있지 않아 벡터 출력을 할 수 없습니다.")
+    if req.auto_desc:
+        menu_descriptions.fill_descriptions([req])
+
+    spec = req.model_dump(exclude={"output", "papers", "format", "preset"})
+    try:
+        files = render_executor.run(render_executor.render_menu_vector, spec, output, papers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    storage = os.path.join(menu_service.STORAGE_ROOT, "outputs")
+    os.makedirs(storage, exist_ok=True)
+    base_url = os.getenv("BACKEND_PUBLIC_URL", "https://hidden-leaf-village.onrender.com")
+    stem = f"menu_{random.randint(0, 999999):06}"
+    results = []
+    try:
+        for paper, blobs in files:
+            urls, total = [], 0
+            for i, data in enumerate(blobs, start=1):
+                name = f"{stem}_{paper}.{output}" if i == 1 else f"{stem}_{paper}_p{i}.{output}"
+                path = os.path.join(storage, name)
+                with open(path, "wb") as f:
+                    f.write(data)
+                metrics.output_written("menu_vector", path, len(data))
+                urls.append(f"{base_url}/static/outputs/{name}")
+                total += len(data)
+            w_mm, h_mm = PAPER_SIZES_MM[paper]
+            results.append({"paper": paper, "size_mm": [w_mm, h_mm], "url": urls[0],
+                            "page_urls": urls, "bytes": total})
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"파일 저장 실패: {e}")
+
+    return {"ok": True, "format": output, "media_type": MEDIA_TYPES[output],
+            "url": results[0]["url"], "files": results}
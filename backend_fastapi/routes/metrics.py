@@ -0,0 +1,205 @@
+# backend_fastapi/routes/metrics.py
+"""
+Prometheus 메트릭 (/metrics)
+
+- 라우트별 요청 지연 히스토그램 + 진행 중 요청 수 (라우트 템플릿 기준, /history/{id} 같은 경로 폭발 방지)
+- 업스트림 지연/오류: openai(모델별), comfyui, google_fonts, hf_translator
+- 캐시 hit/miss: font_face(FreeType LRU), font_file(디스크 TTF), google_fonts_list(webfonts 목록), bg_library(배경), menu_desc(메뉴 설명),
+  menu_preview_bg(미리보기 축소 배경)
+- data/outputs 에 쓴 바이트 수
+- 출력 이미지 인코딩 시간/크기 (포맷, 프리셋별)
+- 폴백 체인 헤지 결과 (hedging, 체인별)
+
+prometheus_client 가 없으면 모든 기록 함수는 아무 일도 하지 않고 /metrics 는 503.
+핫패스 비용은 라벨 조회 + lock 하나 수준 (라벨 조합은 캐시).
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from fastapi import APIRouter, Response
+from starlette.routing import Match
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+except ImportError:
+    Counter = Gauge = Histogram = None
+
+router = APIRouter()
+
+ENABLED = Histogram is not None and os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+# 요청 지연: 수 ms (메뉴 렌더) ~ 수 분 (ComfyUI) 범위
+_REQUEST_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+_UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, 300)
+_ENCODE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+if ENABLED:
+    REQUEST_LATENCY = Histogram(
+        "http_request_duration_seconds", "요청 처리 시간", ["route", "method", "status"], buckets=_REQUEST_BUCKETS)
+    IN_FLIGHT = Gauge("http_requests_in_flight", "진행 중 요청 수", ["route"])
+    UPSTREAM_LATENCY = Histogram(
+        "upstream_request_duration_seconds", "외부 호출 시간", ["upstream", "target", "outcome"],
+        buckets=_UPSTREAM_BUCKETS)
+    UPSTREAM_ERRORS = Counter("upstream_errors_total", "외부 호출 오류", ["upstream", "target", "kind"])
+    UPSTREAM_IN_FLIGHT = Gauge("upstream_requests_in_flight", "진행 중 외부 호출 수", ["upstream"])
+    CACHE_EVENTS = Counter("cache_events_total", "캐시 조회 결과", ["cache", "result"])
+    OUTPUT_BYTES = Counter("output_bytes_written_total", "data/outputs 에 쓴 바이트", ["kind"])
+    OUTPUT_FILES = Counter("output_files_written_total", "data/outputs 에 쓴 파일 수", ["kind"])
+    ENCODE_LATENCY = Histogram(
+        "image_encode_duration_seconds", "출력 이미지 인코딩 시간", ["kind", "format", "preset"],
+        buckets=_ENCODE_BUCKETS)
+    ENCODE_BYTES = Counter("image_encoded_bytes_total", "인코딩된 출력 이미지 바이트", ["kind", "format", "preset"])
+    HEDGE_EVENTS = Counter("hedge_events_total", "폴백 체인 헤지 (fired/won/lost/skipped/fallback)", ["chain", "event"])
+
+
+# ---------------------------------------------------------------
+# 라우트 템플릿 해석 (raw path → "/generate/menu-board" 등)
+# ---------------------------------------------------------------
+_ROUTE_CACHE_MAX = 2048
+_route_cache: Dict[Tuple[str, str], str] = {}
+
+
+def route_template(app, scope) -> str:
+    key = (scope.get("method", ""), scope.get("path", ""))
+    cached = _route_cache.get(key)
+    if cached is not None:
+        return cached
+
+    template = "unmatched"
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            template = getattr(route, "path", None) or getattr(route, "path_format", "unmatched")
+            break
+        if match == Match.PARTIAL and template == "unmatched":
+            template = getattr(route, "path", "unmatched")  # 메서드 불일치 (405)
+
+    if len(_route_cache) < _ROUTE_CACHE_MAX:
+        _route_cache[key] = template
+    return template
+
+
+class MetricsMiddleware:
+    """순수 ASGI 미들웨어 (BaseHTTPMiddleware 보다 오버헤드가 작고 스트리밍 응답을 그대로 통과)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not ENABLED or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        fastapi_app = scope.get("app")  # Starlette 가 미들웨어 스택 진입 전에 채움
+        route = route_template(fastapi_app, scope) if fastapi_app is not None else "unknown"
+        if route == "/metrics":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        gauge = IN_FLIGHT.labels(route)
+        gauge.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            gauge.dec()
+            REQUEST_LATENCY.labels(route, scope.get("method", ""), str(status["code"])).observe(
+                time.perf_counter() - started)
+
+
+# ---------------------------------------------------------------
+# 업스트림 / 캐시 / 출력 기록 헬퍼
+# ---------------------------------------------------------------
+class _UpstreamCall:
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome = "ok"
+
+    def status(self, code: int):
+        """HTTP 상태 코드로 결과 표시 (4xx/5xx → 오류)"""
+        if code >= 400:
+            self.outcome = f"http_{code // 100}xx"
+
+    def fail(self, kind: str = "error"):
+        self.outcome = kind
+
+
+@contextmanager
+def upstream(name: str, target: str = ""):
+    """
+    with metrics.upstream("openai", model) as call:
+        r = s.post(...); call.status(r.status_code)
+    예외가 나가면 예외 클래스명으로 오류 집계
+    """
+    call = _UpstreamCall()
+    if not ENABLED:
+        yield call
+        return
+
+    in_flight = UPSTREAM_IN_FLIGHT.labels(name)
+    in_flight.inc()
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        call.fail(type(e).__name__)
+        raise
+    finally:
+        in_flight.dec()
+        observe_upstream(name, target, time.perf_counter() - started, call.outcome)
+
+
+def observe_upstream(name: str, target: str, seconds: float, outcome: str = "ok"):
+    """with 블록으로 감싸기 어려운 구간(제너레이터 등)용 직접 기록"""
+    if not ENABLED:
+        return
+    UPSTREAM_LATENCY.labels(name, target, "ok" if outcome == "ok" else "error").observe(seconds)
+    if outcome != "ok":
+        UPSTREAM_ERRORS.labels(name, target, outcome).inc()
+
+
+def cache_event(cache: str, hit: bool):
+    if ENABLED:
+        CACHE_EVENTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def output_written(kind: str, path: Optional[str] = None, nbytes: Optional[int] = None):
+    """data/outputs 저장 기록 (nbytes 를 모르면 파일 크기 조회)"""
+    if not ENABLED:
+        return
+    if nbytes is None:
+        try:
+            nbytes = os.path.getsize(path)
+        except (OSError, TypeError):
+            return
+    OUTPUT_BYTES.labels(kind).inc(nbytes)
+    OUTPUT_FILES.labels(kind).inc()
+
+
+def image_encoded(kind: str, fmt: str, preset: str, seconds: float, nbytes: int):
+    """image_encoding.report 에서 호출 (워커 프로세스의 인코딩도 부모에서 기록)"""
+    if not ENABLED:
+        return
+    ENCODE_LATENCY.labels(kind, fmt, preset).observe(seconds)
+    ENCODE_BYTES.labels(kind, fmt, preset).inc(nbytes)
+
+
+def hedge_event(chain: str, event: str):
+    """hedging.call 에서 호출. won = 헤지한 후보가 이김, lost = 헤지했지만 1차가 먼저 옴"""
+    if ENABLED:
+        HEDGE_EVENTS.labels(chain, event).inc()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    if not ENABLED:
+        return Response("prometheus_client not installed or METRICS_ENABLED=0", status_code=503)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
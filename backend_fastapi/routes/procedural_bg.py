@@ -0,0 +1,260 @@
+# backend_fastapi/routes/procedural_bg.py
+"""
+절차적(NumPy) 메뉴판 배경 — DALL·E 대신 즉시 생성
+
+- 그라데이션(선형/방사), 값 노이즈(여러 옥타브), 종이/나무 질감, 기하 패턴(줄무늬/도트/격자/쉐브론), 비네트
+- BgReq 의 DesignKeywords 로 스타일, ColorPalette 로 색을 정함 (키워드/팔레트가 같으면 같은 그림)
+- 저주파 성분은 1/4 해상도 NumPy 브로드캐스트로 계산해 한 번 확대하고, 고주파 질감/패턴만 전체 해상도
+  (패턴은 한 주기 타일 반복, 합성은 PIL composite) → 1080x1528 기준 수십 ms
+
+텍스트가 올라가는 배경이므로 패턴/질감 대비는 낮게 유지한다.
+"""
+import hashlib
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# 키워드 → 스타일 (영문은 GPT DesignKeywords, 한글은 직접 입력 대비)
+STYLE_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "wood": ("wood", "wooden", "rustic", "timber", "cabin", "farmhouse", "나무", "우드", "원목"),
+    "paper": ("paper", "vintage", "kraft", "retro", "parchment", "antique", "old", "handmade", "종이", "빈티지", "레트로"),
+    "geometric": ("geometric", "pattern", "tile", "stripe", "stripes", "dots", "polka", "grid", "check",
+                  "checker", "chevron", "modern", "기하", "패턴", "모던"),
+    "gradient": ("minimal", "minimalist", "clean", "simple", "gradient", "soft", "pastel", "미니멀", "심플"),
+}
+DARK_KEYWORDS = ("dark", "elegant", "luxury", "premium", "night", "moody", "noir", "고급", "어두운")
+DEFAULT_PALETTE = ("#F4EBDD", "#D9C3A5", "#8C6A4F")
+
+_HEX = re.compile(r"^#?([0-9a-fA-F]{6}|[0-9a-fA-F]{3})$")
+
+
+def _rgb(color: str) -> Optional[np.ndarray]:
+    m = _HEX.match(str(color).strip())
+    if not m:
+        return None
+    h = m.group(1)
+    if len(h) == 3:
+        h = "".join(c * 2 for c in h)
+    return np.array([int(h[i:i + 2], 16) for i in (0, 2, 4)], dtype=np.float32) / 255.0
+
+
+def _luma(c: np.ndarray) -> float:
+    return float(0.299 * c[0] + 0.587 * c[1] + 0.114 * c[2])
+
+
+def palette_colors(colors: Optional[List[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(바탕, 보조, 강조). 바탕은 팔레트에서 가장 밝은 색 → 텍스트 대비 확보"""
+    parsed = [c for c in (_rgb(x) for x in (colors or [])) if c is not None]
+    if not parsed:
+        parsed = [_rgb(x) for x in DEFAULT_PALETTE]
+    parsed.sort(key=_luma, reverse=True)
+    base = parsed[0]
+    second = parsed[1] if len(parsed) > 1 else np.clip(base * 0.85, 0, 1)
+    accent = parsed[2] if len(parsed) > 2 else np.clip(second * 0.7, 0, 1)
+    return base, second, accent
+
+
+def choose_style(keywords: Optional[List[str]]) -> Dict[str, str]:
+    words = set()
+    for k in keywords or []:
+        words.update(str(k).lower().replace("-", " ").split())
+    texture = "gradient"
+    for name, keys in STYLE_KEYWORDS.items():
+        if words & set(keys):
+            texture = name
+            break
+    pattern = "none"
+    if texture == "geometric":
+        if words & {"stripe", "stripes"}:
+            pattern = "stripes"
+        elif words & {"grid", "check", "checker", "tile"}:
+            pattern = "grid"
+        elif words & {"chevron"}:
+            pattern = "chevron"
+        else:
+            pattern = "dots"
+    return {"texture": texture, "pattern": pattern, "tone": "dark" if words & set(DARK_KEYWORDS) else "light"}
+
+
+# ---------------------------------------------------------------
+# 기본 필드 (모두 float32, 0~1)
+# ---------------------------------------------------------------
+def _grid(h: int, w: int) -> Tuple[np.ndarray, np.ndarray]:
+    """y (h,1), x (1,w) — 세로 기준 정규화 좌표 (가로는 종횡비만큼)"""
+    ys = np.linspace(0.0, 1.0, h, dtype=np.float32)[:, None]
+    xs = np.linspace(0.0, w / h, w, dtype=np.float32)[None, :]
+    return ys, xs
+
+
+def value_noise(h: int, w: int, rng: np.random.Generator, cells: int = 6, octaves: int = 4,
+                stretch: Tuple[float, float] = (1.0, 1.0)) -> np.ndarray:
+    """
+    저해상도 난수 격자를 bicubic 확대해 겹친 값 노이즈.
+    stretch=(sy, sx) 로 한 방향 격자를 성기게 하면 결(나뭇결/종이 섬유)이 생김
+    """
+    out = np.zeros((h, w), dtype=np.float32)
+    amp, total = 1.0, 0.0
+    for o in range(octaves):
+        n = cells * (2 ** o)
+        gh = max(2, int(n / stretch[0]))
+        gw = max(2, int(n * w / h / stretch[1]))
+        grid = rng.random((gh, gw), dtype=np.float32)
+        layer = np.asarray(Image.fromarray(grid, "F").resize((w, h), Image.Resampling.BICUBIC))
+        out += amp * layer
+        total += amp
+        amp *= 0.5
+    out /= total
+    lo, hi = out.min(), out.max()
+    return (out - lo) / (hi - lo + 1e-6)
+
+
+def linear_gradient(ys: np.ndarray, xs: np.ndarray, angle_deg: float) -> np.ndarray:
+    a = np.deg2rad(angle_deg)
+    t = ys * np.float32(np.sin(a)) + xs * np.float32(np.cos(a))
+    return (t - t.min()) / (t.max() - t.min() + 1e-6)
+
+
+def vignette(ys: np.ndarray, xs: np.ndarray, strength: float) -> np.ndarray:
+    cx = xs.max() / 2
+    r2 = ((xs - cx) / (cx + 1e-6)) ** 2 + ((ys - 0.5) / 0.5) ** 2
+    return 1.0 - np.float32(strength) * np.clip(r2 / 2.0, 0.0, 1.0) ** 1.5
+
+
+def _smoothstep(e0: float, e1: float, x: np.ndarray) -> np.ndarray:
+    t = np.clip((x - e0) / (e1 - e0), 0.0, 1.0)
+    return t * t * (3.0 - 2.0 * t)
+
+
+def pattern_tile(kind: str, p: int) -> np.ndarray:
+    """한 주기(p x p px) 패턴 마스크 (0~1). 전체 화면은 np.tile 로 반복 → 패턴 비용이 해상도와 무관"""
+    yy, xx = np.mgrid[0:p, 0:p].astype(np.float32) + 0.5
+    u, v = xx / p, yy / p
+    e = 1.0 / p  # 1px
+    if kind == "stripes":
+        t = (u + v) % 1.0
+        return 1.0 - _smoothstep(0.25 - e, 0.25 + e, np.abs(t - 0.5))
+    if kind == "grid":
+        d = np.minimum(np.minimum(u, 1.0 - u), np.minimum(v, 1.0 - v)) * p
+        return 1.0 - _smoothstep(1.0, 2.0, d)
+    if kind == "chevron":
+        t = (v + np.abs(u - 0.5)) % 1.0
+        return 1.0 - _smoothstep(0.1, 0.1 + 2 * e, np.abs(t - 0.5))
+    if kind == "dots":
+        d = np.hypot(u - 0.5, v - 0.5) * p
+        r = 0.18 * p
+        return 1.0 - _smoothstep(r - 1.0, r + 1.0, d)
+    return np.zeros((p, p), dtype=np.float32)
+
+
+def _tiled(tile: np.ndarray, h: int, w: int) -> np.ndarray:
+    th, tw = tile.shape[:2]
+    return np.tile(tile, (-(-h // th), -(-w // tw)))[:h, :w]
+
+
+def pattern_mask(kind: str, h: int, w: int, alpha: float) -> Image.Image:
+    """패턴 마스크 ('L', 최대값 alpha*255). uint8 타일을 반복하므로 전체 해상도 부동소수 연산 없음"""
+    p = max(8, int(round(h * 0.05)))
+    tile = (np.clip(pattern_tile(kind, p), 0.0, 1.0) * (alpha * 255.0)).astype(np.uint8)
+    return Image.fromarray(np.ascontiguousarray(_tiled(tile, h, w)), "L")
+
+
+def _to_l(a: np.ndarray) -> Image.Image:
+    return Image.fromarray((np.clip(a, 0.0, 1.0) * 255.0).astype(np.uint8), "L")
+
+
+_GRAIN_TILE = 256
+
+
+def detail_layer(kind: str, h: int, w: int, rng: np.random.Generator) -> Image.Image:
+    """
+    전체 해상도 고주파 질감 ('L', 밝을수록 진하게 입힘)
+    - paper: 가로로 늘인 섬유 + 고운 입자
+    - wood : 세로로 늘인 나뭇결 섬유 + 입자
+    - 그 외: 약한 입자
+    섬유는 한 방향으로 성긴 저해상도 노이즈를 확대해서 만듦
+    """
+    # 입자는 256px 난수 타일 반복 (반복 주기가 눈에 띄지 않는 크기)
+    grain = _tiled(rng.integers(0, 128, size=(_GRAIN_TILE, _GRAIN_TILE), dtype=np.uint8), h, w)
+    if kind == "paper":
+        fiber = _to_l(value_noise(max(2, h // 4), max(2, w // 16), rng, cells=40, octaves=2)).resize(
+            (w, h), Image.Resampling.BILINEAR)
+    elif kind == "wood":
+        fiber = _to_l(value_noise(max(2, h // 16), max(2, w // 4), rng, cells=30, octaves=2)).resize(
+            (w, h), Image.Resampling.BILINEAR)
+    else:
+        return Image.fromarray(np.ascontiguousarray(grain >> 1), "L")
+    return Image.fromarray((np.asarray(fiber) >> 1) + (grain >> 1), "L")
+
+
+# ---------------------------------------------------------------
+# 합성
+# ---------------------------------------------------------------
+LOW_RES = 4  # 저주파 성분(그라데이션/얼룩/나이테/비네트)은 1/4 해상도에서 계산 후 확대
+
+# 스타일별 질감 세기 (detail_layer 를 보조색 쪽으로 섞는 최대 비율)
+_DETAIL_STRENGTH = {"paper": 0.22, "wood": 0.30, "geometric": 0.08, "gradient": 0.08}
+
+
+def seed_for(keywords: Optional[List[str]], colors: Optional[List[str]]) -> int:
+    raw = "|".join(sorted(str(k).lower() for k in keywords or [])) + "#" + "|".join(colors or [])
+    return int(hashlib.sha1(raw.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _solid(color: np.ndarray, size: Tuple[int, int]) -> Image.Image:
+    return Image.new("RGB", size, tuple(int(round(c * 255)) for c in color))
+
+
+def render(keywords: Optional[List[str]], colors: Optional[List[str]], size: Tuple[int, int] = (1080, 1528),
+           seed: Optional[int] = None) -> Image.Image:
+    w, h = int(size[0]), int(size[1])
+    rng = np.random.default_rng(seed_for(keywords, colors) if seed is None else seed)
+    style = choose_style(keywords)
+    base, second, accent = palette_colors(colors)
+    if style["tone"] == "dark":
+        base, accent = np.clip(accent * 0.6, 0, 1), base  # 어두운 바탕 + 밝은 강조 (텍스트는 흰색으로 선택됨)
+    texture = style["texture"]
+
+    # 1) 저해상도: 그라데이션 + 얼룩/나이테 + 비네트
+    lh, lw = -(-h // LOW_RES), -(-w // LOW_RES)
+    ys, xs = _grid(lh, lw)
+    mix = 0.35 * linear_gradient(ys, xs, float(rng.uniform(60, 120)))
+    if texture == "wood":
+        warp = value_noise(lh, lw, rng, cells=3, octaves=2)
+        rings = 0.5 + 0.5 * np.sin(2 * np.pi * (xs * 14.0 + warp * 3.0 + ys * 0.6))
+        mix = mix + 0.25 * rings ** 2
+    lum = 1.0 + (0.12 if texture == "paper" else 0.05) * (value_noise(lh, lw, rng, cells=3, octaves=3) - 0.5)
+    lum = lum * vignette(ys, xs, 0.45 if style["tone"] == "dark" else 0.22)
+    m = np.clip(mix, 0.0, 1.0)[..., None]
+    low = (base * (1.0 - m) + second * m) * lum[..., None]
+    img = Image.fromarray(np.clip(low * 255.0 + 0.5, 0, 255).astype(np.uint8), "RGB").resize(
+        (w, h), Image.Resampling.BILINEAR)
+
+    # 2) 전체 해상도: 종이 섬유/나뭇결/입자 → 보조색(어둡게) 쪽으로 섞기
+    detail = detail_layer(texture, h, w, rng)
+    strength = _DETAIL_STRENGTH.get(texture, 0.08)
+    detail = detail.point(lambda v: int(v * strength * 2))
+    img = Image.composite(_solid(np.clip(second * 0.6, 0, 1), (w, h)), img, detail)
+
+    # 3) 기하 패턴 (강조색, 낮은 불투명도)
+    if style["pattern"] != "none":
+        img = Image.composite(_solid(accent, (w, h)), img, pattern_mask(style["pattern"], h, w, 0.12))
+    return img
+
+
+def benchmark(repeat: int = 5, size: Tuple[int, int] = (1080, 1528)) -> Dict[str, float]:
+    """스타일별 평균 ms (python -c 'from routes import procedural_bg as p; print(p.benchmark())')"""
+    cases = {
+        "gradient": ["minimal"], "paper": ["vintage", "paper"], "wood": ["rustic", "wood"],
+        "dots": ["geometric"], "stripes": ["stripes"], "grid": ["grid"], "dark": ["elegant", "dark"],
+    }
+    out = {}
+    for name, kw in cases.items():
+        render(kw, ["#F3E9DC", "#C08552", "#5E3023"], size)
+        started = time.perf_counter()
+        for i in range(repeat):
+            render(kw, ["#F3E9DC", "#C08552", "#5E3023"], size, seed=i)
+        out[name] = round((time.perf_counter() - started) / repeat * 1000.0, 1)
+    return out
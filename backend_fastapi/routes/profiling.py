@@ -0,0 +1,272 @@
+# backend_fastapi/routes/profiling.py
+"""
+요청 단위 샘플링 프로파일러 (opt-in)
+
+- 관리자 헤더 X-Profile: <PROFILE_ADMIN_TOKEN> 또는 쿼리 ?__profile=<token> 인 요청만 프로파일
+- PROFILE_SAMPLE_EVERY=N 이면 라우트별 N 건 중 1 건을 낮은 샘플링 빈도로 자동 프로파일
+- 결과는 data/profiles/*.speedscope.json (https://www.speedscope.app 에서 플레임그래프로 열기)
+- GET /profiles (목록), GET /profiles/{name} (다운로드) — 관리자 토큰 필요
+
+별도 스레드가 sys._current_frames() 로 요청에 묶인 스레드의 스택만 주기적으로 수집한다.
+이벤트 루프 스레드(async 엔드포인트)는 요청 시작 시, 스레드풀 스레드(sync 엔드포인트)는
+요청 안에서 처음 tracing span 에 들어갈 때 묶인다. 이벤트 루프 스레드는 다른 요청과 공유되므로
+동시 요청이 많을 때 async 엔드포인트 프로파일에는 다른 요청의 스택이 섞일 수 있다.
+
+환경 변수:
+    PROFILE_ADMIN_TOKEN    비어 있으면 on-demand 프로파일/조회 API 비활성
+    PROFILE_SAMPLE_EVERY   라우트별 1/N 자동 프로파일 (0=끔, 기본)
+    PROFILE_INTERVAL_MS    on-demand 샘플링 간격 (기본 5ms)
+    PROFILE_SAMPLED_INTERVAL_MS  자동 프로파일 샘플링 간격 (기본 20ms)
+    PROFILE_KEEP           보관할 프로파일 파일 수 (기본 200)
+"""
+import asyncio
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from . import tracing
+from .metrics import route_template
+
+router = APIRouter()
+
+ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "").strip()
+SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))
+INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+SAMPLED_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLED_INTERVAL_MS", "20"))
+KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+
+STORAGE_ROOT = os.getenv(
+    "STORAGE_ROOT",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+)
+PROFILE_DIR = os.path.join(STORAGE_ROOT, "profiles")
+
+# 이 프레임이 맨 위(leaf)면 대기 중 → 샘플에서 제외
+_IDLE_LEAVES = {("selectors.py", "select"), ("selectors.py", "poll"), ("threading.py", "wait")}
+
+_session: contextvars.ContextVar[Optional["_Session"]] = contextvars.ContextVar("profile_session", default=None)
+_route_counts: Dict[str, int] = {}
+_counts_lock = threading.Lock()
+
+
+class _Session:
+    """요청 하나의 샘플 수집기"""
+
+    def __init__(self, name: str, interval_ms: float, label: str):
+        self.name = name
+        self.label = label
+        self.interval = interval_ms / 1000.0
+        self.threads: Set[int] = set()
+        # 스레드별 [(스택 프레임 인덱스 목록, 가중치 ms)]
+        self.samples: Dict[int, List[Tuple[Tuple[int, ...], float]]] = {}
+        self.frames: List[Dict[str, Any]] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{name}", daemon=True)
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+
+    def bind(self, ident: int):
+        self.threads.add(ident)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self.ended = time.perf_counter()
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_filename, code.co_name, code.co_firstlineno)
+        idx = self._frame_index.get(key)
+        if idx is None:
+            idx = self._frame_index[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return idx
+
+    def _run(self):
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight = (now - last) * 1000.0
+            last = now
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                if ident == me:
+                    continue
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_id(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples.setdefault(ident, []).append((tuple(stack), weight))
+
+    def to_speedscope(self) -> Dict[str, Any]:
+        duration = ((self.ended or time.perf_counter()) - self.started) * 1000.0
+        profiles = []
+        for ident, rows in self.samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": f"{self.label} (thread {ident})",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(duration, 3),
+                "samples": [list(stack) for stack, _ in rows],
+                "weights": [round(w, 3) for _, w in rows],
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.label,
+            "exporter": "hidden-leaf-village profiling",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.frames},
+            "profiles": profiles,
+        }
+
+    def write(self) -> str:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, self.name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_speedscope(), f, ensure_ascii=False)
+        _prune()
+        return path
+
+
+def _bind_current_thread():
+    """tracing span 진입 훅: 프로파일 중인 요청이면 현재 스레드를 묶음"""
+    session = _session.get()
+    if session is not None:
+        session.bind(threading.get_ident())
+
+
+tracing.add_enter_hook(_bind_current_thread)
+
+
+def _prune():
+    try:
+        files = sorted(
+            (os.path.join(PROFILE_DIR, n) for n in os.listdir(PROFILE_DIR) if n.endswith(".speedscope.json")),
+            key=os.path.getmtime,
+        )
+        for path in files[:-KEEP] if KEEP > 0 else []:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def _requested(scope) -> bool:
+    if not ADMIN_TOKEN:
+        return False
+    for key, value in scope.get("headers", []):
+        if key == b"x-profile":
+            return value.decode("latin-1").strip() == ADMIN_TOKEN
+    query = scope.get("query_string", b"").decode("latin-1")
+    m = re.search(r"(?:^|&)__profile=([^&]*)", query)
+    return bool(m) and m.group(1) == ADMIN_TOKEN
+
+
+def _sampled(route: str) -> bool:
+    if SAMPLE_EVERY <= 0:
+        return False
+    with _counts_lock:
+        n = _route_counts.get(route, 0) + 1
+        _route_counts[route] = n
+    return n % SAMPLE_EVERY == 0
+
+
+class ProfilingMiddleware:
+    """대상 요청만 샘플러를 붙여 실행하고 응답 헤더 X-Profile-File 로 파일명을 알려줌"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (ADMIN_TOKEN or SAMPLE_EVERY > 0):
+            return await self.app(scope, receive, send)
+
+        path = scope.get("path", "")
+        if path.startswith(("/profiles", "/metrics", "/traces", "/static", "/outputs")):
+            return await self.app(scope, receive, send)
+
+        route = route_template(scope["app"], scope) if scope.get("app") is not None else path
+        if _requested(scope):
+            interval, mode = INTERVAL_MS, "on-demand"
+        elif _sampled(route):
+            interval, mode = SAMPLED_INTERVAL_MS, "sampled"
+        else:
+            return await self.app(scope, receive, send)
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{slug}_{uuid.uuid4().hex[:6]}.speedscope.json"
+        session = _Session(name, interval, f"{scope.get('method', '')} {path} [{mode}]")
+        session.bind(threading.get_ident())  # 이벤트 루프 스레드 (async 엔드포인트)
+        token = _session.set(session)
+        session.start()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-file", name.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _session.reset(token)
+            session.stop()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, session.write)
+            except Exception as e:
+                print(f"[profiling] 저장 실패: {e}")
+
+
+# ---------------------------------------------------------------
+# 조회 API
+# ---------------------------------------------------------------
+def _check_admin(token: Optional[str]):
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="profiling disabled or invalid admin token")
+
+
+@router.get("/profiles")
+def list_profiles(x_profile: Optional[str] = Header(None), token: Optional[str] = Query(None)):
+    _check_admin(x_profile or token)
+    items = []
+    if os.path.isdir(PROFILE_DIR):
+        for n in os.listdir(PROFILE_DIR):
+            if not n.endswith(".speedscope.json"):
+                continue
+            p = os.path.join(PROFILE_DIR, n)
+            items.append({"name": n, "bytes": os.path.getsize(p), "mtime": os.path.getmtime(p)})
+    items.sort(key=lambda x: x["mtime"], reverse=True)
+    return {"ok": True, "profiles": items}
+
+
+@router.get("/profiles/{name}")
+def download_profile(name: str, x_profile: Optional[str] = Header(None), token: Optional[str] = Query(None)):
+    _check_admin(x_profile or token)
+    if os.path.basename(name) != name or not name.endswith(".speedscope.json"):
+        raise HTTPException(status_code=400, detail="invalid profile name")
+    path = os.path.join(PROFILE_DIR, name)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
@@ -0,0 +1,213 @@
+# backend_fastapi/routes/render_executor.py
+"""
+CPU 작업(PIL 렌더링 / 이미지 인코딩) 프로세스 풀
+
+메뉴판 렌더, 절차적 배경, 데모 이미지, 출력 인코딩(image_encoding)은 GIL 을 잡고 수백 ms 씩 돌기 때문에
+요청 스레드에서 실행하면 동시 요청이 코어 하나에 줄을 선다. 여기서는 작업을 워커 프로세스로 보내고
+라우트는 작은 렌더 스펙(dict)을 넘겨 인코딩 결과(Encoded)만 돌려받는다.
+
+- 워커는 앱 시작 시 미리 띄우고(warm), 초기화 때 menu_service 를 import 하고 기본 폰트 face 를 올려 둠
+- 시작 방식은 forkserver (uvicorn 스레드가 있는 부모를 fork 하지 않음)
+- 워커가 죽으면(BrokenProcessPool) 풀을 다시 만들고 이번 작업은 요청 스레드에서 실행
+- 워커 안의 tracing span / prometheus 메트릭은 부모로 전달되지 않음 → 부모에서 render_executor span 으로 기록
+
+환경 변수:
+    RENDER_WORKERS   워커 수. auto(기본) = CPU-1 (최대 4, 단일 코어면 0) / 0 = 요청 스레드에서 직접 실행
+    RENDER_TIMEOUT   작업 결과 대기 제한 초 (기본 120)
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont  # noqa: F401
+
+from . import image_encoding, tracing
+from .image_encoding import Encoded
+
+_WORKERS_ENV = os.getenv("RENDER_WORKERS", "auto").strip().lower()
+TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "120"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_lock = threading.Lock()
+_stats = {"submitted": 0, "inline": 0, "restarts": 0}
+
+
+def default_workers() -> int:
+    if _WORKERS_ENV not in ("", "auto"):
+        return max(0, int(_WORKERS_ENV))
+    cpus = os.cpu_count() or 1
+    return 0 if cpus <= 1 else min(4, cpus - 1)
+
+
+# ---------------------------------------------------------------
+# 풀 관리
+# ---------------------------------------------------------------
+def _init_worker():
+    """워커 초기화: 무거운 import + 기본 폰트 face 미리 로드"""
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C 는 부모가 처리
+    try:
+        from . import font_service, menu_service  # noqa: F401
+        for size in (78, 44, 30):
+            font_service.face(None, size)
+    except Exception as e:  # 예열 실패는 첫 작업에서 다시 import 하며 드러남
+        print(f"[render_executor] 워커 예열 실패: {e}")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def start(workers: Optional[int] = None) -> int:
+    """풀 생성 + 워커 예열. 반환값은 워커 수 (0 이면 인라인 실행)"""
+    global _pool, _pool_workers
+    n = default_workers() if workers is None else max(0, workers)
+    with _lock:
+        if _pool is not None and _pool_workers == n:
+            return n
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        _pool_workers = n
+        if n == 0:
+            return 0
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context(method),
+                                    initializer=_init_worker)
+        pool = _pool
+    started = time.perf_counter()
+    pids = {f.result(timeout=TIMEOUT) for f in [pool.submit(_ping) for _ in range(n * 2)]}
+    print(f"[render_executor] 워커 {len(pids)}/{n}개 준비 ({method}, {time.perf_counter() - started:.1f}s)")
+    return n
+
+
+def shutdown():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def stats() -> Dict[str, Any]:
+    return {"workers": _pool_workers if _pool is not None else 0, **_stats}
+
+
+def run(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    fn(*args) 을 워커에서 실행하고 결과 반환 (fn/인자/결과는 pickle 가능해야 함).
+    sync 라우트(스레드풀)에서 호출하는 용도 — 블로킹 대기
+    """
+    pool = _pool
+    if pool is None:
+        _stats["inline"] += 1
+        return fn(*args, **kwargs)
+    _stats["submitted"] += 1
+    with tracing.span("render_executor", task=fn.__name__):
+        try:
+            return pool.submit(fn, *args, **kwargs).result(timeout=TIMEOUT)
+        except BrokenProcessPool as e:
+            _restart(pool, e)
+            _stats["inline"] += 1
+            return fn(*args, **kwargs)
+
+
+def _restart(broken: ProcessPoolExecutor, error: Exception):
+    """손상된 풀을 떼어 내고 한 번만 다시 띄움 (같은 풀로 실패한 다른 호출은 인라인 실행만)"""
+    global _pool
+    with _lock:
+        if _pool is not broken:
+            return  # 이미 다른 호출이 떼어 냄 (재시작 중이거나 끝남)
+        _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+    print(f"[render_executor] 워커 풀 손상, 재시작: {error}")
+    _stats["restarts"] += 1
+    threading.Thread(target=start, args=(_pool_workers,), daemon=True).start()
+
+
+# ---------------------------------------------------------------
+# 작업 함수 (워커에서 실행, 모듈 최상위 함수여야 pickle 가능)
+# ---------------------------------------------------------------
+def render_menu_image(spec: Dict[str, Any], fmt: str = "png", preset: Optional[str] = None) -> List[Encoded]:
+    """MenuReq 스펙(dict) → 페이지별 인코딩 결과"""
+    from .menu_service import MenuReq, render_menu_pages
+    return [image_encoding.encode(page, fmt, preset) for page in render_menu_pages(MenuReq(**spec))]
+
+
+def render_menu_document(spec: Dict[str, Any], fmt: str, preset: str) -> Tuple[List[Encoded], Dict[str, Any]]:
+    """PATCH full 모드: 페이지 인코딩 + 부모가 이어서 부분 렌더할 렌더 상태 스냅샷"""
+    from . import menu_documents
+    return menu_documents.render_snapshot(spec, fmt, preset)
+
+
+def render_menu_variant(spec: Dict[str, Any], background: Optional[Tuple[bytes, Tuple[int, int]]],
+                        families: Dict[str, Optional[str]], fmt: str = "png",
+                        preset: Optional[str] = None) -> List[Encoded]:
+    """
+    배치 렌더 한 건: 부모가 한 번 받아 디코딩한 배경(raw RGB, 크기)과
+    이미 고른 폰트 패밀리(스타일 → 파일)를 받아 다운로드/패밀리 선택 없이 렌더
+    """
+    from . import font_service
+    from .menu_service import MenuReq, render_menu_pages
+    canvas = Image.frombytes("RGB", background[1], background[0]) if background else None
+    pages = render_menu_pages(MenuReq(**spec), canvas, font_service.FontResolver(families))
+    return [image_encoding.encode(page, fmt, preset) for page in pages]
+
+
+def render_menu_vector(spec: Dict[str, Any], output: str, papers: List[str]) -> List[Tuple[str, List[bytes]]]:
+    """레이아웃 1회 → 용지별 SVG/PDF 바이트 (menu_vector.export)"""
+    from . import menu_vector
+    from .menu_service import MenuReq
+    return menu_vector.export(menu_vector.render(MenuReq(**spec)), output, papers)
+
+
+def procedural_image(keywords: List[str], colors: List[str], size: Tuple[int, int],
+                     fmt: str = "png", preset: Optional[str] = None) -> Encoded:
+    from . import procedural_bg
+    return image_encoding.encode(procedural_bg.render(keywords, colors, size), fmt, preset)
+
+
+def demo_image_png(prompt: str, seed: Optional[int], comfyui_url: str, translation_model: str) -> bytes:
+    """ComfyUI 실패 시 데모 이미지 (image_from_copy.generate_image_demo)"""
+    img = Image.new("RGB", (1024, 1024), color="lightcoral")
+    draw = ImageDraw.Draw(img)
+
+    try:
+        font = ImageFont.load_default()
+    except Exception:
+        font = None
+
+    title = "ComfyUI Connection Failed - Demo Mode"
+    if font:
+        bbox = draw.textbbox((0, 0), title, font=font)
+        title_w = bbox[2] - bbox[0]
+        x = (1024 - title_w) // 2
+        draw.text((x, 100), title, fill="white", font=font)
+
+    info_lines = [
+        f"Prompt: {prompt[:60]}{'...' if len(prompt) > 60 else ''}",
+        f"Seed: {seed or 'Random'}",
+        "",
+        "ComfyUI Status: Failed",
+        "Check ComfyUI server (ngrok)",
+        f"at {comfyui_url}",
+        "",
+        "Translation: HuggingFace OK",
+        f"✓ {translation_model}",
+    ]
+
+    y = 300
+    for line in info_lines:
+        if font:
+            bbox = draw.textbbox((0, 0), line, font=font)
+            line_w = bbox[2] - bbox[0]
+            x = (1024 - line_w) // 2
+            draw.text((x, y), line, fill="white", font=font)
+        y += 35
+
+    return image_encoding.encode(img, "png", "fast").data
@@ -0,0 +1,349 @@
+# backend_fastapi/routes/tracing.py
+"""
+경량 분산 트레이싱 (OpenTelemetry 스타일, 외부 의존성 없음)
+
+- W3C traceparent 헤더로 들어온 trace 를 이어받고, 나가는 HTTP(requests/httpx)에 자동 전파
+  → redesign 의 자기 자신 호출(/menu-background, /menu-board)도 같은 trace_id 로 묶임
+- span(name) 컨텍스트 매니저 / traced(name) 데코레이터로 단계 구간 기록
+- 내보내기: 메모리 링버퍼 (GET /traces, /traces/{trace_id}) + 선택적 JSONL 파일
+- 응답에 Server-Timing 헤더 (상위 단계 몇 개 + total) → 프론트에서 표시
+
+환경 변수:
+    TRACING_ENABLED      1(기본) | 0
+    TRACE_BUFFER         메모리에 보관할 trace 수 (기본 200)
+    TRACE_EXPORT_FILE    지정 시 완료된 요청 단위로 span 을 JSONL 로 추가 기록
+    SERVER_TIMING_TOP    Server-Timing 에 넣을 단계 수 (기본 6)
+"""
+import contextvars
+import functools
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException
+
+router = APIRouter()
+
+ENABLED = os.getenv("TRACING_ENABLED", "1").lower() not in ("0", "false", "no")
+TRACE_BUFFER = int(os.getenv("TRACE_BUFFER", "200"))
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "").strip()
+SERVER_TIMING_TOP = int(os.getenv("SERVER_TIMING_TOP", "6"))
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end", "attrs", "status", "thread")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, attrs: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.status = "ok"
+        self.thread = threading.get_ident()
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.time()) - self.start) * 1000.0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration_ms, 2),
+            "status": self.status,
+            "attrs": self.attrs,
+        }
+
+
+class _Collector:
+    """요청 하나(로컬 루트 span)에 속한 span 목록. 스레드풀로 넘어가도 같은 객체를 공유"""
+    __slots__ = ("spans", "lock")
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self.lock:
+            self.spans.append(span)
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_collector: contextvars.ContextVar[Optional[_Collector]] = contextvars.ContextVar("trace_collector", default=None)
+
+
+# span 진입 시 호출되는 훅 (profiling 이 현재 스레드를 요청에 묶는 데 사용)
+_enter_hooks: List[Callable[[], None]] = []
+
+
+def add_enter_hook(fn: Callable[[], None]):
+    if fn not in _enter_hooks:
+        _enter_hooks.append(fn)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    with tracing.span("dalle", model=model_name):
+        ...
+    요청 밖(trace 없음)에서는 아무것도 기록하지 않음
+    """
+    for hook in _enter_hooks:
+        hook()
+    collector = _collector.get()
+    parent = _current_span.get()
+    if not ENABLED or collector is None:
+        yield None
+        return
+
+    s = Span(parent.trace_id if parent else secrets.token_hex(16), parent.span_id if parent else None, name, attrs)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except Exception as e:
+        s.status = "error"
+        s.attrs["error"] = f"{type(e).__name__}: {e}"[:200]
+        raise
+    finally:
+        s.end = time.time()
+        _current_span.reset(token)
+        collector.add(s)
+
+
+def record(name: str, start: float, end: Optional[float] = None, **attrs):
+    """
+    이미 끝난 구간을 span 으로 기록 (yield 를 사이에 둔 제너레이터 구간 등,
+    컨텍스트 매니저로 감쌀 수 없는 곳에서 사용). start/end 는 time.time() 값
+    """
+    collector = _collector.get()
+    parent = _current_span.get()
+    if not ENABLED or collector is None or parent is None:
+        return
+    s = Span(parent.trace_id, parent.span_id, name, attrs)
+    s.start, s.end = start, end or time.time()
+    collector.add(s)
+
+
+def traced(name: Optional[str] = None):
+    """함수 전체를 span 으로 감싸는 데코레이터"""
+    def deco(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def traceparent() -> Optional[str]:
+    s = _current_span.get()
+    if s is None:
+        return None
+    return f"00-{s.trace_id}-{s.span_id}-01"
+
+
+# ---------------------------------------------------------------
+# 내보내기: 링버퍼 + JSONL
+# ---------------------------------------------------------------
+_traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+_traces_lock = threading.Lock()
+
+
+def _export(spans: List[Span]):
+    if not spans:
+        return
+    rows = [s.to_dict() for s in spans]
+    trace_id = spans[0].trace_id
+    with _traces_lock:
+        _traces.setdefault(trace_id, []).extend(rows)
+        _traces.move_to_end(trace_id)
+        while len(_traces) > TRACE_BUFFER:
+            _traces.popitem(last=False)
+        if TRACE_EXPORT_FILE:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(TRACE_EXPORT_FILE)), exist_ok=True)
+                with open(TRACE_EXPORT_FILE, "a", encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            except Exception as e:
+                print(f"[tracing] export 실패: {e}")
+
+
+def spans_for(trace_id: str) -> List[Dict[str, Any]]:
+    with _traces_lock:
+        return list(_traces.get(trace_id, []))
+
+
+# ---------------------------------------------------------------
+# Server-Timing
+# ---------------------------------------------------------------
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)[:40] or "stage"
+
+
+def server_timing(spans: List[Span], root: Span, top: int = SERVER_TIMING_TOP) -> str:
+    """루트를 제외한 단계들을 이름별로 합산해 오래 걸린 순 상위 top 개 + total"""
+    totals: Dict[str, float] = {}
+    for s in spans:
+        if s is root:
+            continue
+        totals[s.name] = totals.get(s.name, 0.0) + s.duration_ms
+    stages = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    parts = [f"{_metric_name(n)};dur={d:.1f}" for n, d in stages]
+    parts.append(f"total;dur={root.duration_ms:.1f}")
+    return ", ".join(parts)
+
+
+# ---------------------------------------------------------------
+# ASGI 미들웨어
+# ---------------------------------------------------------------
+class TracingMiddleware:
+    """요청마다 루트 span 생성 + traceparent 수신 + Server-Timing/traceresponse 헤더 추가"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not ENABLED or scope["type"] != "http" or scope.get("path", "").startswith(("/traces", "/metrics")):
+            return await self.app(scope, receive, send)
+
+        trace_id, parent_id = None, None
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                m = _TRACEPARENT.match(value.decode("latin-1").strip())
+                if m:
+                    trace_id, parent_id = m.group(1), m.group(2)
+                break
+
+        collector = _Collector()
+        root = Span(trace_id or secrets.token_hex(16), parent_id,
+                    f"{scope.get('method', '')} {scope.get('path', '')}", {})
+        tok_c = _collector.set(collector)
+        tok_s = _current_span.set(root)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.attrs["status"] = message["status"]
+                timing = server_timing(collector.spans, root)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                headers.append((b"traceresponse", f"00-{root.trace_id}-{root.span_id}-01".encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            root.status = "error"
+            raise
+        finally:
+            root.end = time.time()
+            _current_span.reset(tok_s)
+            _collector.reset(tok_c)
+            _export([root] + collector.spans)
+
+
+# ---------------------------------------------------------------
+# 나가는 HTTP 자동 span + traceparent 전파
+# ---------------------------------------------------------------
+_http_instrumented = False
+
+
+def _host(url: str) -> str:
+    m = re.match(r"^[a-z]+://([^/?#]+)", url)
+    return m.group(1) if m else url
+
+
+def instrument_http():
+    """requests(HTTPAdapter.send) / httpx(HTTPTransport.handle_request) 에 span + traceparent 주입"""
+    global _http_instrumented
+    if _http_instrumented or not ENABLED:
+        return
+    _http_instrumented = True
+
+    from requests.adapters import HTTPAdapter
+
+    original_send = HTTPAdapter.send
+
+    def send(self, request, *args, **kwargs):
+        if _collector.get() is None:
+            return original_send(self, request, *args, **kwargs)
+        with span(f"http {request.method} {_host(request.url)}", url=request.url.split("?", 1)[0]) as s:
+            request.headers["traceparent"] = traceparent()
+            resp = original_send(self, request, *args, **kwargs)
+            s.set(status=resp.status_code)
+            return resp
+
+    HTTPAdapter.send = send
+
+    try:
+        import httpx
+    except ImportError:
+        return
+
+    original_handle = httpx.HTTPTransport.handle_request
+
+    def handle_request(self, request):
+        if _collector.get() is None:
+            return original_handle(self, request)
+        url = str(request.url)
+        with span(f"http {request.method} {_host(url)}", url=url.split("?", 1)[0]) as s:
+            request.headers["traceparent"] = traceparent()
+            resp = original_handle(self, request)
+            s.set(status=resp.status_code)
+            return resp
+
+    httpx.HTTPTransport.handle_request = handle_request
+
+
+# ---------------------------------------------------------------
+# 조회 API (로컬 디버깅용)
+# ---------------------------------------------------------------
+@router.get("/traces")
+def list_traces(limit: int = 20):
+    """최근 trace 요약 (루트 span 기준)"""
+    with _traces_lock:
+        items: List[Tuple[str, List[Dict[str, Any]]]] = list(_traces.items())[-max(1, min(limit, TRACE_BUFFER)):]
+    out = []
+    for trace_id, rows in reversed(items):
+        roots = [r for r in rows if r["name"].split(" ", 1)[0] in ("GET", "POST", "PUT", "PATCH", "DELETE")]
+        first = min(roots or rows, key=lambda r: r["start"])
+        out.append({
+            "trace_id": trace_id,
+            "name": first["name"],
+            "duration_ms": first["duration_ms"],
+            "spans": len(rows),
+            "start": first["start"],
+        })
+    return {"ok": True, "traces": out}
+
+
+@router.get("/traces/{trace_id}")
+def get_trace(trace_id: str):
+    rows = spans_for(trace_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="trace not found")
+    return {"ok": True, "trace_id": trace_id, "spans": sorted(rows, key=lambda r: r["start"])}
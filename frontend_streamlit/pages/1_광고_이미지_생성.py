@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
+import json
+import base64
 import requests
 import streamlit as st
 from dotenv import load_dotenv
@@ -165,6 +167,49 @@ st.markdown("</div></div>", unsafe_allow_html=True)
 import shutil
 from pathlib import Path
 
+
+def generate_with_preview(payload, progress_bar, preview_box):
+    """SSE 스트림으로 진행률/미리보기를 표시하고 최종 응답(dict)을 반환"""
+    with requests.post(
+        f"{BACKEND}/generate/image-from-copy/stream",
+        json=payload,
+        stream=True,
+        timeout=(10, 300),
+    ) as resp:
+        if resp.status_code == 404:
+            # 스트리밍 엔드포인트가 없는 백엔드 → 기존 방식
+            r = requests.post(f"{BACKEND}/generate/image-from-copy", json=payload, timeout=300)
+            r.raise_for_status()
+            return r.json()
+        resp.raise_for_status()
+        resp.encoding = "utf-8"
+
+        event = None
+        for line in resp.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+                continue
+            if not line.startswith("data:"):
+                continue
+            data = json.loads(line[len("data:"):].strip())
+
+            if event == "status":
+                progress_bar.progress(0, text="프롬프트 준비 중..." if data.get("stage") == "prompt" else "이미지 생성 중...")
+            elif event == "progress":
+                progress_bar.progress(min(100, int(data.get("percent", 0))), text=f"샘플링 {data.get('value')}/{data.get('max')}")
+            elif event == "preview":
+                preview_box.image(base64.b64decode(data["image"]), caption="미리보기", width=320)
+            elif event == "done":
+                progress_bar.progress(100, text="완료")
+                return data
+            elif event == "error":
+                raise RuntimeError(data.get("detail") or "이미지 생성 실패")
+
+    raise RuntimeError("생성 스트림이 완료 전에 끊어졌습니다.")
+
+
 if generate:
     if not text.strip():
         st.warning("광고 문구를 입력해주세요.")
@@ -174,18 +219,15 @@ if generate:
             "style": style.strip() or None,
             "seed": int(seed) if seed else None
         }
+        progress_bar = st.progress(0, text="이미지 생성 준비 중...")
+        preview_box = st.empty()
         with st.spinner("이미지 생성 중..."):
             try:
-                resp = requests.post(
-                    f"{BACKEND}/generate/image-from-copy",
-                    json=payload,
-                    timeout=300
-                )
-                resp.raise_for_status()
+                data = generate_with_preview(payload, progress_bar, preview_box)
             except Exception as e:
                 st.error(f"백엔드 요청 실패: {e}")
             else:
-                data = resp.json()
+                preview_box.empty()
                 file_url = data.get("file_url")
 
                 if not file_url or not file_url.startswith("http"):
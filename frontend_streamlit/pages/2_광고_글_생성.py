@@ -32,6 +32,18 @@ def fetch_bytes(url: Optional[str], timeout: int = 10) -> Optional[bytes]:
     except Exception:
         return None
 
+def server_timing_caption(header: Optional[str]) -> Optional[str]:
+    """백엔드 Server-Timing 헤더 → '단계 1.2s · 단계 0.3s' 형태"""
+    parts = []
+    for item in (header or "").split(","):
+        name, _, rest = item.strip().partition(";")
+        if rest.startswith("dur="):
+            try:
+                parts.append(f"{name} {float(rest[4:]) / 1000:.2f}s")
+            except ValueError:
+                continue
+    return " · ".join(parts) or None
+
 def post_generate(files: Dict[str, Any], data: Dict[str, Any]) -> requests.Response:
     return requests.post(API_ENDPOINT, files=files, data=data, timeout=REQ_TIMEOUT)
 
@@ -213,6 +225,9 @@ if generate:
             else:
                 res = resp.json()
                 st.success("완료! 🎉 생성된 광고 문구를 확인하세요.")
+                timing = server_timing_caption(resp.headers.get("Server-Timing"))
+                if timing:
+                    st.caption(f"⏱️ {timing}")
 
                 # 🔑 반드시 URL만 사용
                 img_url = res.get("uploaded_url")
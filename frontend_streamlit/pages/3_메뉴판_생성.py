@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-import os, requests, shutil
+import os, json, time, requests, shutil
 from pathlib import Path
 import streamlit as st
 from dotenv import load_dotenv
@@ -14,6 +14,22 @@ BACKEND = (
     or "https://hidden-leaf-village.onrender.com"
 ).rstrip("/")
 
+# 미리보기: 편집이 이 시간(초) 동안 멈추면 백엔드에 축소 렌더 요청 (저장은 생성 버튼으로만)
+PREVIEW_DEBOUNCE = 0.4
+PREVIEW_POLL = 0.5
+
+def server_timing_caption(header):
+    """백엔드 Server-Timing 헤더 → '단계 1.2s · 단계 0.3s' 형태"""
+    parts = []
+    for item in (header or "").split(","):
+        name, _, rest = item.strip().partition(";")
+        if rest.startswith("dur="):
+            try:
+                parts.append(f"{name} {float(rest[4:]) / 1000:.2f}s")
+            except ValueError:
+                continue
+    return " · ".join(parts) or None
+
 # ----------------------------
 # 페이지 기본 설정
 # ----------------------------
@@ -144,8 +160,8 @@ if st.session_state["show_help_menu"]:
         unsafe_allow_html=True,
     )
 
-shop = st.text_input("가게명", value="My Cafe")
-theme = st.selectbox("테마", ["simple", "modern", "vintage", "neon", "korean"])
+shop = st.text_input("가게명", value="My Cafe", key="menu_shop")
+theme = st.selectbox("테마", ["simple", "modern", "vintage", "neon", "korean"], key="menu_theme")
 
 st.subheader("메뉴 입력")
 
@@ -170,6 +186,44 @@ if st.button("➕ 메뉴 추가", use_container_width=True, type="secondary"):
     st.session_state["menu_items"].append({"name": "", "price": 0, "desc": ""})
     st.rerun()
 
+def menu_payload():
+    return {
+        "shop_name": st.session_state.get("menu_shop") or None,
+        "theme": st.session_state.get("menu_theme"),
+        "items": st.session_state["menu_items"],
+    }
+
+@st.fragment(run_every=PREVIEW_POLL)
+def live_preview():
+    """입력이 PREVIEW_DEBOUNCE 초 동안 그대로면 /menu-board/preview (JPEG, 저장 없음) 로 갱신"""
+    key = json.dumps(menu_payload(), ensure_ascii=False, sort_keys=True)
+    now = time.monotonic()
+    if key != st.session_state.get("preview_pending"):
+        st.session_state["preview_pending"] = key
+        st.session_state["preview_changed_at"] = now
+    settled = now - st.session_state["preview_changed_at"] >= PREVIEW_DEBOUNCE
+    if settled and key != st.session_state.get("preview_key"):
+        st.session_state["preview_key"] = key
+        try:
+            r = requests.post(f"{BACKEND}/generate/menu-board/preview", json=menu_payload(), timeout=5)
+            r.raise_for_status()
+            st.session_state["preview_image"] = r.content
+            pages = int(r.headers.get("X-Preview-Pages", "1"))
+            st.session_state["preview_caption"] = (
+                f"미리보기 · 렌더 {r.headers.get('X-Render-Ms', '?')}ms"
+                + (f" · 총 {pages}페이지 중 1페이지" if pages > 1 else "")
+            )
+        except requests.RequestException as e:
+            st.session_state["preview_caption"] = f"미리보기 실패: {e}"
+
+    if st.session_state.get("preview_image"):
+        st.image(st.session_state["preview_image"], caption=st.session_state.get("preview_caption"), width=360)
+    elif st.session_state.get("preview_caption"):
+        st.caption(st.session_state["preview_caption"])
+
+st.subheader("미리보기")
+live_preview()
+
 generate = st.button("✨ 메뉴판 생성", use_container_width=True, type="primary")
 
 st.markdown("</div></div>", unsafe_allow_html=True)
@@ -178,11 +232,7 @@ st.markdown("</div></div>", unsafe_allow_html=True)
 # Action
 # ----------------------------
 if generate:
-    payload = {
-        "shop_name": shop or None,
-        "theme": theme,
-        "items": st.session_state["menu_items"],
-    }
+    payload = menu_payload()
     with st.spinner("생성 중..."):
         try:
             r = requests.post(f"{BACKEND}/generate/menu-board", json=payload, timeout=120)
@@ -190,6 +240,9 @@ if generate:
             data = r.json()
 
             st.success("완료! 🎉 생성된 메뉴판을 확인하세요.")
+            timing = server_timing_caption(r.headers.get("Server-Timing"))
+            if timing:
+                st.caption(f"⏱️ {timing}")
 
             img_url = data.get("image_url") or data.get("url") or data.get("file_url")
             if not img_url:
@@ -226,6 +279,10 @@ if generate:
                     st.image(str(found_path), caption="생성된 메뉴판", use_container_width=True)
                     st.code(str(found_path))
 
+                # 아이템이 많아 여러 장으로 나뉜 경우 나머지 페이지
+                for i, page_url in enumerate((data.get("page_urls") or [])[1:], start=2):
+                    st.image(page_url, caption=f"메뉴판 {i}페이지", use_container_width=True)
+
         except requests.RequestException as e:
             resp_text = ""
             if getattr(e, "response", None) is not None:
@@ -0,0 +1,97 @@
+"""
+메뉴판 줄바꿈 마이크로 벤치마크: 기존 _wrap_text (textbbox 반복 측정) vs menu_layout.break_lines
+
+사용법:
+    python scripts/bench_menu_layout.py
+    python scripts/bench_menu_layout.py --font backend_fastapi/fonts/NotoSansKR-Regular.ttf --size 30 --width 840 --repeat 200
+
+같은 텍스트를 여러 번 줄바꿈해 1회 평균 시간을 비교하고, 줄 수와 최대 줄 폭(실제 textbbox 기준)을 함께 출력한다.
+띄어쓰기 없는 한글 설명에서 기존 방식이 폭을 넘기는지도 확인할 수 있다.
+"""
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+from PIL import Image, ImageDraw, ImageFont
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "backend_fastapi"))
+
+from routes import menu_layout  # noqa: E402
+
+SAMPLES = {
+    "short": "묵은지로 끓인 얼큰한 김치찌개",
+    "spaced": "국내산 돼지고기를 사용하여 정성껏 만든 수제 돈까스와 특제 소스, 신선한 양배추 샐러드가 함께 제공됩니다. " * 4,
+    "no_space": "국내산돼지고기를사용하여정성껏만든수제돈까스와특제소스신선한양배추샐러드가함께제공됩니다" * 4,
+    "mixed": "Signature 크림 파스타 (Cream Pasta) — 생크림, 베이컨, 버섯, 파르메산 치즈 / 2인분 24,000원 " * 4,
+}
+
+
+def legacy_textsize(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont):
+    bbox = draw.textbbox((0, 0), text, font=font)
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+
+def legacy_wrap_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, max_width: int) -> List[str]:
+    """menu_service._wrap_text 원본"""
+    if not text:
+        return []
+    words = text.split()
+    lines, cur = [], ""
+    for w in words:
+        test = (cur + " " + w).strip()
+        if legacy_textsize(draw, test, font)[0] <= max_width:
+            cur = test
+        else:
+            if cur:
+                lines.append(cur)
+            cur = w
+    if cur:
+        lines.append(cur)
+    return lines
+
+
+def bench(fn, repeat: int) -> float:
+    fn()  # 워밍업 (글자 폭 캐시 채움)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000.0
+
+
+def load_font(path: str, size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype(path, size)
+    except Exception as e:
+        print(f"폰트 로드 실패 ({path}): {e} → PIL 기본 폰트 사용 (한글 폭은 부정확)")
+        return ImageFont.load_default()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="메뉴판 줄바꿈 벤치마크")
+    parser.add_argument("--font", default=os.path.join(ROOT, "backend_fastapi", "fonts", "NotoSansKR-Regular.ttf"))
+    parser.add_argument("--size", type=int, default=30)
+    parser.add_argument("--width", type=int, default=840, help="설명 영역 폭 (render_menu 기본 1080-2*120)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    font = load_font(args.font, args.size)
+    draw = ImageDraw.Draw(Image.new("RGB", (args.width + 200, 200)))
+
+    print(f"{'sample':<10} {'chars':>6} {'legacy ms':>10} {'new ms':>9} {'speedup':>8}"
+          f" {'lines(old/new)':>15} {'max px(old/new)':>16}")
+    for name, text in SAMPLES.items():
+        old_ms = bench(lambda: legacy_wrap_text(draw, text, font, args.width), args.repeat)
+        new_ms = bench(lambda: menu_layout.break_lines(text, font, args.width), args.repeat)
+        old_lines = legacy_wrap_text(draw, text, font, args.width)
+        new_lines = menu_layout.break_lines(text, font, args.width)
+        old_max = max((legacy_textsize(draw, ln, font)[0] for ln in old_lines), default=0)
+        new_max = max((legacy_textsize(draw, ln, font)[0] for ln in new_lines), default=0)
+        print(f"{name:<10} {len(text):>6} {old_ms:>10.3f} {new_ms:>9.3f} {old_ms / max(new_ms, 1e-9):>7.1f}x"
+              f" {len(old_lines):>7}/{len(new_lines):<7} {old_max:>8}/{new_max:<7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+render_executor 처리량 벤치마크: 워커 수별 초당 렌더 수
+
+사용법:
+    python scripts/bench_render_executor.py                       # 워커 0(인라인),1,2,4
+    python scripts/bench_render_executor.py --workers 0,2,4,8 --jobs 64 --task procedural
+
+워커 0 은 요청 스레드에서 직접 실행하는 기존 방식 (스레드 여러 개여도 GIL 때문에 코어 하나).
+동시 요청은 스레드 (워커 수 x 2, 최소 4) 로 흉내낸다. 배경 URL 없이 렌더하므로 네트워크는 쓰지 않는다.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "backend_fastapi"))
+os.environ.setdefault("GOOGLE_FONTS_API_KEY", "")  # 폰트 다운로드 없이 기본 폰트
+os.environ.setdefault("OPENAI_API_KEY", "bench")  # menu_service import 용 (호출하지 않음)
+
+from routes import render_executor  # noqa: E402
+
+MENU_SPEC = {
+    "title": "오늘의 메뉴",
+    "theme": "고딕",
+    "items": [
+        {"name": f"메뉴 {i + 1} 김치찌개", "price": 9000 + i * 500,
+         "desc": "묵은지로 끓인 얼큰한 찌개, 국내산 돼지고기와 두부가 들어갑니다"}
+        for i in range(14)
+    ],
+}
+BG_ARGS = (["vintage", "paper"], ["#F3E9DC", "#C08552", "#5E3023"], (1080, 1528))
+
+
+def one(task: str):
+    if task == "menu":
+        return render_executor.run(render_executor.render_menu_image, MENU_SPEC)
+    return render_executor.run(render_executor.procedural_image, *BG_ARGS)
+
+
+def bench(workers: int, jobs: int, task: str) -> float:
+    render_executor.start(workers)
+    one(task)  # 워밍업
+    threads = max(4, workers * 2)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: one(task), range(jobs)))
+    return jobs / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="render_executor 처리량 벤치마크")
+    parser.add_argument("--workers", default="0,1,2,4", help="콤마 구분 워커 수 목록")
+    parser.add_argument("--jobs", type=int, default=32)
+    parser.add_argument("--task", choices=["menu", "procedural"], default="menu")
+    args = parser.parse_args()
+
+    print(f"CPU {os.cpu_count()}개, task={args.task}, jobs={args.jobs}")
+    print(f"{'workers':>8} {'renders/s':>10} {'speedup':>8}")
+    baseline = None
+    try:
+        for w in [int(x) for x in args.workers.split(",") if x.strip()]:
+            rps = bench(w, args.jobs, args.task)
+            baseline = baseline or rps
+            print(f"{w:>8} {rps:>10.2f} {rps / baseline:>7.2f}x")
+    finally:
+        render_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
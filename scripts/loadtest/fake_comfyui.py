@@ -0,0 +1,268 @@
+"""
+가짜 ComfyUI 서버 (부하 테스트용, GPU 불필요)
+
+- POST /prompt, GET /history/{id}, GET /view, GET /queue, POST /upload/image,
+  GET /system_stats, GET /object_info, POST /free, WS /ws?clientId=
+- GPU 처럼 작업을 한 번에 하나씩 실행 (큐 대기 재현)
+- 실행 시간 = 노드 오버헤드 + 스텝 수 × 스텝당 시간 × (해상도/512²)
+- 웹소켓으로 executing / progress 이벤트, SaveImageWebsocket 노드면 결과 PNG 바이너리 전송
+
+사용법:
+    python scripts/loadtest/fake_comfyui.py --port 8188 --step-ms 350 --error-rate 0.01
+
+백엔드 설정:
+    COMFYUI_URL=http://127.0.0.1:8188
+"""
+import argparse
+import asyncio
+import io
+import random
+import struct
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
+
+import uvicorn
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response
+from PIL import Image
+
+from latency import LatencyProfile
+
+app = FastAPI(title="fake-comfyui")
+
+API = LatencyProfile(median_ms=20)  # /prompt, /history 등 HTTP 응답 지연
+EXEC = {"node_ms": 30.0, "step_ms": 350.0, "sigma": 0.15, "error_rate": 0.0}
+
+HISTORY_LIMIT = 500
+_history: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_files: Dict[str, bytes] = {}
+_queue: "asyncio.Queue[Dict[str, Any]]" = None
+_pending: List[str] = []
+_running: Optional[str] = None
+_sockets: Dict[str, Set[WebSocket]] = {}
+
+
+# ---------------------------------------------------------------
+# 웹소켓
+# ---------------------------------------------------------------
+@app.websocket("/ws")
+async def ws_endpoint(ws: WebSocket):
+    client_id = ws.query_params.get("clientId") or uuid.uuid4().hex
+    await ws.accept()
+    _sockets.setdefault(client_id, set()).add(ws)
+    await ws.send_json({"type": "status", "data": {"status": {"exec_info": {"queue_remaining": len(_pending)}},
+                                                   "sid": client_id}})
+    try:
+        while True:
+            await ws.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        _sockets.get(client_id, set()).discard(ws)
+
+
+async def _send(client_id: Optional[str], message: Any):
+    for ws in list(_sockets.get(client_id or "", ())):
+        try:
+            if isinstance(message, bytes):
+                await ws.send_bytes(message)
+            else:
+                await ws.send_json(message)
+        except Exception:
+            _sockets.get(client_id, set()).discard(ws)
+
+
+# ---------------------------------------------------------------
+# 실행 시뮬레이션
+# ---------------------------------------------------------------
+@lru_cache(maxsize=16)
+def _png(width: int, height: int, shade: int) -> bytes:
+    img = Image.new("RGB", (width, height), (200, 160 + shade, 120))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _workflow_shape(workflow: Dict[str, Any]):
+    """해상도/스텝 추출 (EmptyLatentImage 또는 업로드 원본 기준)"""
+    width = height = 512
+    steps = 4
+    for node in workflow.values():
+        inputs = node.get("inputs", {})
+        if node.get("class_type") == "EmptyLatentImage":
+            width, height = int(inputs.get("width", width)), int(inputs.get("height", height))
+        elif node.get("class_type") == "KSampler":
+            steps = int(inputs.get("steps", steps))
+    return width, height, steps
+
+
+def _jitter(ms: float) -> float:
+    return LatencyProfile(median_ms=ms, sigma=EXEC["sigma"]).sample()
+
+
+async def _execute(item: Dict[str, Any]):
+    prompt_id, client_id, workflow = item["prompt_id"], item["client_id"], item["workflow"]
+    width, height, steps = _workflow_shape(workflow)
+    scale = max(0.25, width * height / (512 * 512))
+    messages = [["execution_start", {"prompt_id": prompt_id, "timestamp": int(time.time() * 1000)}]]
+    outputs: Dict[str, Any] = {}
+
+    await _send(client_id, {"type": "execution_start", "data": {"prompt_id": prompt_id}})
+    try:
+        for node_id, node in workflow.items():
+            await _send(client_id, {"type": "executing", "data": {"node": node_id, "prompt_id": prompt_id}})
+            class_type = node.get("class_type")
+
+            if class_type in ("KSampler", "KSamplerAdvanced"):
+                if EXEC["error_rate"] and random.random() < EXEC["error_rate"]:
+                    raise RuntimeError("fake sampler failure")
+                for step in range(1, steps + 1):
+                    await asyncio.sleep(_jitter(EXEC["step_ms"] * scale))
+                    await _send(client_id, {"type": "progress", "data": {
+                        "value": step, "max": steps, "prompt_id": prompt_id, "node": node_id}})
+                continue
+
+            await asyncio.sleep(_jitter(EXEC["node_ms"]))
+            if class_type == "SaveImageWebsocket":
+                # ComfyUI 바이너리 포맷: [event=1 PREVIEW_IMAGE][format=2 PNG][data]
+                await _send(client_id, struct.pack(">II", 1, 2) + _png(width, height, random.randint(0, 60)))
+            elif class_type == "SaveImage":
+                filename = f"fake_{prompt_id[:8]}_00001_.png"
+                _files[filename] = _png(width, height, random.randint(0, 60))
+                outputs[node_id] = {"images": [{"filename": filename, "subfolder": "", "type": "output"}]}
+            elif class_type == "SaveLatent":
+                filename = f"fake_{prompt_id[:8]}_00001_.latent"
+                _files[filename] = b"fake-latent:" + prompt_id.encode()
+                outputs[node_id] = {"latents": [{"filename": filename, "subfolder": "latents", "type": "output"}]}
+
+        messages.append(["execution_success", {"prompt_id": prompt_id, "timestamp": int(time.time() * 1000)}])
+        status = {"status_str": "success", "completed": True, "messages": messages}
+    except Exception as e:
+        messages.append(["execution_error", {"prompt_id": prompt_id, "timestamp": int(time.time() * 1000),
+                                             "exception_message": str(e)}])
+        status = {"status_str": "error", "completed": False, "messages": messages}
+        await _send(client_id, {"type": "execution_error",
+                                "data": {"prompt_id": prompt_id, "exception_message": str(e)}})
+
+    _history[prompt_id] = {"prompt": [0, prompt_id, workflow, {}, []], "outputs": outputs, "status": status}
+    while len(_history) > HISTORY_LIMIT:
+        old_id, old = _history.popitem(last=False)
+        for node_out in old.get("outputs", {}).values():
+            for info in node_out.get("images", []) + node_out.get("latents", []):
+                _files.pop(info["filename"], None)
+    await _send(client_id, {"type": "executing", "data": {"node": None, "prompt_id": prompt_id}})
+
+
+async def _worker():
+    global _running
+    while True:
+        item = await _queue.get()
+        _pending.remove(item["prompt_id"])
+        _running = item["prompt_id"]
+        try:
+            await _execute(item)
+        finally:
+            _running = None
+
+
+@app.on_event("startup")
+async def _startup():
+    global _queue
+    _queue = asyncio.Queue()
+    asyncio.create_task(_worker())
+
+
+# ---------------------------------------------------------------
+# HTTP API
+# ---------------------------------------------------------------
+@app.post("/prompt")
+async def queue_prompt(request: Request):
+    body = await request.json()
+    await API.wait()
+    if API.should_fail():
+        raise HTTPException(status_code=API.error_status, detail="fake upstream error")
+    workflow = body.get("prompt") or {}
+    if not workflow:
+        raise HTTPException(status_code=400, detail="no prompt")
+
+    prompt_id = str(uuid.uuid4())
+    _pending.append(prompt_id)
+    await _queue.put({"prompt_id": prompt_id, "client_id": body.get("client_id"), "workflow": workflow})
+    return {"prompt_id": prompt_id, "number": len(_pending), "node_errors": {}}
+
+
+@app.get("/history/{prompt_id}")
+async def history(prompt_id: str):
+    await API.wait()
+    if prompt_id in _history:
+        return {prompt_id: _history[prompt_id]}
+    return {}
+
+
+@app.get("/view")
+async def view(filename: str, subfolder: str = "", type: str = "output"):
+    await API.wait()
+    data = _files.get(filename)
+    if data is None:
+        raise HTTPException(status_code=404, detail="not found")
+    media_type = "image/png" if filename.endswith(".png") else "application/octet-stream"
+    return Response(content=data, media_type=media_type)
+
+
+@app.get("/queue")
+async def queue_state():
+    running = [[0, _running, {}, {}, []]] if _running else []
+    return {"queue_running": running, "queue_pending": [[i, pid, {}, {}, []] for i, pid in enumerate(_pending)]}
+
+
+@app.post("/upload/image")
+async def upload_image(image: UploadFile = File(...), overwrite: str = Form("false"), type: str = Form("input")):
+    await API.wait()
+    name = image.filename or f"upload_{uuid.uuid4().hex[:8]}.png"
+    _files[name] = await image.read()
+    return {"name": name, "subfolder": "", "type": type}
+
+
+@app.post("/free")
+async def free():
+    return {}
+
+
+@app.get("/system_stats")
+async def system_stats():
+    return {"system": {"os": "fake", "python_version": "", "comfyui_version": "fake"},
+            "devices": [{"name": "fake-gpu", "type": "cuda", "vram_total": 24 << 30, "vram_free": 20 << 30}]}
+
+
+@app.get("/object_info")
+async def object_info():
+    return {
+        "UnetLoaderGGUF": {"input": {"required": {"unet_name": [["flux1-schnell-Q4_K_S.gguf"]]}}},
+        "VAELoader": {"input": {"required": {"vae_name": [["ae.safetensors"]]}}},
+        "DualCLIPLoader": {"input": {"required": {"clip_name1": [["clip_l.safetensors"]]}}},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 ComfyUI 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8188)
+    LatencyProfile.add_args(parser, "api", 20, "HTTP API")
+    parser.add_argument("--node-ms", type=float, default=30.0, help="샘플러 외 노드당 실행 시간 (ms)")
+    parser.add_argument("--step-ms", type=float, default=350.0, help="512x512 기준 샘플링 스텝당 시간 (ms)")
+    parser.add_argument("--exec-sigma", type=float, default=0.15, help="실행 시간 퍼짐 (로그정규 sigma)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="실행 실패 비율 (execution_error)")
+    args = parser.parse_args()
+
+    global API
+    API = LatencyProfile.from_args(args, "api")
+    EXEC.update(node_ms=args.node_ms, step_ms=args.step_ms, sigma=args.exec_sigma, error_rate=args.error_rate)
+    print(f"[fake-comfyui] api={API} exec={EXEC}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
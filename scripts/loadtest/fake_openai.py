@@ -0,0 +1,160 @@
+"""
+가짜 OpenAI 서버 (부하 테스트용)
+
+- POST /v1/chat/completions : 요청 프롬프트를 보고 카피 후보 / 키워드 / 메뉴 재디자인 JSON 반환
+- POST /v1/images/generations : 요청 크기의 단색 PNG (b64_json)
+- GET  /fixtures/menu.png : 재디자인 부하용 샘플 메뉴판 이미지
+
+사용법:
+    python scripts/loadtest/fake_openai.py --port 9100 --chat-ms 1200 --image-ms 6000 --chat-error-rate 0.02
+
+백엔드 설정:
+    TEAM_GPT_BASE_URL=http://127.0.0.1:9100/v1   (copy_from_image)
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1     (menu_service, openai SDK)
+    OPENAI_API_KEY=fake
+"""
+import argparse
+import base64
+import io
+import json
+import random
+import time
+import uuid
+from functools import lru_cache
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from PIL import Image, ImageDraw
+
+from latency import LatencyProfile
+
+app = FastAPI(title="fake-openai")
+CHAT = LatencyProfile(median_ms=1200)
+IMAGE = LatencyProfile(median_ms=6000)
+
+HEADLINES = ["오늘만 만나는 특별한 가격", "하루를 바꾸는 작은 습관", "지금 가장 핫한 선택", "가볍게, 그러나 확실하게"]
+SUBLINES = ["매일 쓰기 좋은 데일리 아이템, 지금 확인하세요", "꼼꼼한 품질로 오래 쓰는 만족감", "필요한 것만 담아 더 가볍게"]
+
+
+def _error(profile: LatencyProfile) -> JSONResponse:
+    return JSONResponse(
+        status_code=profile.error_status,
+        content={"error": {"message": "fake upstream error", "type": "server_error", "code": None}},
+    )
+
+
+def _prompt_text(body: dict) -> str:
+    parts = []
+    for m in body.get("messages", []):
+        content = m.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts += [c.get("text", "") for c in content if c.get("type") == "text"]
+    return "\n".join(parts)
+
+
+def _chat_payload(text: str) -> dict:
+    """요청 종류별로 백엔드가 기대하는 JSON 스키마를 흉내"""
+    if "MenuItems" in text:
+        return {
+            "MenuItems": [{"name": n, "price": p, "desc": ""} for n, p in
+                          [("아메리카노", 4500), ("카페라떼", 5000), ("바닐라라떼", 5500), ("치즈케이크", 6500)]],
+            "NewTitle": "CAFE MENU",
+            "DesignKeywords": ["minimal", "warm", "wood texture"],
+            "ColorPalette": ["#3B2F2F", "#F5E6CC"],
+            "FontStyles": ["명조 제목체", "고딕 본문체"],
+        }
+    if '"keywords"' in text:
+        return {"keywords": random.sample(["데일리", "미니멀", "선물", "가성비", "여름", "휴대성", "감성", "프리미엄"], 6)}
+    if "candidates" in text:
+        return {"candidates": [{
+            "headline": random.choice(HEADLINES),
+            "subline": random.choice(SUBLINES),
+            "hashtags": ["#데일리", "#추천템", "#오늘의선택"],
+            "reasons": "짧고 명확한 혜택 강조",
+        } for _ in range(3)]}
+    return {"text": "부드럽고 깔끔한 맛의 시그니처 메뉴"}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await CHAT.wait()
+    if CHAT.should_fail():
+        return _error(CHAT)
+
+    content = json.dumps(_chat_payload(_prompt_text(body)), ensure_ascii=False)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+@lru_cache(maxsize=16)
+def _png(width: int, height: int, color: str) -> bytes:
+    img = Image.new("RGB", (width, height), color)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@app.post("/v1/images/generations")
+async def images_generations(request: Request):
+    body = await request.json()
+    await IMAGE.wait()
+    if IMAGE.should_fail():
+        return _error(IMAGE)
+
+    try:
+        width, height = (int(v) for v in str(body.get("size", "1024x1024")).split("x"))
+    except ValueError:
+        width, height = 1024, 1024
+    color = random.choice(["#F0E6D8", "#E8F0E6", "#E6ECF5", "#F5E6EC"])
+    data = base64.b64encode(_png(width, height, color)).decode("ascii")
+    return {"created": int(time.time()), "data": [{"b64_json": data}]}
+
+
+@lru_cache(maxsize=1)
+def _menu_fixture() -> bytes:
+    img = Image.new("RGB", (540, 764), "#FFFFFF")
+    draw = ImageDraw.Draw(img)
+    draw.text((40, 40), "MENU", fill="#000000")
+    for i, line in enumerate(["Americano 4500", "Latte 5000", "Cheesecake 6500"]):
+        draw.text((40, 120 + i * 40), line, fill="#333333")
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@app.get("/fixtures/menu.png")
+def menu_fixture():
+    return Response(content=_menu_fixture(), media_type="image/png")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 OpenAI 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    LatencyProfile.add_args(parser, "chat", 1200, "chat/completions")
+    LatencyProfile.add_args(parser, "image", 6000, "images/generations")
+    args = parser.parse_args()
+
+    global CHAT, IMAGE
+    CHAT = LatencyProfile.from_args(args, "chat")
+    IMAGE = LatencyProfile.from_args(args, "image")
+    print(f"[fake-openai] chat={CHAT} image={IMAGE}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+가짜 업스트림 서버 공용: 지연/오류 분포 설정
+
+지연은 로그정규 분포 (중앙값 median_ms, 퍼짐 sigma) 로 뽑는다.
+실제 OpenAI/ComfyUI 응답 시간처럼 꼬리가 긴 분포를 흉내내기 위함.
+"""
+import argparse
+import asyncio
+import math
+import random
+from dataclasses import dataclass
+
+
+@dataclass
+class LatencyProfile:
+    median_ms: float = 0.0
+    sigma: float = 0.3
+    error_rate: float = 0.0
+    error_status: int = 500
+
+    def sample(self) -> float:
+        """지연(초) 1회 샘플"""
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms / 1000.0 * math.exp(random.gauss(0.0, self.sigma))
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+    async def wait(self):
+        delay = self.sample()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @classmethod
+    def add_args(cls, parser: argparse.ArgumentParser, prefix: str, median_ms: float, help_name: str):
+        """--<prefix>-ms / --<prefix>-sigma / --<prefix>-error-rate / --<prefix>-error-status"""
+        parser.add_argument(f"--{prefix}-ms", type=float, default=median_ms,
+                            help=f"{help_name} 지연 중앙값 (ms)")
+        parser.add_argument(f"--{prefix}-sigma", type=float, default=0.3,
+                            help=f"{help_name} 지연 퍼짐 (로그정규 sigma, 0=고정)")
+        parser.add_argument(f"--{prefix}-error-rate", type=float, default=0.0,
+                            help=f"{help_name} 오류 비율 (0~1)")
+        parser.add_argument(f"--{prefix}-error-status", type=int, default=500,
+                            help=f"{help_name} 오류 시 HTTP 상태 코드")
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, prefix: str) -> "LatencyProfile":
+        key = prefix.replace("-", "_")
+        return cls(
+            median_ms=getattr(args, f"{key}_ms"),
+            sigma=getattr(args, f"{key}_sigma"),
+            error_rate=getattr(args, f"{key}_error_rate"),
+            error_status=getattr(args, f"{key}_error_status"),
+        )
@@ -0,0 +1,207 @@
+"""
+백엔드 부하 생성기 (open-loop, 목표 RPS)
+
+라우트별로 처리량, 지연 백분위수(p50/p95/p99), 오류율을 집계한다.
+지연은 '예정된 전송 시각' 기준으로 재므로, 백엔드가 밀려 전송이 늦어진 시간도 포함된다
+(coordinated omission 보정).
+
+사용법:
+    # 1) 가짜 업스트림 실행
+    python scripts/loadtest/fake_openai.py --port 9100
+    python scripts/loadtest/fake_comfyui.py --port 8188
+
+    # 2) 백엔드를 가짜 업스트림으로 연결해 실행
+    TEAM_GPT_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_BASE_URL=http://127.0.0.1:9100/v1 \\
+    OPENAI_API_KEY=fake COMFYUI_URL=http://127.0.0.1:8188 BACKEND_PUBLIC_URL=http://127.0.0.1:8000 \\
+    ENV=development sh scripts/dev_run_backend.sh
+
+    # 3) 부하
+    python scripts/loadtest/loadgen.py --rps 5 --duration 60 --mix copy=2,image=1,menu=2,redesign=1
+"""
+import argparse
+import io
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+from PIL import Image
+
+ROUTES = {
+    "copy": "/generate/copy-from-image",
+    "image": "/generate/image-from-copy",
+    "menu": "/generate/menu-board",
+    "redesign": "/generate/redesign/menu-board",
+}
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+    return s
+
+
+def _sample_png() -> bytes:
+    img = Image.new("RGB", (512, 512), (random.randint(0, 255), 180, 140))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def build_requests(base: str, fake_openai: str, image_quality: str) -> Dict[str, Callable[[], requests.Response]]:
+    """라우트 이름 → 요청 1건을 보내는 함수"""
+    png = _sample_png()
+    items = [{"name": n, "price": p} for n, p in
+             [("아메리카노", 4500), ("카페라떼", 5000), ("바닐라라떼", 5500), ("치즈케이크", 6500), ("크루아상", 4000)]]
+
+    def copy():
+        return _session().post(base + ROUTES["copy"], timeout=180,
+                               files={"file": ("product.png", png, "image/png")},
+                               data={"platform": "instagram", "n_candidates": "3"})
+
+    def image():
+        return _session().post(base + ROUTES["image"], timeout=300, json={
+            "text": random.choice(["fresh coffee on a wooden table", "summer sale banner with fruits"]),
+            "quality": image_quality,
+        })
+
+    def menu():
+        return _session().post(base + ROUTES["menu"], timeout=120, json={
+            "shop_name": "부하테스트 카페", "title": "MENU", "items": random.sample(items, 4),
+        })
+
+    def redesign():
+        return _session().post(base + ROUTES["redesign"], timeout=300, json={
+            "target_image_url": f"{fake_openai}/fixtures/menu.png",
+            "redesign_request": "따뜻한 우드톤의 미니멀한 카페 메뉴판",
+        })
+
+    return {"copy": copy, "image": image, "menu": menu, "redesign": redesign}
+
+
+def parse_mix(text: str) -> List[Tuple[str, float]]:
+    mix = []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise SystemExit(f"알 수 없는 라우트: {name} (가능: {', '.join(ROUTES)})")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    values = sorted(values)
+    if not values:
+        return None
+    k = (len(values) - 1) * q / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, latency: float, error: Optional[str]):
+        with self.lock:
+            self.counts[route] += 1
+            if error:
+                self.errors[route][error] += 1
+            else:
+                self.latencies[route].append(latency)
+
+    def report(self, elapsed: float) -> Dict[str, Dict]:
+        out = {}
+        for route in sorted(self.counts):
+            lat = self.latencies[route]
+            errors = dict(self.errors[route])
+            n = self.counts[route]
+            out[route] = {
+                "requests": n,
+                "ok": len(lat),
+                "error_rate": round(sum(errors.values()) / n, 4) if n else 0.0,
+                "errors": errors,
+                "throughput_rps": round(len(lat) / elapsed, 3) if elapsed else 0.0,
+                "p50": percentile(lat, 50),
+                "p95": percentile(lat, 95),
+                "p99": percentile(lat, 99),
+                "max": max(lat) if lat else None,
+            }
+        return out
+
+
+def run(args) -> Dict[str, Dict]:
+    senders = build_requests(args.base_url.rstrip("/"), args.fake_openai.rstrip("/"), args.image_quality)
+    mix = parse_mix(args.mix)
+    names, weights = [m[0] for m in mix], [m[1] for m in mix]
+    recorder = Recorder()
+
+    def fire(route: str, scheduled: float):
+        error = None
+        try:
+            r = senders[route]()
+            if r.status_code >= 400:
+                error = str(r.status_code)
+        except requests.RequestException as e:
+            error = type(e).__name__
+        recorder.record(route, time.perf_counter() - scheduled, error)
+
+    interval = 1.0 / args.rps
+    start = time.perf_counter()
+    total = int(args.rps * args.duration)
+    with ThreadPoolExecutor(max_workers=args.max_inflight) as pool:
+        for i in range(total):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, random.choices(names, weights)[0], scheduled)
+    elapsed = time.perf_counter() - start
+    return {"meta": {"rps": args.rps, "duration": args.duration, "mix": args.mix, "elapsed": round(elapsed, 2)},
+            "routes": recorder.report(elapsed)}
+
+
+def print_report(result: Dict):
+    fmt = lambda v: f"{v:.2f}" if isinstance(v, (int, float)) else "-"
+    print("\n" + "=" * 84)
+    print(f"부하 결과 (목표 {result['meta']['rps']} rps, {result['meta']['elapsed']}s, 지연: 초)")
+    print("=" * 84)
+    print(f"{'route':<10}{'req':>6}{'ok':>6}{'err%':>7}{'rps':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}  errors")
+    for route, s in result["routes"].items():
+        print(f"{route:<10}{s['requests']:>6}{s['ok']:>6}{s['error_rate'] * 100:>6.1f}%{s['throughput_rps']:>8.2f}"
+              f"{fmt(s['p50']):>8}{fmt(s['p95']):>8}{fmt(s['p99']):>8}{fmt(s['max']):>8}  {s['errors'] or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="hidden-leaf-village 백엔드 부하 생성기")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="백엔드 주소")
+    parser.add_argument("--fake-openai", default="http://127.0.0.1:9100", help="가짜 OpenAI 주소 (재디자인 원본 이미지용)")
+    parser.add_argument("--rps", type=float, default=2.0, help="목표 초당 요청 수")
+    parser.add_argument("--duration", type=float, default=30.0, help="부하 시간 (초)")
+    parser.add_argument("--mix", default="copy=1,image=1,menu=1,redesign=1", help="라우트 비율 (이름=가중치)")
+    parser.add_argument("--max-inflight", type=int, default=64, help="동시 진행 요청 상한")
+    parser.add_argument("--image-quality", default="draft", help="image-from-copy 품질 티어")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    result = run(args)
+    print_report(result)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()